@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from app.utils.proxy import router as gateway_router
 from app.utils.fetch_openapi import load_backend_openapi_specs
+from app.utils.client_pool import client_pool
+from app.utils.token_cache import token_cache
 
 app = FastAPI(
     title="Intelligence Gateway API",
@@ -14,10 +16,18 @@ app.include_router(gateway_router)
 @app.on_event("startup")
 async def on_startup():
     """
-    애플리케이션 시작 시 백엔드 서비스의 OpenAPI 사양을 로드.
+    애플리케이션 시작 시 백엔드 서비스 연결 풀을 생성하고 OpenAPI 사양을 로드.
     """
+    await client_pool.startup()
     await load_backend_openapi_specs(app)
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    """
+    애플리케이션 종료 시 백엔드 서비스 연결 풀을 닫음.
+    """
+    await client_pool.shutdown()
+
 @app.get("/openapi.json", include_in_schema=False)
 async def get_openapi():
     """
@@ -25,6 +35,13 @@ async def get_openapi():
     """
     return app.openapi_schema
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    게이트웨이 토큰 검증 캐시 지표(적중률, auth 검증 지연 시간) 반환.
+    """
+    return {"token_cache": token_cache.metrics()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
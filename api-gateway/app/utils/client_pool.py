@@ -0,0 +1,54 @@
+import os
+import httpx
+import logging
+from app.utils.servicelist import servicelist
+
+logger = logging.getLogger(__name__)
+
+# 연결 풀 설정
+KEEPALIVE_EXPIRY = float(os.getenv("GATEWAY_KEEPALIVE_EXPIRY", 30.0))
+MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", 20))
+CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", 5.0))
+HTTP2_ENABLED = os.getenv("GATEWAY_HTTP2", "false").lower() == "true"
+
+class ClientPool:
+    def __init__(self):
+        self.clients = {}
+
+    async def startup(self, services: dict = None):
+        """
+        백엔드 서비스별로 재사용 가능한 httpx.AsyncClient(연결 풀)를 생성합니다.
+        services가 주어지지 않으면 servicelist()의 설정을 사용합니다.
+        """
+        services = services or servicelist()
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+        for name, service in services.items():
+            self.clients[name] = httpx.AsyncClient(
+                base_url=service["url"],
+                timeout=httpx.Timeout(service["timeout"], connect=CONNECT_TIMEOUT),
+                limits=limits,
+                http2=HTTP2_ENABLED
+            )
+        logger.info(f"Client pool initialized for services: {list(self.clients)}")
+
+    async def shutdown(self):
+        """
+        생성된 모든 연결 풀을 닫습니다.
+        """
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients = {}
+
+    def get_client(self, service: str) -> httpx.AsyncClient:
+        """
+        서비스 이름에 해당하는 연결 풀을 가져옵니다.
+        등록되지 않은 서비스인 경우 None을 반환합니다.
+        """
+        return self.clients.get(service)
+
+client_pool = ClientPool()
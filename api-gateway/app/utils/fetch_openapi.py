@@ -1,24 +1,21 @@
 import httpx
 import asyncio
 from fastapi import FastAPI
-from app.utils.servicelist import servicelist
+from app.utils.client_pool import client_pool
 import logging
 
 logger = logging.getLogger(__name__)
 
-backend_urls = servicelist()
-
-async def fetch_openapi_spec(service_name: str, service_url: str):
+async def fetch_openapi_spec(service_name: str, client: httpx.AsyncClient):
     """
     백엔드 서비스에서 OpenAPI 사양을 가져옴.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{service_url}/openapi.json")
-            response.raise_for_status()
-            return service_name, response.json()
+        response = await client.get("/openapi.json")
+        response.raise_for_status()
+        return service_name, response.json()
     except (httpx.RequestError, httpx.HTTPStatusError) as e:
-        logger.error(f"Failed to fetch OpenAPI spec from {service_name} at {service_url}: {e}")
+        logger.error(f"Failed to fetch OpenAPI spec from {service_name} at {client.base_url}: {e}")
         return service_name, {}
 
 async def load_backend_openapi_specs(app: FastAPI):
@@ -26,7 +23,7 @@ async def load_backend_openapi_specs(app: FastAPI):
     모든 백엔드 서비스에서 OpenAPI 사양을 로드하고 하나로 결합.
     """
     specs = await asyncio.gather(
-        *[fetch_openapi_spec(name, url) for name, url in backend_urls.items()]
+        *[fetch_openapi_spec(name, client) for name, client in client_pool.clients.items()]
     )
 
     combined_spec = app.openapi()
@@ -1,50 +1,138 @@
+import os
+import posixpath
 import httpx
 from fastapi import APIRouter, Request, HTTPException, Response
-from app.utils.servicelist import servicelist
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.utils.client_pool import client_pool
+from app.utils.token_cache import token_cache, sign_internal_auth, INTERNAL_AUTH_HEADER, INTERNAL_AUTH_SECRET
 
 router = APIRouter()
 
-backend_urls = servicelist()
+ALLOWED_METHODS = ["POST", "GET", "PUT", "DELETE", "PATCH"]
+BODY_METHODS = ["POST", "PUT", "PATCH"]
 
-async def proxy_request(request: Request, backend_url: str) -> Response:
+# 스트리밍 프록시 모드: auto(업로드/다운로드/LangServe 스트림 경로만), always, never
+STREAMING_MODE = os.getenv("GATEWAY_STREAMING_MODE", "auto").lower()
+STREAMING_PATH_PREFIXES = ("upload", "download")
+STREAMING_PATH_SUFFIXES = ("/stream", "/stream_log", "/stream_events")
+
+# 게이트웨이 밖으로 노출하지 않는 서비스 내부 경로 (게이트웨이/백엔드 간 동기화 전용)
+INTERNAL_ONLY_PATHS = {
+    "auth": {"active_tokens"},
+}
+
+# 스트리밍 응답에서 그대로 전달하면 안 되는 hop-by-hop 헤더
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade"
+}
+
+def is_internal_only(service: str, path: str) -> bool:
+    """
+    서비스 내부 전용 경로인지 확인. 슬래시와 ./.. 조합으로 우회하지 못하도록 정규화한 뒤 비교합니다.
+    """
+    normalized = posixpath.normpath("/" + path).strip("/")
+    return normalized in INTERNAL_ONLY_PATHS.get(service, ())
+
+def use_streaming(path: str) -> bool:
+    """
+    요청 경로와 GATEWAY_STREAMING_MODE 설정에 따라 스트리밍 프록시 사용 여부를 결정.
+    """
+    if STREAMING_MODE == "always":
+        return True
+    if STREAMING_MODE == "never":
+        return False
+    normalized = path.rstrip("/")
+    return normalized.startswith(STREAMING_PATH_PREFIXES) or normalized.endswith(STREAMING_PATH_SUFFIXES)
+
+async def build_backend_headers(request: Request, service: str) -> dict:
+    """
+    백엔드로 전달할 헤더를 구성.
+    x-token이 있으면 게이트웨이에서 한 번만 검증(캐시 사용)하고, 서명된 내부 인증 헤더를 추가합니다.
+    """
+    headers = dict(request.headers)
+    # 클라이언트가 보낸 내부 인증 헤더는 신뢰하지 않음
+    headers.pop(INTERNAL_AUTH_HEADER, None)
+
+    token = headers.get("x-token")
+    if service == "auth" or not token:
+        return headers
+
+    if not await token_cache.verify(token):
+        raise HTTPException(status_code=401, detail="X-Token header invalid")
+    if INTERNAL_AUTH_SECRET:
+        headers[INTERNAL_AUTH_HEADER] = sign_internal_auth(token)
+    return headers
+
+async def proxy_request(request: Request, client: httpx.AsyncClient, path: str, headers: dict) -> Response:
     """
     프록시 요청을 백엔드 서비스로 전달.
+    서비스별 연결 풀(client)을 재사용하여 요청마다 새 연결을 만들지 않습니다.
+    """
+    method = request.method
+
+    params = dict(request.query_params)
+
+    if method not in ALLOWED_METHODS:
+        raise HTTPException(status_code=405, detail="Method not allowed")
+
+    try:
+        content = await request.body() if method in BODY_METHODS else None
+        response = await client.request(method, f"/{path}", content=content, headers=headers, params=params)
+
+        return Response(content=response.content, status_code=response.status_code, headers=dict(response.headers))
+    except httpx.ConnectError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to connect to the backend service: {str(e)}")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail=f"Backend service returned an error: {e.response.text}")
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while making the request: {str(e)}")
+
+async def streaming_proxy_request(request: Request, client: httpx.AsyncClient, path: str, headers: dict) -> StreamingResponse:
     """
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        headers = dict(request.headers)
-        method = request.method
-
-        params = dict(request.query_params)
-
-        try:
-            if method == "POST":
-                response = await client.post(backend_url, content=await request.body(), headers=headers, params=params)
-            elif method == "GET":
-                response = await client.get(backend_url, headers=headers, params=params)
-            elif method == "PUT":
-                response = await client.put(backend_url, content=await request.body(), headers=headers, params=params)
-            elif method == "DELETE":
-                response = await client.delete(backend_url, headers=headers, params=params)
-            elif method == "PATCH":
-                response = await client.patch(backend_url, content=await request.body(), headers=headers, params=params)
-            else:
-                raise HTTPException(status_code=405, detail="Method not allowed")
-
-            return Response(content=response.content, status_code=response.status_code, headers=dict(response.headers))
-        except httpx.ConnectError as e:
-            raise HTTPException(status_code=502, detail=f"Failed to connect to the backend service: {str(e)}")
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail=f"Backend service returned an error: {e.response.text}")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"An error occurred while making the request: {str(e)}")
-
-@router.api_route("/{service}/{path:path}", methods=["POST", "GET", "PUT", "DELETE", "PATCH"], include_in_schema=False)
+    요청 본문과 응답 본문을 버퍼링하지 않고 그대로 흘려보내는 프록시.
+    대용량 업로드/다운로드와 SSE(/stream) 응답을 게이트웨이 메모리에 쌓지 않고 전달합니다.
+    """
+    method = request.method
+
+    params = dict(request.query_params)
+
+    if method not in ALLOWED_METHODS:
+        raise HTTPException(status_code=405, detail="Method not allowed")
+
+    try:
+        content = request.stream() if method in BODY_METHODS else None
+        backend_request = client.build_request(method, f"/{path}", content=content, headers=headers, params=params)
+        response = await client.send(backend_request, stream=True)
+    except httpx.ConnectError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to connect to the backend service: {str(e)}")
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while making the request: {str(e)}")
+
+    response_headers = {
+        key: value for key, value in response.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=response_headers,
+        background=BackgroundTask(response.aclose)
+    )
+
+@router.api_route("/{service}/{path:path}", methods=ALLOWED_METHODS, include_in_schema=False)
 async def gateway(service: str, path: str, request: Request):
     """
     요청을 해당 백엔드 서비스로 라우팅.
     """
-    if service in backend_urls:
-        backend_url = f"{backend_urls[service]}/{path}"
-        return await proxy_request(request, backend_url)
+    if is_internal_only(service, path):
+        raise HTTPException(status_code=404, detail="Not found")
+    client = client_pool.get_client(service)
+    if client is not None:
+        headers = await build_backend_headers(request, service)
+        if use_streaming(path):
+            return await streaming_proxy_request(request, client, path, headers)
+        return await proxy_request(request, client, path, headers)
     else:
         raise HTTPException(status_code=404, detail="Service not found")
@@ -1,11 +1,11 @@
 def servicelist():
     """
-    게이트웨이에서 연결 할 백엔드 서비스 경로 설정.
+    게이트웨이에서 연결 할 백엔드 서비스 경로 및 요청 타임아웃(초) 설정.
     """
     return {
-        "query": "http://intelligenceapi-query",
-        "analysis": "http://intelligenceapi-analysis",
-        "auth": "http://intelligenceapi-auth",
-        "webhook": "http://intelligenceapi-webhook",
-        "storage": "http://intelligenceapi-storage"
-    }
\ No newline at end of file
+        "query": {"url": "http://intelligenceapi-query", "timeout": 300.0},
+        "analysis": {"url": "http://intelligenceapi-analysis", "timeout": 300.0},
+        "auth": {"url": "http://intelligenceapi-auth", "timeout": 30.0},
+        "webhook": {"url": "http://intelligenceapi-webhook", "timeout": 300.0},
+        "storage": {"url": "http://intelligenceapi-storage", "timeout": 300.0}
+    }
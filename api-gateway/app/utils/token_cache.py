@@ -0,0 +1,179 @@
+import os
+import time
+import asyncio
+import json
+import hmac
+import base64
+import hashlib
+import logging
+import httpx
+from collections import OrderedDict
+from fastapi import HTTPException
+from app.utils.client_pool import client_pool
+
+logger = logging.getLogger(__name__)
+
+# 토큰 검증 캐시 설정. 폐기된 토큰이 유효로 남는 최대 시간이 TTL이므로 짧게 유지
+TOKEN_CACHE_TTL = float(os.getenv("GATEWAY_TOKEN_CACHE_TTL", 5.0))
+TOKEN_CACHE_NEGATIVE_TTL = float(os.getenv("GATEWAY_TOKEN_CACHE_NEGATIVE_TTL", 30.0))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("GATEWAY_TOKEN_CACHE_MAX_SIZE", 10000))
+# auth 서비스의 활성 토큰 목록을 받아 오는 주기(초). 목록에서 빠진 토큰은 TTL 전이라도 캐시에서 제거 (0이면 사용 안 함)
+TOKEN_SYNC_INTERVAL = float(os.getenv("GATEWAY_TOKEN_SYNC_INTERVAL", 5.0))
+
+# 백엔드가 신뢰하는 내부 인증 헤더 설정 (시크릿이 없으면 헤더를 붙이지 않음)
+INTERNAL_AUTH_HEADER = "x-internal-auth"
+INTERNAL_AUTH_SECRET = os.getenv("INTERNAL_AUTH_SECRET")
+INTERNAL_AUTH_TTL = int(os.getenv("INTERNAL_AUTH_TTL", 60))
+
+def hash_token(token: str) -> str:
+    """
+    토큰 원문 대신 캐시 키로 사용할 SHA-256 해시를 반환합니다.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def get_token_exp(token: str):
+    """
+    서명 검증 없이 JWT 페이로드의 exp 클레임을 읽습니다.
+    exp가 없거나 토큰 형식이 잘못된 경우 None을 반환합니다.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+def sign_internal_auth(token: str) -> str:
+    """
+    검증된 토큰에 대해 백엔드가 auth 서비스 호출 없이 신뢰할 수 있는 서명 헤더 값을 생성합니다.
+    형식: "{만료시각}.{HMAC-SHA256(토큰 해시.만료시각)}"
+    """
+    expires_at = int(time.time()) + INTERNAL_AUTH_TTL
+    message = f"{hash_token(token)}.{expires_at}".encode()
+    signature = hmac.new(INTERNAL_AUTH_SECRET.encode(), message, hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+class TokenCache:
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE, sync_interval: float = TOKEN_SYNC_INTERVAL):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.sync_interval = sync_interval
+        self.active_hashes = None
+        self.active_version = None
+        self.sync_attempted_at = 0.0
+        self.sync_errors = 0
+        self.revoked_evictions = 0
+        self.sync_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.verify_count = 0
+        self.verify_latency_total = 0.0
+        self.verify_latency_max = 0.0
+
+    def get(self, token_hash: str):
+        """
+        캐시된 검증 결과(True/False)를 반환합니다. 없거나 만료된 경우 None을 반환합니다.
+        """
+        entry = self.entries.get(token_hash)
+        if entry is None:
+            return None
+        valid, expires_at = entry
+        if expires_at <= time.time():
+            del self.entries[token_hash]
+            return None
+        self.entries.move_to_end(token_hash)
+        return valid
+
+    def set(self, token_hash: str, valid: bool, token_exp=None):
+        """
+        검증 결과를 저장합니다. 유효한 토큰은 JWT exp를 넘어서 캐시하지 않습니다.
+        """
+        now = time.time()
+        expires_at = now + (TOKEN_CACHE_TTL if valid else TOKEN_CACHE_NEGATIVE_TTL)
+        if valid and token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        if expires_at <= now:
+            return
+        self.entries[token_hash] = (valid, expires_at)
+        self.entries.move_to_end(token_hash)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def sync_active_tokens(self):
+        """
+        sync_interval이 지났으면 auth 서비스의 활성 토큰 목록을 다시 받아, 목록에서 빠진 토큰의 캐시된 검증 결과를 제거합니다.
+        목록이 바뀌지 않았으면 auth 서비스가 304를 반환합니다.
+        auth 서비스는 INTERNAL_AUTH_SECRET 없이는 목록을 주지 않으므로, 설정되지 않았으면 positive_ttl 만료에만 의존합니다.
+        """
+        if not INTERNAL_AUTH_SECRET or self.sync_interval <= 0 or time.monotonic() - self.sync_attempted_at < self.sync_interval or self.sync_lock.locked():
+            return
+        async with self.sync_lock:
+            self.sync_attempted_at = time.monotonic()
+            headers = {"If-None-Match": self.active_version} if self.active_version else {}
+            headers["x-internal-secret"] = INTERNAL_AUTH_SECRET
+            try:
+                response = await client_pool.get_client("auth").get("/active_tokens", headers=headers)
+                if response.status_code == 304:
+                    return
+                response.raise_for_status()
+                data = response.json()
+            except Exception as e:
+                self.sync_errors += 1
+                logger.error(f"Failed to sync active tokens: {str(e)}")
+                return
+            self.active_hashes = set(data["hashes"])
+            self.active_version = data["version"]
+            revoked = [token_hash for token_hash, (valid, _) in self.entries.items() if valid and token_hash not in self.active_hashes]
+            for token_hash in revoked:
+                del self.entries[token_hash]
+            self.revoked_evictions += len(revoked)
+
+    async def verify(self, token: str) -> bool:
+        """
+        캐시를 우선 확인하고, 없으면 auth 서비스의 /verify를 호출하여 토큰을 검증합니다.
+        """
+        await self.sync_active_tokens()
+        token_hash = hash_token(token)
+        cached = self.get(token_hash)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        client = client_pool.get_client("auth")
+        started = time.perf_counter()
+        try:
+            response = await client.get("/verify", headers={"Authorization": f"Bearer {token}"})
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+        finally:
+            latency = time.perf_counter() - started
+            self.verify_count += 1
+            self.verify_latency_total += latency
+            self.verify_latency_max = max(self.verify_latency_max, latency)
+
+        if response.status_code >= 500:
+            raise HTTPException(status_code=500, detail="Auth service error")
+        valid = response.status_code == 200
+        self.set(token_hash, valid, get_token_exp(token))
+        return valid
+
+    def metrics(self) -> dict:
+        """
+        캐시 적중률과 auth 서비스 검증 지연 시간 지표를 반환합니다.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "verify_count": self.verify_count,
+            "verify_latency_avg_ms": self.verify_latency_total / self.verify_count * 1000 if self.verify_count else 0.0,
+            "verify_latency_max_ms": self.verify_latency_max * 1000,
+            "active_tokens_synced": self.active_hashes is not None,
+            "active_tokens_sync_errors": self.sync_errors,
+            "revoked_evictions": self.revoked_evictions,
+        }
+
+token_cache = TokenCache()
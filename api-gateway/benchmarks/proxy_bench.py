@@ -0,0 +1,76 @@
+"""
+게이트웨이 업스트림 클라이언트 마이크로 벤치마크.
+
+로컬 스텁 백엔드에 대해 요청마다 새 httpx.AsyncClient를 만드는 기존 방식과
+ClientPool의 연결 풀을 재사용하는 방식의 초당 요청 수를 비교합니다.
+
+실행: api-gateway 디렉터리에서 `python -m benchmarks.proxy_bench --requests 2000 --concurrency 50`
+"""
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from app.utils.client_pool import client_pool
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"detail": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_backend() -> str:
+    """
+    임의 포트에서 스텁 백엔드를 실행하고 URL을 반환합니다.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+async def run(label: str, send, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await send()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {total / elapsed:10.1f} req/s  ({elapsed:.2f}s)")
+
+async def main(total: int, concurrency: int):
+    backend_url = start_stub_backend()
+
+    async def per_request_client():
+        async with httpx.AsyncClient(timeout=300.0) as client:
+            await client.get(f"{backend_url}/ping")
+
+    await run("per-request AsyncClient", per_request_client, total, concurrency)
+
+    await client_pool.startup({"stub": {"url": backend_url, "timeout": 300.0}})
+    client = client_pool.get_client("stub")
+
+    async def pooled_client():
+        await client.get("/ping")
+
+    await run("pooled ClientPool", pooled_client, total, concurrency)
+    await client_pool.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -1,8 +1,8 @@
-import httpx
 from fastapi import FastAPI, Depends, Header, HTTPException
 from typing_extensions import Annotated
 from app.utils.config_llm import config_llm
 from app.utils.react_agent import agent
+from app.utils.token_verifier import token_verifier
 from pydantic import BaseModel, Field
 from enum import Enum
 from typing import Any
@@ -10,19 +10,13 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langserve import add_routes
 
-AUTH_SERVICE_URL = "http://intelligenceapi-auth/verify"
-
-async def verify_token(x_token: Annotated[str, Header()]) -> None:
+async def verify_token(x_token: Annotated[str, Header()], x_internal_auth: Annotated[str | None, Header()] = None) -> None:
     """
-    인증 서비스로 토큰을 검증.
+    토큰을 검증.
+    게이트웨이 서명 헤더(x-internal-auth) 또는 AUTH_MODE 설정(local/remote)에 따라 검증.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(AUTH_SERVICE_URL, headers={"Authorization": f"Bearer {x_token}"})
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="X-Token header invalid")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+    if not await token_verifier.verify(x_token, x_internal_auth):
+        raise HTTPException(status_code=401, detail="X-Token header invalid")
 
 app = FastAPI(
     title="Intelligence Analysis API",
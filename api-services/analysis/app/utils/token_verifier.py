@@ -0,0 +1,173 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import httpx
+from collections import OrderedDict
+from fastapi import HTTPException
+from jose import JWTError, jwt
+from app.utils.internal_auth import INTERNAL_AUTH_SECRET, verify_internal_auth
+
+logger = logging.getLogger(__name__)
+
+AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://intelligenceapi-auth/verify")
+
+# 토큰 검증 방식: remote(auth 서비스 /verify 호출) 또는 local(SECRET_KEY로 직접 HS256 서명 검증).
+# local 모드는 동기화한 활성 토큰 목록으로 폐기 여부를 확인하며, 목록에 없는 토큰만 auth 서비스에 묻습니다.
+AUTH_MODE = os.getenv("AUTH_MODE", "remote").lower()
+SECRET_KEY = os.getenv("SECRET_KEY")
+ALGORITHM = "HS256"
+
+# local 모드에서 폐기된 토큰을 반영하기 위해 auth 서비스의 활성 토큰 목록을 받아 오는 주소와 주기(초)
+AUTH_ACTIVE_TOKENS_URL = os.getenv("AUTH_ACTIVE_TOKENS_URL", AUTH_SERVICE_URL.rsplit("/", 1)[0] + "/active_tokens")
+AUTH_TOKEN_SYNC_INTERVAL = float(os.getenv("AUTH_TOKEN_SYNC_INTERVAL", 5.0))
+# 목록은 INTERNAL_AUTH_SECRET이 있어야 받을 수 있으며, 없으면 local 모드도 서명 검증 후 auth 서비스에 묻습니다.
+# 마지막 동기화가 이보다 오래되면 목록을 신뢰하지 않고 auth 서비스로 검증
+AUTH_TOKEN_SYNC_MAX_AGE = float(os.getenv("AUTH_TOKEN_SYNC_MAX_AGE", 60.0))
+
+# 유효하지 않은 토큰에 대한 네거티브 캐시 설정
+NEGATIVE_CACHE_TTL = float(os.getenv("AUTH_NEGATIVE_CACHE_TTL", 60.0))
+NEGATIVE_CACHE_MAX_SIZE = int(os.getenv("AUTH_NEGATIVE_CACHE_MAX_SIZE", 1000))
+
+class ActiveTokenSet:
+    """
+    auth 서비스의 활성 토큰 해시 목록 사본. 요청 처리 중 interval이 지났으면 다시 받아 옵니다.
+    목록이 바뀌지 않았으면 auth 서비스가 304를 반환하므로 전체 목록을 다시 받지 않습니다.
+    """
+
+    def __init__(self, url: str = AUTH_ACTIVE_TOKENS_URL, interval: float = AUTH_TOKEN_SYNC_INTERVAL, max_age: float = AUTH_TOKEN_SYNC_MAX_AGE):
+        self.url = url
+        self.interval = interval
+        self.max_age = max_age
+        self.hashes = None
+        self.version = None
+        self.synced_at = None
+        self.attempted_at = 0.0
+        self.sync_errors = 0
+        self.lock = asyncio.Lock()
+
+    async def refresh(self):
+        """
+        interval이 지났으면 목록을 다시 받습니다. 다른 요청이 이미 받는 중이면 기다리지 않고 기존 목록을 사용합니다.
+        """
+        if not INTERNAL_AUTH_SECRET or time.monotonic() - self.attempted_at < self.interval or self.lock.locked():
+            return
+        async with self.lock:
+            self.attempted_at = time.monotonic()
+            headers = {"If-None-Match": self.version} if self.version else {}
+            headers["x-internal-secret"] = INTERNAL_AUTH_SECRET
+            try:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(self.url, headers=headers)
+                if response.status_code == 200:
+                    data = response.json()
+                    self.hashes = set(data["hashes"])
+                    self.version = data["version"]
+                elif response.status_code != 304:
+                    raise ValueError(f"unexpected status {response.status_code}")
+                self.synced_at = time.monotonic()
+            except Exception as e:
+                self.sync_errors += 1
+                logger.error(f"Failed to sync active tokens: {str(e)}")
+
+    def contains(self, token_hash: str) -> bool:
+        """
+        최근(max_age 이내)에 받은 목록에 토큰이 있으면 True를 반환합니다.
+        """
+        if self.synced_at is None or time.monotonic() - self.synced_at > self.max_age:
+            return False
+        return token_hash in self.hashes
+
+class TokenVerifier:
+    def __init__(self, mode: str = AUTH_MODE):
+        if mode == "local" and not SECRET_KEY:
+            logger.error("AUTH_MODE is local but SECRET_KEY is not set, falling back to remote verification")
+            mode = "remote"
+        self.mode = mode
+        self.negative_cache = OrderedDict()
+        self.active_tokens = ActiveTokenSet()
+        self.auth_service_calls = 0
+        self.local_verifications = 0
+        self.internal_verifications = 0
+        self.negative_cache_hits = 0
+
+    def is_known_invalid(self, token_hash: str) -> bool:
+        """
+        네거티브 캐시에 유효하지 않은 토큰으로 기록되어 있는지 확인합니다.
+        """
+        expires_at = self.negative_cache.get(token_hash)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self.negative_cache[token_hash]
+            return False
+        return True
+
+    def remember_invalid(self, token_hash: str):
+        """
+        유효하지 않은 토큰을 네거티브 캐시에 기록합니다. 크기를 넘으면 오래된 항목부터 제거합니다.
+        """
+        self.negative_cache[token_hash] = time.time() + NEGATIVE_CACHE_TTL
+        self.negative_cache.move_to_end(token_hash)
+        while len(self.negative_cache) > NEGATIVE_CACHE_MAX_SIZE:
+            self.negative_cache.popitem(last=False)
+
+    def verify_local(self, token: str) -> bool:
+        """
+        SECRET_KEY로 JWT 서명과 만료 시간을 직접 검증합니다.
+        """
+        self.local_verifications += 1
+        try:
+            jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            return True
+        except JWTError:
+            return False
+
+    async def verify_remote(self, token: str):
+        """
+        auth 서비스의 /verify를 호출하여 토큰을 검증합니다.
+        auth 서비스 자체 오류(5xx)인 경우 판단할 수 없으므로 None을 반환합니다 (verify에서 503으로 응답).
+        """
+        self.auth_service_calls += 1
+        async with httpx.AsyncClient() as client:
+            try:
+                response = await client.get(AUTH_SERVICE_URL, headers={"Authorization": f"Bearer {token}"})
+            except httpx.RequestError as e:
+                raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+        if response.status_code >= 500:
+            return None
+        return response.status_code == 200
+
+    async def verify(self, token: str, internal_auth: str = None) -> bool:
+        """
+        토큰이 유효한지 확인합니다.
+        게이트웨이 서명 헤더, 네거티브 캐시, 설정된 검증 방식(local/remote) 순으로 확인합니다.
+        """
+        if verify_internal_auth(token, internal_auth):
+            self.internal_verifications += 1
+            return True
+
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        if self.is_known_invalid(token_hash):
+            self.negative_cache_hits += 1
+            return False
+
+        if self.mode == "local":
+            valid = self.verify_local(token)
+            # 서명이 유효해도 폐기/교체된 토큰일 수 있으므로 활성 토큰 목록에 없으면 auth 서비스로 확인
+            if valid:
+                await self.active_tokens.refresh()
+                if not self.active_tokens.contains(token_hash):
+                    valid = await self.verify_remote(token)
+        else:
+            valid = await self.verify_remote(token)
+
+        if valid is None:
+            # auth 서비스 장애는 토큰이 잘못된 것이 아니므로 401 대신 503으로 알림
+            raise HTTPException(status_code=503, detail="Auth service unavailable")
+        if valid is False:
+            self.remember_invalid(token_hash)
+        return valid
+
+token_verifier = TokenVerifier()
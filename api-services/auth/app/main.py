@@ -1,12 +1,17 @@
 import os
+import hmac
 import httpx
 import logging
-from fastapi import FastAPI, Depends, HTTPException, Query, Request, Cookie
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Cookie, Header, Response
 from fastapi.responses import RedirectResponse, HTMLResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.jwt import create_access_token, verify_jwt_token
-from app.utils.db import create_database, SessionLocal, User, APIToken, get_or_create_user
+from app.utils.db import (
+    create_database, SessionLocal, User, get_or_create_user, get_user_by_username, get_all_users,
+    get_user_tokens, token_exists, active_token_exists, delete_user_tokens, create_user_token
+)
+from app.utils.token_index import token_index
 from pydantic import BaseModel
 from datetime import timedelta
 from typing import Optional
@@ -20,6 +25,8 @@ REDIRECT_URI = os.getenv("REDIRECT_URI")
 GITHUB_OAUTH_URL = "https://github.com/login/oauth/authorize"
 GITHUB_TOKEN_URL = "https://github.com/login/oauth/access_token"
 GITHUB_USER_URL = "https://api.github.com/user"
+# 게이트웨이/백엔드와 공유하는 내부 시크릿 (설정하면 /active_tokens는 x-internal-secret 헤더가 일치해야 응답)
+INTERNAL_AUTH_SECRET = os.getenv("INTERNAL_AUTH_SECRET")
 
 app = FastAPI(
     title="Intelligence Auth API",
@@ -34,23 +41,28 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
-def get_db():
+async def get_db():
     """
-    데이터베이스 세션을 생성하고 반환합니다.
+    비동기 데이터베이스 세션을 생성하고 반환합니다.
     요청이 완료되면 세션을 닫습니다.
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @app.on_event("startup")
 async def on_startup():
     """
-    애플리케이션 시작 시 데이터베이스를 생성합니다.
+    애플리케이션 시작 시 데이터베이스를 생성하고 활성 토큰 인덱스를 적재합니다.
+    """
+    await create_database()
+    await token_index.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """
+    애플리케이션 종료 시 토큰 인덱스 재적재 작업을 중지합니다.
     """
-    create_database()
+    await token_index.stop()
 
 @app.get("/")
 async def read_root():
@@ -67,7 +79,7 @@ async def login_with_github():
     return RedirectResponse(url=f"{GITHUB_OAUTH_URL}?client_id={CLIENT_ID}&redirect_uri={REDIRECT_URI}&scope=read:user")
 
 @app.get("/callback")
-async def github_callback(request: Request, code: str = Query(None), db: Session = Depends(get_db)):
+async def github_callback(request: Request, code: str = Query(None), db: AsyncSession = Depends(get_db)):
     """
     GitHub OAuth 콜백 엔드포인트.
     GitHub로부터 받은 인증 코드를 이용하여 액세스 토큰을 요청하고, 사용자 정보를 받아 JWT 토큰을 생성합니다.
@@ -100,7 +112,7 @@ async def github_callback(request: Request, code: str = Query(None), db: Session
         if not user_data:
             raise HTTPException(status_code=400, detail=f"Failed to retrieve user information: {user_response.text}")
 
-        user = get_or_create_user(db, user_data)
+        user = await get_or_create_user(db, user_data)
         jwt_token = create_access_token(data={"sub": user.username})
         logger.info(f"Generated JWT Token: {jwt_token}")
         
@@ -109,7 +121,7 @@ async def github_callback(request: Request, code: str = Query(None), db: Session
         return response
 
 @app.get("/welcome", response_class=HTMLResponse)
-async def welcome_page(request: Request, access_token: str = Cookie(None), db: Session = Depends(get_db)):
+async def welcome_page(request: Request, access_token: str = Cookie(None), db: AsyncSession = Depends(get_db)):
     """
     환영 페이지를 표시하고, 사용자가 관리자일 경우 사용자 관리 기능을 제공합니다.
     """
@@ -119,14 +131,14 @@ async def welcome_page(request: Request, access_token: str = Cookie(None), db: S
         
         payload = verify_jwt_token(access_token)
         user_id = payload.get("sub")
-        user = db.query(User).filter(User.username == user_id).first()
+        user = await get_user_by_username(db, user_id)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
         is_admin_user = is_admin(user)
         users_rows = ""
         if is_admin_user:
-            users = db.query(User).all()
+            users = await get_all_users(db)
             users_rows = ''.join([
                 f"<tr><td>{u.username}</td><td>{u.full_name}</td><td>{u.email}</td>"
                 f"<td><select onchange='updateApproval(this, \"{u.username}\")'>"
@@ -275,7 +287,7 @@ async def welcome_page(request: Request, access_token: str = Cookie(None), db: S
 async def generate_token(
     expires_in: Optional[int] = Query(None),
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     사용자에게 새로운 API 토큰을 생성하여 반환합니다.
@@ -285,7 +297,7 @@ async def generate_token(
         payload = verify_jwt_token(token)
         user_id = payload.get("sub")
 
-        user = db.query(User).filter(User.username == user_id).first()
+        user = await get_user_by_username(db, user_id)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
@@ -295,10 +307,9 @@ async def generate_token(
         if user.approved == 0:
             raise HTTPException(status_code=403, detail="User is not approved. Please contact the administrator.")
 
-        existing_tokens = db.query(APIToken).filter(APIToken.user_id == user.id).all()
+        existing_tokens = await delete_user_tokens(db, user)
         for existing_token in existing_tokens:
-            db.delete(existing_token)
-        db.commit()
+            token_index.remove(existing_token)
 
         expires_delta = None
         if expires_in:
@@ -306,13 +317,11 @@ async def generate_token(
 
         api_token = create_access_token(data={"sub": user.username}, expires_delta=expires_delta)
 
-        while db.query(APIToken).filter(APIToken.token == api_token).first() is not None:
+        while await token_exists(db, api_token):
             api_token = create_access_token(data={"sub": user.username}, expires_delta=expires_delta)
 
-        db_token = APIToken(token=api_token, owner=user)
-        db.add(db_token)
-        db.commit()
-        db.refresh(db_token)
+        await create_user_token(db, user, api_token)
+        token_index.add(api_token)
 
         return {"access_token": api_token, "token_type": "bearer"}
     except HTTPException as e:
@@ -321,20 +330,49 @@ async def generate_token(
         logger.error(f"Error in /generate_token: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+async def is_active_in_db(token: str) -> bool:
+    async with SessionLocal() as db:
+        return await active_token_exists(db, token)
+
 @app.get("/verify")
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     JWT 토큰을 검증합니다.
+    서명 검증 후 활성 토큰 인덱스를 확인하여 폐기되거나 교체된 토큰을 거부합니다.
+    인덱스는 레플리카마다 따로 있으므로, 다른 레플리카에서 막 발급된 토큰일 수 있는 인덱스 미스는 DB로 확인합니다.
     """
     token = credentials.credentials
     try:
         verify_jwt_token(token)
+        if not token_index.contains(token) and await is_active_in_db(token):
+            token_index.add(token)
+        if not token_index.contains(token):
+            raise HTTPException(
+                status_code=401,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         return {"detail": "Token is valid"}
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@app.get("/active_tokens")
+async def active_tokens(request: Request, x_internal_secret: Optional[str] = Header(None)):
+    """
+    활성 토큰 해시 목록과 버전을 반환합니다.
+    게이트웨이 토큰 캐시와 AUTH_MODE=local 백엔드가 주기적으로 받아 폐기된 토큰을 반영하는 데 사용합니다.
+    If-None-Match가 현재 버전과 같으면 목록 없이 304를 반환합니다.
+    INTERNAL_AUTH_SECRET이 설정되지 않았으면 누구에게도 목록을 주지 않습니다.
+    """
+    if not INTERNAL_AUTH_SECRET or not hmac.compare_digest(x_internal_secret or "", INTERNAL_AUTH_SECRET):
+        raise HTTPException(status_code=403, detail="Access forbidden")
+    if request.headers.get("if-none-match") == token_index.version():
+        return Response(status_code=304)
+    version, hashes = token_index.snapshot()
+    return {"version": version, "hashes": hashes}
+
 def is_admin(user: User) -> bool:
     """
     사용자가 관리자인지 확인합니다.
@@ -342,7 +380,7 @@ def is_admin(user: User) -> bool:
     return user.role == "admin"
 
 @app.post("/admin/approve_user")
-async def approve_user(username: str, approved: int, db: Session = Depends(get_db), access_token: str = Cookie(None)):
+async def approve_user(username: str, approved: int, db: AsyncSession = Depends(get_db), access_token: str = Cookie(None)):
     """
     사용자의 승인 상태를 업데이트합니다.
     """
@@ -353,23 +391,23 @@ async def approve_user(username: str, approved: int, db: Session = Depends(get_d
         payload = verify_jwt_token(access_token)
         admin_user_id = payload.get("sub")
 
-        admin_user = db.query(User).filter(User.username == admin_user_id).first()
+        admin_user = await get_user_by_username(db, admin_user_id)
         if not admin_user or not is_admin(admin_user):
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-        user = db.query(User).filter(User.username == username).first()
+        user = await get_user_by_username(db, username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         user.approved = approved
-        db.commit()
+        await db.commit()
         return {"detail": "User approval status updated"}
     except Exception as e:
         logger.error(f"Error in /admin/approve_user: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @app.post("/admin/disable_user")
-async def disable_user(username: str, disabled: int, db: Session = Depends(get_db), access_token: str = Cookie(None)):
+async def disable_user(username: str, disabled: int, db: AsyncSession = Depends(get_db), access_token: str = Cookie(None)):
     """
     사용자의 비활성화 상태를 업데이트합니다.
     """
@@ -380,23 +418,28 @@ async def disable_user(username: str, disabled: int, db: Session = Depends(get_d
         payload = verify_jwt_token(access_token)
         admin_user_id = payload.get("sub")
 
-        admin_user = db.query(User).filter(User.username == admin_user_id).first()
+        admin_user = await get_user_by_username(db, admin_user_id)
         if not admin_user or not is_admin(admin_user):
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-        user = db.query(User).filter(User.username == username).first()
+        user = await get_user_by_username(db, username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         user.disabled = disabled
-        db.commit()
+        await db.commit()
+        for user_token in await get_user_tokens(db, user):
+            if disabled:
+                token_index.remove(user_token)
+            else:
+                token_index.add(user_token)
         return {"detail": "User disabled status updated"}
     except Exception as e:
         logger.error(f"Error in /admin/disable_user: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @app.post("/admin/change_role")
-async def change_role(username: str, role: str, db: Session = Depends(get_db), access_token: str = Cookie(None)):
+async def change_role(username: str, role: str, db: AsyncSession = Depends(get_db), access_token: str = Cookie(None)):
     """
     사용자의 역할을 변경합니다.
     """
@@ -407,11 +450,11 @@ async def change_role(username: str, role: str, db: Session = Depends(get_db), a
         payload = verify_jwt_token(access_token)
         admin_user_id = payload.get("sub")
 
-        admin_user = db.query(User).filter(User.username == admin_user_id).first()
+        admin_user = await get_user_by_username(db, admin_user_id)
         if not admin_user or not is_admin(admin_user):
             raise HTTPException(status_code=403, detail="Access forbidden")
 
-        user = db.query(User).filter(User.username == username).first()
+        user = await get_user_by_username(db, username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -419,7 +462,7 @@ async def change_role(username: str, role: str, db: Session = Depends(get_db), a
             raise HTTPException(status_code=400, detail="Invalid role")
 
         user.role = role
-        db.commit()
+        await db.commit()
         return {"detail": "User role updated"}
     except Exception as e:
         logger.error(f"Error in /admin/change_role: {str(e)}")
@@ -1,7 +1,7 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, Session
+from sqlalchemy import Column, Integer, String, ForeignKey, select, func, delete
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base, relationship
 
 # 환경 변수에서 MySQL 데이터베이스 연결 정보를 가져옵니다.
 MYSQL_HOST = os.getenv("MYSQL_HOST")
@@ -10,12 +10,35 @@ MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 
-# 데이터베이스 URL 생성
-DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+# 데이터베이스 URL 생성 (DATABASE_URL로 재정의 가능, 예: 테스트용 sqlite+aiosqlite:///./auth.db)
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+)
+
+# 연결 풀 설정
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+def engine_options(database_url: str) -> dict:
+    """
+    데이터베이스 종류에 맞는 엔진 옵션을 반환합니다.
+    SQLite는 연결 풀 크기 설정을 지원하지 않으므로 pre-ping만 적용합니다.
+    """
+    if database_url.startswith("sqlite"):
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
 # 데이터베이스 엔진 및 세션 초기화
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -47,21 +70,36 @@ class APIToken(Base):
     
     owner = relationship("User", back_populates="tokens")
 
-def create_database():
+async def create_database():
     """
     데이터베이스 테이블을 생성합니다.
     """
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    """
+    사용자 이름으로 사용자를 조회합니다. 없으면 None을 반환합니다.
+    """
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
 
-def get_or_create_user(db: Session, user_data: dict):
+async def get_all_users(db: AsyncSession):
+    """
+    모든 사용자를 조회합니다.
+    """
+    result = await db.execute(select(User))
+    return result.scalars().all()
+
+async def get_or_create_user(db: AsyncSession, user_data: dict):
     """
     사용자 정보를 바탕으로 사용자 객체를 가져오거나 새로 생성합니다.
     첫 번째 사용자일 경우, 관리자 역할을 부여합니다.
     """
-    user = db.query(User).filter(User.username == user_data["login"]).first()
+    user = await get_user_by_username(db, user_data["login"])
     if user is None:
         # 첫 번째 사용자 여부 확인
-        is_first_user = db.query(User).count() == 0
+        is_first_user = await db.scalar(select(func.count()).select_from(User)) == 0
         user = User(
             username=user_data["login"],
             full_name=user_data["name"],
@@ -69,6 +107,53 @@ def get_or_create_user(db: Session, user_data: dict):
             role="admin" if is_first_user else "user"
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     return user
+
+async def get_user_tokens(db: AsyncSession, user: User):
+    """
+    사용자에게 발급된 API 토큰 문자열 목록을 조회합니다.
+    """
+    result = await db.execute(select(APIToken.token).where(APIToken.user_id == user.id))
+    return result.scalars().all()
+
+async def get_active_tokens(db: AsyncSession):
+    """
+    비활성화되지 않은 사용자의 API 토큰 문자열 목록을 조회합니다.
+    """
+    result = await db.execute(select(APIToken.token).join(User).where(User.disabled == 0))
+    return result.scalars().all()
+
+async def token_exists(db: AsyncSession, token: str) -> bool:
+    """
+    동일한 토큰이 이미 저장되어 있는지 확인합니다.
+    """
+    result = await db.execute(select(APIToken.id).where(APIToken.token == token))
+    return result.first() is not None
+
+async def active_token_exists(db: AsyncSession, token: str) -> bool:
+    """
+    토큰이 저장되어 있고 그 사용자가 비활성화되지 않았는지 확인합니다.
+    """
+    result = await db.execute(select(APIToken.id).join(User).where(APIToken.token == token, User.disabled == 0))
+    return result.first() is not None
+
+async def delete_user_tokens(db: AsyncSession, user: User):
+    """
+    사용자의 기존 API 토큰을 모두 삭제하고, 삭제된 토큰 문자열 목록을 반환합니다.
+    """
+    tokens = await get_user_tokens(db, user)
+    await db.execute(delete(APIToken).where(APIToken.user_id == user.id))
+    await db.commit()
+    return tokens
+
+async def create_user_token(db: AsyncSession, user: User, token: str):
+    """
+    사용자에게 새 API 토큰을 저장합니다.
+    """
+    db_token = APIToken(token=token, user_id=user.id)
+    db.add(db_token)
+    await db.commit()
+    await db.refresh(db_token)
+    return db_token
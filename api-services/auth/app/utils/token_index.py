@@ -0,0 +1,124 @@
+import os
+import asyncio
+import hashlib
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.db import SessionLocal, get_active_tokens
+
+logger = logging.getLogger(__name__)
+
+# 다른 레플리카에서 발급/폐기된 토큰을 반영하기 위한 전체 재적재 주기(초)
+TOKEN_INDEX_REFRESH_INTERVAL = float(os.getenv("TOKEN_INDEX_REFRESH_INTERVAL", 30.0))
+
+def hash_token(token: str) -> str:
+    """
+    토큰 원문 대신 인덱스에 저장할 SHA-256 해시를 반환합니다.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenIndex:
+    def __init__(self):
+        self.hashes = set()
+        self.pending = None
+        self.cached_version = None
+        self.refresh_task = None
+
+    def replace(self, tokens):
+        """
+        주어진 토큰 목록으로 인덱스 전체를 교체합니다.
+        적재 중에 발생한 추가/제거 내역은 새 인덱스에 다시 반영합니다.
+        """
+        hashes = {hash_token(token) for token in tokens}
+        for operation, token_hash in self.pending or []:
+            if operation == "add":
+                hashes.add(token_hash)
+            else:
+                hashes.discard(token_hash)
+        self.hashes = hashes
+        self.pending = None
+        self.cached_version = None
+
+    async def load(self, db: AsyncSession):
+        """
+        api_tokens 테이블에서 비활성화되지 않은 사용자의 토큰을 읽어 인덱스를 적재합니다.
+        """
+        self.pending = []
+        tokens = await get_active_tokens(db)
+        self.replace(tokens)
+        logger.info(f"Token index loaded with {len(self.hashes)} active tokens")
+
+    async def reload(self):
+        """
+        새 데이터베이스 세션으로 인덱스를 다시 적재합니다.
+        """
+        async with SessionLocal() as db:
+            await self.load(db)
+
+    def add(self, token: str):
+        """
+        활성 토큰을 인덱스에 추가합니다.
+        """
+        token_hash = hash_token(token)
+        self.hashes.add(token_hash)
+        self.cached_version = None
+        if self.pending is not None:
+            self.pending.append(("add", token_hash))
+
+    def remove(self, token: str):
+        """
+        폐기되거나 교체된 토큰을 인덱스에서 제거합니다.
+        """
+        token_hash = hash_token(token)
+        self.hashes.discard(token_hash)
+        self.cached_version = None
+        if self.pending is not None:
+            self.pending.append(("remove", token_hash))
+
+    def contains(self, token: str) -> bool:
+        """
+        토큰이 활성 상태인지 O(1)로 확인합니다.
+        """
+        return hash_token(token) in self.hashes
+
+    def snapshot(self) -> tuple:
+        """
+        (버전, 정렬된 해시 목록)을 반환합니다. 버전은 해시 목록의 SHA-256이며 목록이 바뀔 때만 다시 계산합니다.
+        """
+        hashes = sorted(self.hashes)
+        if self.cached_version is None:
+            self.cached_version = hashlib.sha256("\n".join(hashes).encode()).hexdigest()
+        return self.cached_version, hashes
+
+    def version(self) -> str:
+        if self.cached_version is None:
+            return self.snapshot()[0]
+        return self.cached_version
+
+    async def refresh_periodically(self):
+        """
+        TOKEN_INDEX_REFRESH_INTERVAL 간격으로 인덱스를 재적재합니다.
+        """
+        while True:
+            await asyncio.sleep(TOKEN_INDEX_REFRESH_INTERVAL)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Failed to refresh token index: {str(e)}")
+
+    async def start(self):
+        """
+        인덱스를 적재하고 주기적 재적재 작업을 시작합니다.
+        """
+        await self.reload()
+        if TOKEN_INDEX_REFRESH_INTERVAL > 0:
+            self.refresh_task = asyncio.create_task(self.refresh_periodically())
+
+    async def stop(self):
+        """
+        주기적 재적재 작업을 중지합니다.
+        """
+        if self.refresh_task:
+            self.refresh_task.cancel()
+            self.refresh_task = None
+
+token_index = TokenIndex()
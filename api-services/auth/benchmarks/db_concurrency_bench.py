@@ -0,0 +1,76 @@
+"""
+동기/비동기 데이터베이스 엔진의 이벤트 루프 블로킹 비교 벤치마크.
+
+async def 엔드포인트 안에서 느린 쿼리를 동시에 실행하면서 10ms 간격 하트비트의 최대 지연을 측정합니다.
+동기 엔진은 쿼리 동안 이벤트 루프를 멈추게 하고, 비동기 엔진은 다른 요청이 계속 처리됩니다.
+
+실행: auth 디렉터리에서 `python -m benchmarks.db_concurrency_bench --queries 20`
+MySQL에서 측정하려면 --sync-url mysql+pymysql://... --async-url mysql+aiomysql://... 를 지정합니다.
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+SLOW_QUERY = {
+    "sqlite": "WITH RECURSIVE cnt(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM cnt WHERE x < 300000) SELECT count(*) FROM cnt",
+    "mysql": "SELECT SLEEP(0.05)",
+}
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """
+    interval 간격으로 깨어나며 예정 시각 대비 최대 지연(초)을 반환합니다.
+    """
+    max_lag = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - expected)
+    return max_lag
+
+async def measure(label: str, run_queries):
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    await run_queries()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    max_lag = await beat
+    print(f"{label:<14} wall: {elapsed:6.2f}s  max event loop lag: {max_lag * 1000:8.1f} ms")
+
+async def main(queries: int, sync_url: str, async_url: str):
+    query = text(SLOW_QUERY["mysql" if sync_url.startswith("mysql") else "sqlite"])
+
+    sync_engine = create_engine(sync_url)
+
+    async def sync_endpoint():
+        # 기존 방식: async def 안에서 동기 세션 호출
+        with sync_engine.connect() as conn:
+            conn.execute(query).scalar()
+
+    async def run_sync():
+        await asyncio.gather(*[sync_endpoint() for _ in range(queries)])
+
+    async_engine = create_async_engine(async_url, pool_size=queries) if async_url.startswith("mysql") else create_async_engine(async_url)
+
+    async def async_endpoint():
+        async with async_engine.connect() as conn:
+            (await conn.execute(query)).scalar()
+
+    async def run_async():
+        await asyncio.gather(*[async_endpoint() for _ in range(queries)])
+
+    await measure("sync engine", run_sync)
+    await measure("async engine", run_async)
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--sync-url", default="sqlite:////tmp/auth_bench.db")
+    parser.add_argument("--async-url", default="sqlite+aiosqlite:////tmp/auth_bench.db")
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.sync_url, args.async_url))
@@ -0,0 +1,65 @@
+"""
+활성 토큰 인덱스 부하 테스트.
+
+10,000개의 API 토큰으로 인덱스를 적재한 뒤, /verify와 동일한 경로(JWT 서명 검증 + 인덱스 조회)를
+활성/폐기 토큰이 섞인 요청으로 반복 실행하여 처리량과 지연 시간을 측정합니다.
+
+실행: auth 디렉터리에서 `python -m benchmarks.token_index_bench --tokens 10000 --lookups 100000`
+"""
+import os
+import argparse
+import random
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+from fastapi import HTTPException
+from app.utils.jwt import create_access_token, verify_jwt_token
+from app.utils.token_index import TokenIndex
+
+def percentile(values, ratio):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+def main(token_count: int, lookups: int, revoked_ratio: float):
+    tokens = [create_access_token(data={"sub": f"user{i}"}) for i in range(token_count)]
+    revoked = set(random.sample(range(token_count), int(token_count * revoked_ratio)))
+
+    index = TokenIndex()
+    started = time.perf_counter()
+    index.replace(token for i, token in enumerate(tokens) if i not in revoked)
+    print(f"loaded {len(index.hashes)} active tokens in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    latencies = []
+    accepted = rejected = 0
+    for _ in range(lookups):
+        token = tokens[random.randrange(token_count)]
+        started = time.perf_counter()
+        try:
+            verify_jwt_token(token)
+            if index.contains(token):
+                accepted += 1
+            else:
+                rejected += 1
+        except HTTPException:
+            rejected += 1
+        latencies.append(time.perf_counter() - started)
+
+    total = sum(latencies)
+    print(f"verify lookups: {lookups}  accepted: {accepted}  rejected (revoked): {rejected}")
+    print(f"throughput: {lookups / total:,.0f} verify/s  "
+          f"p50: {percentile(latencies, 0.5) * 1e6:.1f} us  p99: {percentile(latencies, 0.99) * 1e6:.1f} us")
+
+    started = time.perf_counter()
+    for token in tokens:
+        index.contains(token)
+    print(f"index-only lookup: {(time.perf_counter() - started) / token_count * 1e6:.2f} us per token")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--revoked-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+    main(args.tokens, args.lookups, args.revoked_ratio)
@@ -1,32 +1,32 @@
 import os
-import httpx
 import logging
 from fastapi import FastAPI, HTTPException, Depends, Header
 from pydantic import BaseModel
 from typing_extensions import Annotated
-from langchain_community.vectorstores import Redis
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.runnables import RunnableParallel, RunnablePassthrough
 from app.utils.config_llm import config_llm
+from app.utils.index_schema import create_vectorstore
+from app.utils.latency import LatencyCallback, latency_recorder
+from app.utils.query_embedding import QueryEmbeddingBatcher, QueryEmbeddingCache
+from app.utils.retrieval import create_retriever
+from app.utils.rerank import reranker
+from app.utils.response_cache import create_response_cache
+from app.utils.translation_memory import create_translation_memory
+from app.utils.token_verifier import token_verifier
 from langserve import add_routes
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
-AUTH_SERVICE_URL = "http://intelligenceapi-auth/verify"
-
-async def verify_token(x_token: Annotated[str, Header()]) -> None:
+async def verify_token(x_token: Annotated[str, Header()], x_internal_auth: Annotated[str | None, Header()] = None) -> None:
     """
-    인증 서비스를 사용하여 토큰을 검증합니다.
+    토큰을 검증합니다.
+    게이트웨이 서명 헤더(x-internal-auth) 또는 AUTH_MODE 설정(local/remote)에 따라 검증합니다.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(AUTH_SERVICE_URL, headers={"Authorization": f"Bearer {x_token}"})
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="X-Token header invalid")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+    if not await token_verifier.verify(x_token, x_internal_auth):
+        raise HTTPException(status_code=401, detail="X-Token header invalid")
 
 app = FastAPI(
     title="Intelligence Query API",
@@ -36,52 +36,100 @@ app = FastAPI(
     dependencies=[Depends(verify_token)]
 )
 
-def initialize_llm_and_vectorstore(index_name):
+def initialize_llm_and_vectorstore(index_name, route):
     """
     주어진 인덱스 이름을 사용하여 LLM 및 Redis 벡터스토어를 초기화합니다.
+    질문 임베딩은 경로(route)별 메모리 캐시(QUERY_EMBEDDING_CACHE_*)를 거치며, 소요 시간은 경로의 embedding 지연시간으로 기록됩니다.
     """
     config_llm.initialize_llm_from_env()
     config_llm.initialize_embedding_from_env()
-    embedding = config_llm.get_embedding()
+    embedding = QueryEmbeddingCache(config_llm.get_embedding(), route)
     llm = config_llm.get_llm()
 
     REDIS_URL = os.getenv("REDIS_URL")
 
-    vectorstore = Redis(
-        redis_url=REDIS_URL,
-        index_name=index_name,
-        embedding=embedding,
-    )
-    retriever = vectorstore.as_retriever()
+    # storage 서비스와 같은 INDEX_SCHEMA_CONFIG로 벡터 데이터 형식과 질의 임베딩 차원을 맞춤
+    vectorstore = create_vectorstore(REDIS_URL, index_name, embedding)
+    # k, 유사도 하한, MMR, source 필터는 RETRIEVAL_CONFIG(인덱스별) 또는 요청의 config.configurable로 설정
+    retriever = create_retriever(vectorstore, index_name)
     
     return llm, retriever
 
 # 기본 벡터스토어 초기화
-llm, retriever = initialize_llm_and_vectorstore(os.getenv("REDIS_INDEX_NAME", "default"))
+llm, retriever = initialize_llm_and_vectorstore(os.getenv("REDIS_INDEX_NAME", "default"), "docs")
 
 # 도움말 벡터스토어 초기화
-help_llm, help_retriever = initialize_llm_and_vectorstore("help")
+help_llm, help_retriever = initialize_llm_and_vectorstore("help", "help")
+
+# LLM 응답 캐시 (RESPONSE_CACHE_ROUTES에 지정한 경로만 사용)
+response_cache = create_response_cache(config_llm.get_embedding())
 
-def create_chain(template: str, use_chat_template=False, retriever=None):
+def create_chain(template: str, use_chat_template=False, retriever=None, cache_route=None, route=None):
     """
     주어진 프롬프트 템플릿과 선택적 retriever를 사용하여 체인을 생성합니다.
+    cache_route를 지정하면 LLM 단계 앞에 해당 경로의 응답 캐시를 둡니다.
+    LLM/검색 소요 시간은 route(기본값 cache_route) 경로의 지연시간으로 기록됩니다.
     """
     if use_chat_template:
         prompt = ChatPromptTemplate.from_template(template)
     else:
         prompt = PromptTemplate.from_template(template)
 
+    route = route or cache_route
+    callbacks = [LatencyCallback(route, latency_recorder)] if route else []
+    answer = prompt | llm.with_config(callbacks=callbacks) | StrOutputParser()
+    if cache_route:
+        answer = response_cache.wrap(answer, cache_route, prompt, query_key="question" if retriever else "input")
+
     if retriever:
+        # /batch 요청이면 모든 질문을 한 번의 임베딩 요청으로 처리한 뒤 질문별로 검색
         chain = (
-            RunnableParallel({"context": retriever, "question": RunnablePassthrough()})
-            | prompt
-            | llm
-            | StrOutputParser()
+            QueryEmbeddingBatcher(retriever.default.vectorstore.embeddings)
+            | RunnableParallel({"context": retriever.with_config(callbacks=callbacks), "question": RunnablePassthrough()})
+            | answer
         )
     else:
-        chain = prompt | llm | StrOutputParser()
+        chain = answer
     return chain
 
+@app.get("/embedding_cache/stats")
+async def embedding_cache_stats():
+    """
+    /docs, /help 검색에 사용되는 질문 임베딩 메모리 캐시와 영구 임베딩 캐시의 적중/실패 지표를 반환합니다.
+    """
+    return {
+        name: embedding.stats() if hasattr(embedding, "stats") else None
+        for name, embedding in [("docs", retriever.default.vectorstore.embeddings), ("help", help_retriever.default.vectorstore.embeddings)]
+    }
+
+@app.get("/latency/stats")
+async def latency_stats():
+    """
+    경로별로 질문 임베딩(embedding, embedding_batch), 검색(retrieval), LLM(llm) 단계의 지연시간을 나누어 반환합니다.
+    """
+    return latency_recorder.stats()
+
+@app.get("/response_cache/stats")
+async def response_cache_stats():
+    """
+    경로별 응답 캐시 적중률(exact/semantic)과 절약된 LLM 호출 시간을 반환합니다.
+    """
+    return response_cache.stats()
+
+@app.get("/rerank/stats")
+async def rerank_stats():
+    """
+    cross-encoder 재순위화의 호출 수, 예산 초과 횟수, 평균 소요 시간을 반환합니다.
+    """
+    return reranker.stats()
+
+@app.get("/translation_memory/stats")
+async def translation_memory_stats():
+    """
+    /translate 번역 메모리의 문장 단위 적중/실패 지표를 반환합니다.
+    """
+    return translation_memory.stats()
+
 # 입력을 위한 타입 정의
 class Question(BaseModel):
     __root__: str
@@ -90,14 +138,14 @@ docs_chain = create_chain(
     """Answer the question based only on the following context:
     {context}
     Question: {question}""",
-    use_chat_template=True, retriever=retriever
+    use_chat_template=True, retriever=retriever, cache_route="docs"
 ).with_types(input_type=Question)
 
 help_chain = create_chain(
     """Answer the how to use IntelligenceAPI question based only on the following context:
     {context}
     Question: {question}""",
-    use_chat_template=True, retriever=help_retriever
+    use_chat_template=True, retriever=help_retriever, cache_route="help"
 ).with_types(input_type=Question)
 
 # Redis 쿼리를 위한 /docs 경로 추가
@@ -117,18 +165,27 @@ add_routes(
 # 기존 체인 유지
 add_routes(
     app,
-    create_chain("Your IntelligenceAPI AI, Respond to user input based on facts.: {input}"),
+    create_chain("Your IntelligenceAPI AI, Respond to user input based on facts.: {input}", cache_route="llm"),
     path="/llm"
 )
 
-add_routes(
-    app,
-    create_chain('''
+TRANSLATE_TEMPLATE = '''
                     You are a translator.
                     Translate the user's input according to the specified language.
                     Translation result only: user's input: {input}
                     target language: {language}
-    '''),
+    '''
+
+# 번역 메모리: 이미 번역한 문장은 LLM을 호출하지 않음 (/translate/batch는 요청 전체의 중복 문장을 한 번만 번역)
+translation_memory = create_translation_memory(create_chain(TRANSLATE_TEMPLATE, route="translate"), TRANSLATE_TEMPLATE)
+
+class Translation(BaseModel):
+    input: str
+    language: str
+
+add_routes(
+    app,
+    translation_memory.with_types(input_type=Translation, output_type=str),
     path="/translate"
 )
 
@@ -5,6 +5,7 @@ from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmb
 from langchain_google_vertexai import VertexAIModelGarden
 from langchain_google_vertexai.embeddings import VertexAIEmbeddings
 from langchain_anthropic import ChatAnthropic
+from app.utils.embedding_cache import cached_embedding
 
 class ConfigLLM:
     def __init__(self):
@@ -94,6 +95,8 @@ class ConfigLLM:
         else:
             logging.warning(f"Unsupported embedding provider: {provider}")
             return
+        # 동일한 텍스트를 다시 임베딩하지 않도록 캐시 래퍼 적용
+        self.embedding = cached_embedding(self.embedding, provider, model)
         logging.info("Embedding model initialized successfully")
 
     def get_llm(self):
@@ -0,0 +1,25 @@
+import os
+import time
+import hmac
+import hashlib
+
+# 게이트웨이와 공유하는 내부 인증 헤더 서명 키 (없으면 내부 인증 헤더를 사용하지 않음)
+INTERNAL_AUTH_SECRET = os.getenv("INTERNAL_AUTH_SECRET")
+
+def verify_internal_auth(token: str, internal_auth: str) -> bool:
+    """
+    게이트웨이가 토큰 검증 후 붙여준 x-internal-auth 헤더를 확인합니다.
+    서명이 해당 토큰에 대해 유효하고 만료되지 않았다면 auth 서비스 호출 없이 신뢰합니다.
+    """
+    if not INTERNAL_AUTH_SECRET or not token or not internal_auth:
+        return False
+    try:
+        expires_at, signature = internal_auth.split(".", 1)
+        if int(expires_at) < time.time():
+            return False
+    except ValueError:
+        return False
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    message = f"{token_hash}.{expires_at}".encode()
+    expected = hmac.new(INTERNAL_AUTH_SECRET.encode(), message, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
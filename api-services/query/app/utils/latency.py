@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+from collections import deque
+from langchain_core.callbacks import BaseCallbackHandler
+
+# 경로/단계별로 보관할 최근 지연시간 표본 수 (p50/p95 계산용)
+LATENCY_SAMPLES = int(os.getenv("LATENCY_SAMPLES", 1000))
+
+class LatencyRecorder:
+    """
+    경로(docs, help, llm, translate)와 단계(embedding, retrieval, llm)별 요청 지연시간을 기록합니다.
+    최근 samples개 표본으로 백분위수를 계산하고, 전체 횟수는 따로 셉니다.
+    """
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples = samples
+        self.series = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, route: str, stage: str, ms: float):
+        key = (route, stage)
+        with self.lock:
+            if key not in self.series:
+                self.series[key] = deque(maxlen=self.samples)
+            self.series[key].append(ms)
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        경로별, 단계별 호출 수와 최근 표본의 평균/p50/p95/최대 지연시간(ms)을 반환합니다.
+        """
+        with self.lock:
+            snapshot = {key: (self.counts[key], sorted(values)) for key, values in self.series.items()}
+        result = {}
+        for (route, stage), (count, values) in sorted(snapshot.items()):
+            result.setdefault(route, {})[stage] = {
+                "count": count,
+                "avg_ms": round(sum(values) / len(values), 2),
+                "p50_ms": round(values[len(values) // 2], 2),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+                "max_ms": round(values[-1], 2),
+            }
+        return result
+
+class LatencyCallback(BaseCallbackHandler):
+    """
+    체인 안의 LLM 호출과 검색기 호출 시간을 경로의 llm, retrieval 단계로 기록하는 콜백.
+    스트리밍 응답은 마지막 토큰을 받은 시점까지를 LLM 시간으로 봅니다.
+    """
+
+    def __init__(self, route: str, recorder: LatencyRecorder):
+        self.route = route
+        self.recorder = recorder
+        self.started = {}
+
+    def _start(self, run_id):
+        self.started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id, stage: str):
+        started = self.started.pop(run_id, None)
+        if started is not None:
+            self.recorder.record(self.route, stage, (time.perf_counter() - started) * 1000)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, "llm")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "llm")
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._finish(run_id, "retrieval")
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "retrieval")
+
+latency_recorder = LatencyRecorder()
@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableConfig
+from app.utils.latency import LatencyRecorder, latency_recorder
+
+logger = logging.getLogger(__name__)
+
+# 검색 질문 임베딩의 프로세스 메모리 캐시 (영구 임베딩 캐시 EMBEDDING_CACHE_* 앞에 위치). 0이면 캐시하지 않고 지연시간만 기록
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 10000))
+QUERY_EMBEDDING_CACHE_TTL = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", 3600))
+# 질문 묶음을 embed_query로 나누어 보낼 때(질문/문서 임베딩이 다른 제공자)의 동시 요청 수
+QUERY_EMBEDDING_CONCURRENCY = int(os.getenv("QUERY_EMBEDDING_CONCURRENCY", 8))
+# 질문과 문서를 같은 방식으로 임베딩하는 제공자. gemini, vertexai는 작업 유형(RETRIEVAL_QUERY/RETRIEVAL_DOCUMENT)이 달라
+# embed_documents 결과를 질문 벡터로 쓸 수 없음
+SYMMETRIC_EMBEDDING_PROVIDERS = ("openai", "azure")
+
+class QueryEmbeddingCache(Embeddings):
+    """
+    검색 질문의 임베딩을 프로세스 메모리에 보관하는 LRU+TTL 캐시.
+    같은 질문은 ttl초 동안 임베딩 모델이나 영구 임베딩 캐시(Redis/파일)를 거치지 않고 바로 반환합니다.
+    embed_query 소요 시간은 경로의 embedding 단계로, embed_queries 한 번의 소요 시간은 embedding_batch 단계로 기록합니다.
+    """
+
+    def __init__(self, underlying: Embeddings, route: str, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE,
+                 ttl: int = QUERY_EMBEDDING_CACHE_TTL, recorder: LatencyRecorder = latency_recorder, symmetric: bool = None):
+        self.underlying = underlying
+        self.route = route
+        if symmetric is None:
+            symmetric = (os.getenv("EMBEDDING_PROVIDER") or "").lower() in SYMMETRIC_EMBEDDING_PROVIDERS
+        self.symmetric = symmetric
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.recorder = recorder
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.lock = threading.Lock()
+
+    def _get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        now = time.monotonic()
+        vectors = []
+        with self.lock:
+            for text in texts:
+                entry = self.entries.get(text)
+                if entry is not None and self.ttl and entry[0] <= now:
+                    del self.entries[text]
+                    self.expired += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    vectors.append(None)
+                else:
+                    self.hits += 1
+                    self.entries.move_to_end(text)
+                    vectors.append(entry[1])
+        return vectors
+
+    def _set_many(self, items: dict):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self.lock:
+            for text, vector in items.items():
+                self.entries[text] = (expires_at, vector)
+                self.entries.move_to_end(text)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        started = time.perf_counter()
+        vector = self._get_many([text])[0]
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self._set_many({text: vector})
+        self.recorder.record(self.route, "embedding", (time.perf_counter() - started) * 1000)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 질문을 임베딩하고 캐시에 넣습니다. 캐시에 있는 질문과 중복 질문은 제외합니다.
+        질문과 문서 임베딩이 같은 제공자는 한 번의 embed_documents 요청으로, 아니면 embed_query를 동시에 요청하여
+        캐시에는 항상 질문용 벡터만 들어가도록 합니다.
+        """
+        started = time.perf_counter()
+        vectors = self._get_many(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            if self.symmetric:
+                embedded = self.underlying.embed_documents(missing)
+            else:
+                with ThreadPoolExecutor(max_workers=max(1, min(QUERY_EMBEDDING_CONCURRENCY, len(missing)))) as executor:
+                    embedded = list(executor.map(self.underlying.embed_query, missing))
+            new_vectors = dict(zip(missing, embedded))
+            self._set_many(new_vectors)
+            vectors = [vector if vector is not None else new_vectors[text] for text, vector in zip(texts, vectors)]
+            with self.lock:
+                self.batches += 1
+                self.batched_texts += len(missing)
+            self.recorder.record(self.route, "embedding_batch", (time.perf_counter() - started) * 1000)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying.embed_documents(texts)
+
+    def stats(self) -> dict:
+        """
+        메모리 캐시의 적중/실패/만료 횟수와 배치 임베딩 횟수, 그리고 영구 임베딩 캐시의 지표를 반환합니다.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            memory = {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "batches": self.batches,
+                "batched_texts": self.batched_texts,
+                "batch_mode": "embed_documents" if self.symmetric else "concurrent_embed_query",
+            }
+        return {
+            "memory": memory,
+            "persistent": self.underlying.stats() if hasattr(self.underlying, "stats") else None,
+        }
+
+class QueryEmbeddingBatcher(Runnable):
+    """
+    검색 체인 맨 앞에 두는 통과 단계. batch 호출이면 요청의 모든 질문을 embed_queries로 미리 임베딩해 두어,
+    이어지는 질문별 검색이 임베딩 모델을 다시 호출하지 않고 QueryEmbeddingCache에서 벡터를 가져가게 합니다.
+    (RunnableParallel은 batch에서도 입력마다 invoke하므로 검색기 단계에서는 질문을 모을 수 없음)
+    """
+
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+
+    def _prefetch(self, inputs: list) -> list:
+        questions = [question for question in inputs if isinstance(question, str)]
+        # 메모리 캐시를 쓰지 않으면 미리 임베딩해도 재사용되지 않음
+        if len(questions) > 1 and getattr(self.embedding, "max_entries", 0) > 0:
+            try:
+                self.embedding.embed_queries(questions)
+            except Exception as e:
+                # 실패하면 질문별 검색이 각자 임베딩함
+                logger.error(f"Batched query embedding failed: {str(e)}")
+        return list(inputs)
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        return input
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        return input
+
+    def batch(self, inputs: list, config=None, *, return_exceptions: bool = False, **kwargs) -> list:
+        if not inputs:
+            return []
+        return self._batch_with_config(self._prefetch, inputs, config, return_exceptions=return_exceptions)
+
+    async def abatch(self, inputs: list, config=None, *, return_exceptions: bool = False, **kwargs) -> list:
+        if not inputs:
+            return []
+        return await self._abatch_with_config(self._aprefetch, inputs, config, return_exceptions=return_exceptions)
+
+    async def _aprefetch(self, inputs: list) -> list:
+        return await asyncio.to_thread(self._prefetch, inputs)
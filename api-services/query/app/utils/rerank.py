@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+import threading
+from typing import List
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# 로컬 cross-encoder 재순위화 설정. sentence-transformers가 설치되어 있어야 합니다(`pip install sentence-transformers`).
+# 설치되어 있지 않거나 모델을 불러오지 못하면 재순위화 없이 검색 순서를 그대로 사용합니다.
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# 질문당 재순위화에 쓸 수 있는 시간(ms). 남은 후보는 검색 순서대로 뒤에 붙입니다.
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", 150))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 8))
+# 후보 청크를 이 글자 수까지만 모델에 입력
+RERANK_MAX_CHARS = int(os.getenv("RERANK_MAX_CHARS", 2000))
+
+class CrossEncoderReranker:
+    """
+    (질문, 청크) 쌍을 cross-encoder로 점수화하여 후보를 다시 정렬합니다.
+    쌍당 처리 시간을 지수 이동 평균으로 추적하여 예산 안에 처리할 수 있는 후보 수만 점수화하고,
+    배치마다 경과 시간을 확인하여 예산을 넘으면 중단합니다.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL, budget_ms: float = RERANK_BUDGET_MS, batch_size: int = RERANK_BATCH_SIZE):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.model = None
+        self.available = True
+        self.loader = None
+        self.pair_ms = None
+        self.calls = 0
+        self.scored_pairs = 0
+        self.over_budget = 0
+        self.total_ms = 0.0
+        self.lock = threading.Lock()
+
+    def load(self) -> bool:
+        """
+        모델을 불러옵니다(시작 시 미리 불러오기용). 처음 한 번만 불러오며, 실패하면 재순위화를 끕니다.
+        불러오는 동안 잠금을 잡지 않으므로 다른 요청은 기다리지 않습니다.
+        """
+        if self.model is not None or not self.available:
+            return self.model is not None
+        try:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(self.model_name)
+        except Exception as e:
+            self.available = False
+            logger.warning(f"Reranker unavailable, keeping retrieval order: {str(e)}")
+            return False
+        with self.lock:
+            if self.model is None:
+                self.model = model
+        return True
+
+    def load_in_background(self):
+        """
+        요청 처리 중에 모델이 필요해졌으면 별도 스레드에서 불러옵니다. 불러오기가 끝날 때까지는 검색 순서를 그대로 사용합니다.
+        """
+        with self.lock:
+            if self.loader is not None or self.model is not None or not self.available:
+                return
+            self.loader = threading.Thread(target=self.load, name="reranker-loader", daemon=True)
+        self.loader.start()
+
+    def rerank(self, query: str, docs: List[Document], k: int) -> List[Document]:
+        if len(docs) <= 1:
+            return docs[:k]
+        if self.model is None:
+            # 첫 요청에서 모델을 불러오느라 예산을 수 초씩 넘기지 않도록 함
+            self.load_in_background()
+            return docs[:k]
+        started = time.perf_counter()
+        limit = len(docs)
+        if self.pair_ms:
+            # 처리 시간 추정치를 계속 갱신할 수 있도록 최소 한 배치는 점수화
+            limit = min(limit, max(self.batch_size, int(self.budget_ms / self.pair_ms)))
+        scored = []
+        for offset in range(0, limit, self.batch_size):
+            batch = docs[offset:min(offset + self.batch_size, limit)]
+            batch_started = time.perf_counter()
+            scores = self.model.predict([(query, doc.page_content[:RERANK_MAX_CHARS]) for doc in batch])
+            pair_ms = (time.perf_counter() - batch_started) * 1000 / len(batch)
+            self.pair_ms = pair_ms if self.pair_ms is None else 0.8 * self.pair_ms + 0.2 * pair_ms
+            scored.extend(zip(scores, batch))
+            if (time.perf_counter() - started) * 1000 >= self.budget_ms:
+                break
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.calls += 1
+            self.scored_pairs += len(scored)
+            self.total_ms += elapsed_ms
+            if len(scored) < len(docs):
+                self.over_budget += 1
+        ranked = [doc for _, doc in sorted(scored, key=lambda item: -float(item[0]))]
+        return (ranked + docs[len(scored):])[:k]
+
+    def stats(self) -> dict:
+        """
+        재순위화 호출 수, 예산 때문에 일부만 점수화한 횟수, 평균 소요 시간을 반환합니다.
+        """
+        with self.lock:
+            return {
+                "model": self.model_name,
+                "available": self.available,
+                "loaded": self.model is not None,
+                "loading": self.loader is not None and self.model is None and self.available,
+                "budget_ms": self.budget_ms,
+                "calls": self.calls,
+                "scored_pairs": self.scored_pairs,
+                "partial_due_to_budget": self.over_budget,
+                "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+                "pair_ms": round(self.pair_ms, 3) if self.pair_ms else None,
+            }
+
+reranker = CrossEncoderReranker()
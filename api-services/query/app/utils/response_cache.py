@@ -0,0 +1,402 @@
+import os
+import json
+import time
+import array
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+
+logger = logging.getLogger(__name__)
+
+# 응답 캐시 설정: auto(REDIS_URL이 있으면 redis, 없으면 local), redis, local, none
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "auto").lower()
+# 캐시를 사용할 경로와 방식(경로[:exact|semantic], 쉼표로 구분). 질문이 조금만 달라도
+# 답이 달라지는 경로는 exact만 사용하세요. 예: "docs,help,llm:exact"
+# (/translate는 문장 단위 번역 메모리를 사용하므로 응답 캐시 대상이 아님)
+RESPONSE_CACHE_ROUTES = os.getenv("RESPONSE_CACHE_ROUTES", "docs,help")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 24 * 3600))
+# 경로별 최대 항목 수 (넘으면 가장 오래 사용되지 않은 항목부터 삭제)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 10000))
+# 이보다 큰 응답은 캐시하지 않음
+RESPONSE_CACHE_MAX_RESPONSE_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_RESPONSE_BYTES", 64 * 1024))
+# 질문 임베딩의 코사인 유사도가 이 값 이상이면 같은 질문으로 판단
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", 0.95))
+RESPONSE_CACHE_KEY_PREFIX = "response_cache"
+
+def parse_routes(value: str = RESPONSE_CACHE_ROUTES) -> dict:
+    routes = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, _, mode = item.partition(":")
+        mode = mode or "semantic"
+        if mode not in ("exact", "semantic"):
+            raise ValueError(f"Unsupported response cache mode for {route}: {mode}")
+        routes[route.strip("/")] = mode
+    return routes
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFKC", " ".join(str(text).split()))
+
+def context_fingerprint(context) -> list:
+    """
+    검색된 청크의 Redis 키(없으면 본문 해시)를 순서와 무관하게 정렬한 목록을 반환합니다.
+    """
+    if not isinstance(context, list):
+        return [_digest(str(context))]
+    return sorted(
+        getattr(doc, "metadata", {}).get("id") or _digest(getattr(doc, "page_content", str(doc)))
+        for doc in context
+    )
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+class RedisResponseStore:
+    """
+    Redis에 응답을 저장하는 캐시 저장소.
+    항목은 해시(response_cache:{경로}:{프롬프트 해시})로 저장하고, 질문 임베딩은 RediSearch 벡터 인덱스로 검색합니다.
+    경로별 정렬 집합에 최근 사용 시각을 기록하여 max_entries를 넘으면 오래된 항목부터 삭제합니다.
+    """
+
+    index_name = f"{RESPONSE_CACHE_KEY_PREFIX}:idx"
+
+    def __init__(self, redis_url: str, ttl: int = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index_ready = False
+
+    def _entry_key(self, route: str, key: str) -> str:
+        return f"{RESPONSE_CACHE_KEY_PREFIX}:{route}:{key}"
+
+    def _lru_key(self, route: str) -> str:
+        return f"{RESPONSE_CACHE_KEY_PREFIX}:lru:{route}"
+
+    def _ensure_index(self, dims: int):
+        if self.index_ready:
+            return
+        import redis
+        from redis.commands.search.field import TagField, VectorField
+        try:
+            from redis.commands.search.index_definition import IndexDefinition, IndexType
+        except ImportError:
+            # redis-py 5 이하
+            from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+
+        try:
+            self.client.ft(self.index_name).create_index(
+                [
+                    TagField("route"),
+                    TagField("partition"),
+                    VectorField("vector", "FLAT", {"TYPE": "FLOAT32", "DIM": dims, "DISTANCE_METRIC": "COSINE"}),
+                ],
+                definition=IndexDefinition(prefix=[f"{RESPONSE_CACHE_KEY_PREFIX}:"], index_type=IndexType.HASH),
+            )
+        except redis.ResponseError as e:
+            # 다른 인스턴스가 먼저 만든 경우
+            if "already exists" not in str(e).lower():
+                raise
+        self.index_ready = True
+
+    def _touch(self, route: str, entry_key: str):
+        self.client.zadd(self._lru_key(route), {entry_key: time.time()})
+
+    def get(self, route: str, key: str) -> Optional[dict]:
+        entry_key = self._entry_key(route, key)
+        values = self.client.hmget(entry_key, ["response", "latency_ms"])
+        if values[0] is None:
+            return None
+        self._touch(route, entry_key)
+        return {"response": values[0].decode("utf-8"), "latency_ms": float(values[1] or 0)}
+
+    def search(self, route: str, partition: str, vector: List[float], min_similarity: float) -> Optional[dict]:
+        import redis
+        from redis.commands.search.query import Query
+
+        if not self.index_ready:
+            try:
+                self.client.ft(self.index_name).info()
+                self.index_ready = True
+            except redis.ResponseError:
+                # 아직 의미 검색용 항목이 저장된 적 없음
+                return None
+        query = (
+            Query(f"(@route:{{{route}}} @partition:{{{partition}}})=>[KNN 1 @vector $vector AS distance]")
+            .return_fields("response", "latency_ms", "distance")
+            .dialect(2)
+        )
+        result = self.client.ft(self.index_name).search(query, {"vector": array.array("f", vector).tobytes()})
+        if not result.docs:
+            return None
+        doc = result.docs[0]
+        similarity = 1 - float(doc.distance)
+        if similarity < min_similarity:
+            return None
+        self._touch(route, doc.id)
+        return {"response": doc.response, "latency_ms": float(doc.latency_ms or 0), "similarity": similarity}
+
+    def set(self, route: str, key: str, partition: str, vector: Optional[List[float]], response: str, latency_ms: float):
+        entry_key = self._entry_key(route, key)
+        mapping = {"route": route, "partition": partition, "response": response, "latency_ms": latency_ms, "created": time.time()}
+        if vector is not None:
+            try:
+                self._ensure_index(len(vector))
+                mapping["vector"] = array.array("f", vector).tobytes()
+            except Exception as e:
+                # RediSearch 모듈이 없는 Redis에서는 exact 단계만 사용
+                logger.warning(f"Response cache vector index unavailable: {str(e)}")
+        now = time.time()
+        lru_key = self._lru_key(route)
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.hset(entry_key, mapping=mapping)
+        if self.ttl:
+            pipeline.expire(entry_key, self.ttl)
+            # TTL로 이미 만료된 항목은 LRU 목록에서도 제거
+            pipeline.zremrangebyscore(lru_key, "-inf", now - self.ttl)
+        pipeline.zadd(lru_key, {entry_key: now})
+        pipeline.zcard(lru_key)
+        overflow = pipeline.execute()[-1] - self.max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in self.client.zpopmin(lru_key, overflow)]
+            if evicted:
+                self.client.delete(*evicted)
+
+class LocalResponseStore:
+    """
+    프로세스 메모리에 응답을 저장하는 캐시 저장소 (Redis가 없을 때).
+    경로별로 LRU 순서를 유지하고, 의미 검색은 같은 구획의 항목을 순서대로 비교합니다.
+    """
+
+    def __init__(self, ttl: int = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def _entries(self, route: str) -> OrderedDict:
+        return self.routes.setdefault(route, OrderedDict())
+
+    def _expired(self, entry: dict) -> bool:
+        return bool(self.ttl) and time.time() - entry["created"] > self.ttl
+
+    def get(self, route: str, key: str) -> Optional[dict]:
+        with self.lock:
+            entries = self._entries(route)
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry):
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return {"response": entry["response"], "latency_ms": entry["latency_ms"]}
+
+    def search(self, route: str, partition: str, vector: List[float], min_similarity: float) -> Optional[dict]:
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        best_key, best_similarity = None, min_similarity
+        with self.lock:
+            entries = self._entries(route)
+            for key, entry in list(entries.items()):
+                if entry["partition"] != partition or entry["vector"] is None:
+                    continue
+                if self._expired(entry):
+                    del entries[key]
+                    continue
+                similarity = float(np.dot(query, entry["vector"]))
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+            if best_key is None:
+                return None
+            entries.move_to_end(best_key)
+            entry = entries[best_key]
+            return {"response": entry["response"], "latency_ms": entry["latency_ms"], "similarity": best_similarity}
+
+    def set(self, route: str, key: str, partition: str, vector: Optional[List[float]], response: str, latency_ms: float):
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1
+        with self.lock:
+            entries = self._entries(route)
+            entries[key] = {"partition": partition, "vector": vector, "response": response, "latency_ms": latency_ms, "created": time.time()}
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+class RouteStats:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.saved_ms = 0.0
+        self.hit_ms = 0.0
+        self.miss_ms = 0.0
+
+    def to_dict(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "mode": self.mode,
+            "lookups": lookups,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            # 캐시 적중으로 생략된 LLM 호출 시간 (저장 당시 측정한 응답 시간의 합)
+            "saved_provider_seconds": round(self.saved_ms / 1000, 3),
+            "avg_hit_ms": round(self.hit_ms / hits, 2) if hits else None,
+            "avg_miss_ms": round(self.miss_ms / self.misses, 2) if self.misses else None,
+        }
+
+class ResponseCache:
+    """
+    체인의 LLM 단계 앞에 두는 응답 캐시.
+    1단계(exact): 정규화한 프롬프트 전체의 SHA-256이 같으면 저장된 응답을 반환합니다.
+    2단계(semantic): 질문 임베딩의 코사인 유사도가 similarity 이상인 항목이 있으면 반환합니다.
+    의미 검색은 질문을 제외한 나머지 입력(예: 번역 대상 언어)과 검색된 청크 집합이 같은 항목끼리만 비교하므로,
+    재수집으로 청크가 바뀌거나 삭제되면 이전 청크로 만든 응답은 더 이상 적중하지 않습니다.
+    """
+
+    def __init__(self, store, embedding: Optional[Embeddings], routes: dict, namespace: str,
+                 similarity: float = RESPONSE_CACHE_SIMILARITY, max_response_bytes: int = RESPONSE_CACHE_MAX_RESPONSE_BYTES):
+        self.store = store
+        self.embedding = embedding
+        self.routes = routes
+        self.namespace = namespace
+        self.similarity = similarity
+        self.max_response_bytes = max_response_bytes
+        self.route_stats = {route: RouteStats(mode) for route, mode in routes.items()}
+        self.lock = threading.Lock()
+
+    def _record(self, route: str, **deltas):
+        stats = self.route_stats[route]
+        with self.lock:
+            for name, value in deltas.items():
+                setattr(stats, name, getattr(stats, name) + value)
+
+    def _keys(self, route: str, prompt, query_key: str, inputs: dict, config: dict) -> dict:
+        # LLM 모델이 바뀌면 이전 응답을 쓰지 않도록 네임스페이스를 키에 포함
+        prompt_text = normalize_text(prompt.invoke(inputs).to_string())
+        rest = {name: value for name, value in inputs.items() if name not in (query_key, "context")}
+        if "context" in inputs:
+            rest["context"] = context_fingerprint(inputs["context"])
+        # 요청별 검색 설정(config.configurable)이 다르면 의미 검색 대상에서 제외 (예: source 필터)
+        rest["configurable"] = (config or {}).get("configurable", {})
+        return {
+            "key": _digest(f"{self.namespace}\n{prompt_text}"),
+            "partition": _digest(f"{self.namespace}\n{json.dumps(rest, sort_keys=True, default=str)}")[:16],
+            "query": inputs.get(query_key),
+        }
+
+    def _lookup(self, route: str, prompt, query_key: str, inputs, config: dict = None) -> tuple:
+        """
+        (캐시된 응답 또는 None, 저장에 쓸 키 정보)를 반환합니다. 캐시 장애 시 (None, None)을 반환합니다.
+        """
+        started = time.perf_counter()
+        try:
+            keys = self._keys(route, prompt, query_key, inputs, config)
+            entry = self.store.get(route, keys["key"])
+            tier = "exact_hits"
+            keys["vector"] = None
+            if entry is None and self.routes[route] == "semantic" and self.embedding is not None and keys["query"]:
+                # 검색 단계가 같은 질문을 이미 임베딩했으므로 원문 그대로 임베딩하여 임베딩 캐시를 재사용
+                keys["vector"] = self.embedding.embed_query(str(keys["query"]))
+                entry = self.store.search(route, keys["partition"], keys["vector"], self.similarity)
+                tier = "semantic_hits"
+        except Exception as e:
+            self._record(route, errors=1)
+            logger.error(f"Response cache lookup failed for {route}: {str(e)}")
+            return None, None
+        if entry is None:
+            return None, keys
+        self._record(route, **{tier: 1}, saved_ms=entry["latency_ms"], hit_ms=(time.perf_counter() - started) * 1000)
+        return entry["response"], keys
+
+    def _store(self, route: str, keys: dict, response: str, latency_ms: float):
+        self._record(route, misses=1, miss_ms=latency_ms)
+        if keys is None or len(response.encode("utf-8")) > self.max_response_bytes:
+            return
+        try:
+            self.store.set(route, keys["key"], keys["partition"], keys["vector"], response, latency_ms)
+        except Exception as e:
+            self._record(route, errors=1)
+            logger.error(f"Response cache write failed for {route}: {str(e)}")
+
+    def wrap(self, runnable: Runnable, route: str, prompt, query_key: str) -> Runnable:
+        """
+        runnable(프롬프트 | LLM | 출력 파서)을 캐시로 감쌉니다. 캐시를 쓰지 않는 경로는 그대로 반환합니다.
+        스트리밍 요청은 캐시 적중 시 응답 전체를 한 번에, 실패 시 LLM 출력을 그대로 흘려보내며 저장합니다.
+        """
+        if route not in self.routes:
+            return runnable
+
+        def cached(inputs, config):
+            response, keys = self._lookup(route, prompt, query_key, inputs, config)
+            if response is not None:
+                yield response
+                return
+            started = time.perf_counter()
+            chunks = []
+            for chunk in runnable.stream(inputs, config):
+                chunks.append(chunk)
+                yield chunk
+            self._store(route, keys, "".join(chunks), (time.perf_counter() - started) * 1000)
+
+        async def acached(inputs, config):
+            response, keys = await asyncio.to_thread(self._lookup, route, prompt, query_key, inputs, config)
+            if response is not None:
+                yield response
+                return
+            started = time.perf_counter()
+            chunks = []
+            async for chunk in runnable.astream(inputs, config):
+                chunks.append(chunk)
+                yield chunk
+            await asyncio.to_thread(self._store, route, keys, "".join(chunks), (time.perf_counter() - started) * 1000)
+
+        return RunnableLambda(cached, afunc=acached, name=f"response_cache_{route}")
+
+    def stats(self) -> dict:
+        """
+        경로별 적중/실패 횟수, 적중률, 절약된 LLM 호출 시간을 반환합니다.
+        """
+        with self.lock:
+            return {
+                "backend": type(self.store).__name__ if self.store else None,
+                "routes": {route: stats.to_dict() for route, stats in self.route_stats.items()},
+            }
+
+def create_response_cache(embedding: Optional[Embeddings]) -> ResponseCache:
+    """
+    RESPONSE_CACHE_BACKEND 설정에 따라 응답 캐시를 만듭니다.
+    캐시를 사용하지 않거나 저장소 초기화에 실패하면 어떤 경로도 감싸지 않는 캐시를 반환합니다.
+    """
+    backend = RESPONSE_CACHE_BACKEND
+    redis_url = os.getenv("REDIS_URL")
+    if backend == "auto":
+        backend = "redis" if redis_url else "local"
+    namespace = f"{os.getenv('LLM_PROVIDER')}:{os.getenv('LLM_MODEL')}"
+
+    try:
+        if backend == "redis":
+            store = RedisResponseStore(redis_url)
+        elif backend == "local":
+            store = LocalResponseStore()
+        else:
+            return ResponseCache(None, embedding, {}, namespace)
+    except Exception as e:
+        logger.error(f"Failed to initialize response cache ({backend}): {str(e)}")
+        return ResponseCache(None, embedding, {}, namespace)
+
+    return ResponseCache(store, embedding, parse_routes(), namespace)
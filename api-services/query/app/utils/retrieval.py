@@ -0,0 +1,215 @@
+import os
+import re
+import json
+from typing import List, Optional
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import ConfigurableField, Runnable
+from langchain_community.vectorstores import Redis
+from langchain_community.vectorstores.redis import RedisFilter
+from app.utils.rerank import reranker
+
+# 검색 설정 (JSON 문자열 또는 JSON 파일 경로). 예:
+# {"default": {"k": 4, "score_threshold": 0.75},
+#  "indexes": {"help": {"k": 3, "search_type": "hybrid", "rerank": true}}}
+# 적용 순서: 요청의 config.configurable > 인덱스 설정 > 기본값
+RETRIEVAL_CONFIG = os.getenv("RETRIEVAL_CONFIG", "")
+# 요청에서 지정할 수 있는 최대 k/fetch_k (프롬프트 크기와 검색 비용 상한)
+RETRIEVAL_MAX_K = int(os.getenv("RETRIEVAL_MAX_K", 20))
+
+DEFAULT_RETRIEVAL = {
+    "default": {
+        "k": 4,
+        # similarity, mmr, hybrid(벡터 KNN + BM25 전문 검색을 RRF로 결합)
+        "search_type": "similarity",
+        # 0~1 코사인 유사도. 지정하면 이보다 덜 비슷한 청크는 Redis 범위 질의로 제외
+        "score_threshold": None,
+        # mmr/hybrid/재순위화의 후보 수, mmr의 관련성/다양성 가중치(1이면 관련성만, 0이면 다양성만)
+        "fetch_k": 20,
+        "lambda_mult": 0.5,
+        # RRF 상수: 점수 = Σ 1 / (rrf_k + 순위)
+        "rrf_k": 60,
+        # similarity/hybrid 후보를 로컬 cross-encoder로 재순위화 (RERANK_BUDGET_MS 안에서)
+        "rerank": False,
+    },
+    "indexes": {},
+}
+
+SEARCH_TYPES = ("similarity", "mmr", "hybrid")
+
+# 전문 검색어로 쓸 토큰 (RediSearch 토크나이저처럼 밑줄은 단어에 포함)
+_TERM = re.compile(r"\w+")
+
+def load_retrieval_config(value: str = RETRIEVAL_CONFIG) -> dict:
+    config = json.loads(json.dumps(DEFAULT_RETRIEVAL))
+    if not value:
+        return config
+    if os.path.isfile(value):
+        with open(value) as f:
+            custom = json.load(f)
+    else:
+        custom = json.loads(value)
+    config["default"].update(custom.get("default", {}))
+    config["indexes"].update(custom.get("indexes", {}))
+    return config
+
+def retrieval_settings(index_name: str, config: dict = None) -> dict:
+    """
+    인덱스에 적용할 검색 설정을 반환합니다.
+    """
+    config = config or retrieval_config
+    return {**config["default"], **config["indexes"].get(index_name, {})}
+
+def fulltext_terms(query: str) -> List[str]:
+    return list(dict.fromkeys(term.lower() for term in _TERM.findall(query) if len(term) > 1 or term.isdigit()))
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], rrf_k: int = 60) -> List[Document]:
+    """
+    여러 검색 결과를 순위만으로 합칩니다(점수 척도가 다른 BM25와 벡터 거리를 그대로 비교하지 않음).
+    """
+    scores, docs = {}, {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.metadata.get("id") or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+class TunableRetriever(BaseRetriever):
+    """
+    k, 유사도 하한, MMR, 하이브리드 검색, 재순위화, source 필터를 설정할 수 있는 Redis 검색기.
+    유사도 하한과 source 필터는 Redis 질의에 포함되어 서버에서 적용됩니다.
+    하이브리드 검색에서 전문 검색으로만 찾은 청크도 유사도 하한 미만이면 제외합니다.
+    """
+
+    vectorstore: Redis
+    k: int = 4
+    search_type: str = "similarity"
+    score_threshold: Optional[float] = None
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+    rrf_k: int = 60
+    rerank: bool = False
+    sources: Optional[List[str]] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _limits(self) -> tuple:
+        k = max(1, min(self.k, RETRIEVAL_MAX_K))
+        return k, max(k, min(self.fetch_k, RETRIEVAL_MAX_K))
+
+    def _search_kwargs(self) -> dict:
+        k, fetch_k = self._limits()
+        kwargs = {"k": k}
+        if self.score_threshold is not None:
+            # COSINE 거리 = 1 - 코사인 유사도
+            kwargs["distance_threshold"] = 1 - self.score_threshold
+        if self.sources:
+            kwargs["filter"] = RedisFilter.tag("source") == list(self.sources)
+        if self.search_type == "mmr":
+            kwargs["fetch_k"] = fetch_k
+            kwargs["lambda_mult"] = self.lambda_mult
+        return kwargs
+
+    def _fulltext_search(self, query: str, k: int, filter=None) -> List[Document]:
+        """
+        청크 본문(content TEXT 필드)에 대한 BM25 전문 검색. 오류 코드나 API 경로처럼 임베딩으로는 놓치기 쉬운 식별자를 찾습니다.
+        """
+        from redis.commands.search.query import Query
+
+        terms = fulltext_terms(query)
+        if not terms:
+            return []
+        schema = self.vectorstore._schema
+        text_query = f"@{schema.content_key}:({'|'.join(terms)})"
+        if filter is not None:
+            text_query = f"({filter}) {text_query}"
+        search = (
+            Query(text_query)
+            .scorer("BM25")
+            .return_fields(schema.content_key, *schema.metadata_keys)
+            .paging(0, k)
+            .dialect(2)
+        )
+        results = self.vectorstore.client.ft(self.vectorstore.index_name).search(search)
+        return [
+            Document(page_content=getattr(result, schema.content_key), metadata={"id": result.id, **self.vectorstore._collect_metadata(result)})
+            for result in results.docs
+        ]
+
+    def _above_threshold(self, query: str, docs: List[Document]) -> List[Document]:
+        """
+        저장된 청크 벡터와 질문 벡터의 코사인 유사도가 score_threshold 이상인 청크만 반환합니다.
+        """
+        if not docs:
+            return docs
+        schema = self.vectorstore._schema
+        # 검색 단계에서 임베딩한 질문이므로 질문 임베딩 캐시에서 가져옴
+        query_vector = np.asarray(self.vectorstore.embeddings.embed_query(query), dtype=np.float32)
+        pipeline = self.vectorstore.client.pipeline(transaction=False)
+        for doc in docs:
+            pipeline.hget(doc.metadata["id"], schema.content_vector_key)
+        kept = []
+        for doc, raw in zip(docs, pipeline.execute()):
+            if raw is None:
+                continue
+            vector = np.frombuffer(raw, dtype=schema.vector_dtype).astype(np.float32)
+            norm = float(np.linalg.norm(vector) * np.linalg.norm(query_vector))
+            if norm and float(vector @ query_vector) / norm >= self.score_threshold:
+                kept.append(doc)
+        return kept
+
+    def _hybrid_fulltext(self, query: str, vector_docs: List[Document], candidates: int, filter) -> List[Document]:
+        fulltext_docs = self._fulltext_search(query, candidates, filter)
+        if self.score_threshold is None:
+            return fulltext_docs
+        allowed = {doc.metadata.get("id") for doc in vector_docs}
+        extra = [doc for doc in fulltext_docs if doc.metadata.get("id") not in allowed]
+        # 벡터 범위 질의가 후보 수보다 적게 반환했으면 하한 이상인 청크는 모두 받은 것이므로 나머지는 하한 미만
+        if len(vector_docs) >= candidates:
+            allowed.update(doc.metadata.get("id") for doc in self._above_threshold(query, extra))
+        return [doc for doc in fulltext_docs if doc.metadata.get("id") in allowed]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        if self.search_type not in SEARCH_TYPES:
+            raise ValueError(f"search_type must be one of {SEARCH_TYPES}. Got {self.search_type}")
+        kwargs = self._search_kwargs()
+        if self.search_type == "mmr":
+            return self.vectorstore.max_marginal_relevance_search(query, **kwargs)
+
+        k, fetch_k = self._limits()
+        # 하이브리드/재순위화는 fetch_k개 후보에서 k개를 고름
+        candidates = fetch_k if self.search_type == "hybrid" or self.rerank else k
+        docs = self.vectorstore.similarity_search(query, **{**kwargs, "k": candidates})
+        if self.search_type == "hybrid":
+            docs = reciprocal_rank_fusion([docs, self._hybrid_fulltext(query, docs, candidates, kwargs.get("filter"))], self.rrf_k)
+        if self.rerank:
+            docs = reranker.rerank(query, docs, k)
+        return docs[:k]
+
+def create_retriever(vectorstore: Redis, index_name: str) -> Runnable:
+    """
+    인덱스 검색 설정을 기본값으로 하는 검색기를 만듭니다.
+    각 값은 LangServe 요청의 config로 바꿀 수 있습니다. 예:
+    {"input": "...", "config": {"configurable": {"k": 2, "score_threshold": 0.8, "sources": ["manual.pdf"]}}}
+    """
+    settings = retrieval_settings(index_name)
+    if settings["rerank"]:
+        # 첫 요청이 모델 적재 시간을 기다리지 않도록 시작 시 미리 불러옴
+        reranker.load()
+    retriever = TunableRetriever(vectorstore=vectorstore, **settings)
+    return retriever.configurable_fields(
+        k=ConfigurableField(id="k", name="k", description="Number of chunks to put into the prompt"),
+        search_type=ConfigurableField(id="search_type", name="Search type", description="similarity, mmr or hybrid"),
+        score_threshold=ConfigurableField(id="score_threshold", name="Score threshold", description="Minimum cosine similarity (0-1) of returned chunks"),
+        fetch_k=ConfigurableField(id="fetch_k", name="Fetch k", description="Candidates considered by MMR, hybrid search and reranking"),
+        lambda_mult=ConfigurableField(id="lambda_mult", name="MMR lambda", description="MMR relevance/diversity trade-off (1 = relevance only)"),
+        rrf_k=ConfigurableField(id="rrf_k", name="RRF k", description="Reciprocal-rank fusion constant for hybrid search"),
+        rerank=ConfigurableField(id="rerank", name="Rerank", description="Rerank candidates with the local cross-encoder"),
+        sources=ConfigurableField(id="sources", name="Sources", description="Only return chunks from these source files"),
+    )
+
+retrieval_config = load_retrieval_config()
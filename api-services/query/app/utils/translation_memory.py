@@ -0,0 +1,431 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator, List, Optional
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import patch_config
+
+logger = logging.getLogger(__name__)
+
+# 번역 메모리 설정: auto(REDIS_URL이 있으면 redis, 없으면 local), redis, local, none
+TRANSLATION_MEMORY_BACKEND = os.getenv("TRANSLATION_MEMORY_BACKEND", "auto").lower()
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", "/tmp/translation_memory.sqlite3")
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", 200000))
+# 이 길이(글자 수)를 넘는 입력은 문장 단위로 나누어 문장별로 캐시
+TRANSLATION_SEGMENT_MIN_CHARS = int(os.getenv("TRANSLATION_SEGMENT_MIN_CHARS", 200))
+# 캐시에 없는 문장을 LLM에 동시에 요청하는 최대 수
+TRANSLATION_MAX_CONCURRENCY = int(os.getenv("TRANSLATION_MAX_CONCURRENCY", 8))
+TRANSLATION_MEMORY_KEY_PREFIX = "translation_memory"
+
+# 문장 끝 문장부호 뒤의 공백 또는 줄바꿈에서 분할 (구분자는 그대로 보존)
+SENTENCE_BOUNDARY = re.compile(r"((?<=[.!?。！？])\s+|\s*\n\s*)")
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFKC", " ".join(text.split()))
+
+def split_segments(text: str, min_chars: int = TRANSLATION_SEGMENT_MIN_CHARS) -> List[str]:
+    """
+    텍스트를 [문장, 구분자, 문장, ...] 형태로 나눕니다. 짧은 텍스트는 나누지 않습니다.
+    짝수 번째 항목이 번역할 문장이고, 홀수 번째 항목은 원문의 공백/줄바꿈입니다.
+    """
+    if len(text) <= min_chars:
+        return [text]
+    return SENTENCE_BOUNDARY.split(text)
+
+def needs_translation(segment: str) -> bool:
+    # 공백, 숫자, 기호만 있는 조각은 LLM에 보내지 않음
+    return any(char.isalpha() for char in segment)
+
+def strip_stream(chunks: Iterator[str]) -> Iterator[str]:
+    """
+    스트림 출력의 앞뒤 공백을 제거합니다 (batch 번역의 strip()과 같은 결과). 끝 공백은 다음 토큰이 올 때까지 보류합니다.
+    """
+    pending = None
+    for chunk in chunks:
+        text = chunk if pending is not None else chunk.lstrip()
+        text = (pending or "") + text
+        if not text:
+            continue
+        stripped = text.rstrip()
+        pending = text[len(stripped):]
+        if stripped:
+            yield stripped
+
+async def astrip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    pending = None
+    async for chunk in chunks:
+        text = chunk if pending is not None else chunk.lstrip()
+        text = (pending or "") + text
+        if not text:
+            continue
+        stripped = text.rstrip()
+        pending = text[len(stripped):]
+        if stripped:
+            yield stripped
+
+class RedisTranslationStore:
+    """
+    Redis에 번역을 저장하는 메모리 저장소.
+    정렬 집합에 최근 사용 시각을 기록하여 max_entries를 넘으면 오래 사용되지 않은 항목부터 삭제합니다.
+    """
+
+    def __init__(self, redis_url: str, max_entries: int = TRANSLATION_MEMORY_MAX_ENTRIES):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.max_entries = max_entries
+        self.lru_key = f"{TRANSLATION_MEMORY_KEY_PREFIX}:lru"
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        values = self.client.mget(keys)
+        hit_keys = [key for key, value in zip(keys, values) if value is not None]
+        if hit_keys:
+            now = time.time()
+            self.client.zadd(self.lru_key, {key: now for key in hit_keys})
+        return [value.decode("utf-8") if value is not None else None for value in values]
+
+    def set_many(self, items: dict):
+        now = time.time()
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.mset(items)
+        pipeline.zadd(self.lru_key, {key: now for key in items})
+        pipeline.zcard(self.lru_key)
+        overflow = pipeline.execute()[-1] - self.max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in self.client.zpopmin(self.lru_key, overflow)]
+            if evicted:
+                self.client.delete(*evicted)
+
+class SQLiteTranslationStore:
+    """
+    로컬 SQLite 파일에 번역을 저장하는 메모리 저장소 (재시작 후에도 유지).
+    항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다(LRU).
+    """
+
+    def __init__(self, path: str = TRANSLATION_MEMORY_PATH, max_entries: int = TRANSLATION_MEMORY_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.connection.commit()
+        self.max_entries = max_entries
+        self.writes_since_eviction = 0
+        self.lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        placeholders = ",".join("?" * len(keys))
+        with self.lock:
+            rows = dict(self.connection.execute(f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", keys).fetchall())
+            if rows:
+                now = time.time()
+                self.connection.executemany("UPDATE translations SET last_used = ? WHERE key = ?", [(now, key) for key in rows])
+                self.connection.commit()
+        return [rows.get(key) for key in keys]
+
+    def set_many(self, items: dict):
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+            self.writes_since_eviction += len(items)
+            if self.writes_since_eviction >= max(1, self.max_entries // 100):
+                self.writes_since_eviction = 0
+                self.connection.execute(
+                    "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self.connection.commit()
+
+class TranslationMemory(Runnable):
+    """
+    (정규화한 원문, 대상 언어, 모델) 키로 번역 결과를 재사용하는 번역 메모리.
+    긴 입력은 문장 단위로 나누어 메모리에 없는 문장만 LLM 체인에 요청하고, 원문의 공백/줄바꿈을 유지한 채 다시 합칩니다.
+    {"input", "language"}를 입력으로 받는 Runnable이므로 batch 호출은 요청 전체에서 중복 문장을 한 번만 번역하고,
+    stream 호출은 메모리에 있는 문장은 바로, 없는 첫 문장은 LLM 토큰 단위로 흘려보냅니다.
+    """
+
+    def __init__(self, chain: Runnable, store, namespace: str, max_concurrency: int = TRANSLATION_MAX_CONCURRENCY):
+        self.chain = chain
+        self.store = store
+        self.namespace = namespace
+        self.max_concurrency = max_concurrency
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def _key(self, segment: str, language: str) -> str:
+        digest = hashlib.sha256(f"{normalize_text(language).lower()}\n{normalize_text(segment)}".encode("utf-8")).hexdigest()
+        return f"{TRANSLATION_MEMORY_KEY_PREFIX}:{self.namespace}:{digest}"
+
+    def _get_many(self, keys: List[str]) -> List[Optional[str]]:
+        if self.store is None or not keys:
+            return [None] * len(keys)
+        try:
+            return self.store.get_many(keys)
+        except Exception as e:
+            # 메모리 장애가 번역 요청 자체를 막지 않도록 함
+            with self.lock:
+                self.errors += 1
+            logger.error(f"Translation memory read failed: {str(e)}")
+            return [None] * len(keys)
+
+    def _set_many(self, items: dict):
+        if self.store is None or not items:
+            return
+        try:
+            self.store.set_many(items)
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+            logger.error(f"Translation memory write failed: {str(e)}")
+
+    def _plan(self, texts: List[str], language: str) -> tuple:
+        """
+        입력별 조각 목록, 메모리에서 찾은 번역, 번역이 필요한 (키, 원문) 목록, 그리고 키별로 처음 요청한 입력의 번호를 반환합니다.
+        같은 요청 안에서 반복되는 문장은 한 번만 번역합니다.
+        """
+        pieces = [split_segments(text) for text in texts]
+        keys = list(dict.fromkeys(
+            self._key(segment, language)
+            for segments in pieces for i, segment in enumerate(segments) if i % 2 == 0 and needs_translation(segment)
+        ))
+        found = dict(zip(keys, self._get_many(keys)))
+        missing, owners = {}, {}
+        for index, segments in enumerate(pieces):
+            for i, segment in enumerate(segments):
+                if i % 2 == 0 and needs_translation(segment):
+                    key = self._key(segment, language)
+                    if found[key] is None and key not in missing:
+                        missing[key] = segment.strip()
+                        owners[key] = index
+        with self.lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return pieces, found, missing, owners
+
+    @staticmethod
+    def _split_whitespace(segment: str) -> tuple:
+        # 원문 조각 앞뒤 공백은 유지하고 번역문으로 바꾸기 위해 (앞 공백, 뒤 공백)을 반환
+        stripped = segment.strip()
+        start = segment.find(stripped)
+        return segment[:start], segment[start + len(stripped):]
+
+    def _assemble(self, pieces: list, found: dict, language: str) -> List[str]:
+        results = []
+        for segments in pieces:
+            parts = []
+            for i, segment in enumerate(segments):
+                if i % 2 == 1 or not needs_translation(segment):
+                    parts.append(segment)
+                else:
+                    leading, trailing = self._split_whitespace(segment)
+                    parts.append(leading + found[self._key(segment, language)] + trailing)
+            results.append("".join(parts))
+        return results
+
+    def _inputs(self, missing: dict, language: str) -> List[dict]:
+        return [{"input": segment, "language": language} for segment in missing.values()]
+
+    def _configs(self, missing: dict, owners: dict, configs: Optional[List[RunnableConfig]]) -> List[RunnableConfig]:
+        # 문장마다 그 문장을 처음 요청한 입력의 config(콜백, 태그)로 LLM 체인을 호출
+        return [
+            patch_config(configs[owners[key]] if configs else None, max_concurrency=self.max_concurrency)
+            for key in missing
+        ]
+
+    def translate(self, texts: List[str], language: str, configs: Optional[List[RunnableConfig]] = None) -> List[str]:
+        pieces, found, missing, owners = self._plan(texts, language)
+        if missing:
+            outputs = self.chain.batch(self._inputs(missing, language), config=self._configs(missing, owners, configs))
+            translated = {key: output.strip() for key, output in zip(missing, outputs)}
+            found.update(translated)
+            self._set_many(translated)
+        return self._assemble(pieces, found, language)
+
+    async def atranslate(self, texts: List[str], language: str, configs: Optional[List[RunnableConfig]] = None) -> List[str]:
+        pieces, found, missing, owners = await asyncio.to_thread(self._plan, texts, language)
+        if missing:
+            outputs = await self.chain.abatch(self._inputs(missing, language), config=self._configs(missing, owners, configs))
+            translated = {key: output.strip() for key, output in zip(missing, outputs)}
+            found.update(translated)
+            await asyncio.to_thread(self._set_many, translated)
+        return self._assemble(pieces, found, language)
+
+    def _translate_requests(self, requests: List[dict], config: List[RunnableConfig] = None) -> List[str]:
+        outputs = [None] * len(requests)
+        for language, indexes in self._group_by_language(requests).items():
+            configs = [config[i] for i in indexes] if config else None
+            for i, text in zip(indexes, self.translate([requests[i]["input"] for i in indexes], language, configs)):
+                outputs[i] = text
+        return outputs
+
+    async def _atranslate_requests(self, requests: List[dict], config: List[RunnableConfig] = None) -> List[str]:
+        outputs = [None] * len(requests)
+        for language, indexes in self._group_by_language(requests).items():
+            configs = [config[i] for i in indexes] if config else None
+            for i, text in zip(indexes, await self.atranslate([requests[i]["input"] for i in indexes], language, configs)):
+                outputs[i] = text
+        return outputs
+
+    @staticmethod
+    def _group_by_language(requests: List[dict]) -> dict:
+        groups = {}
+        for i, request in enumerate(requests):
+            groups.setdefault(request["language"], []).append(i)
+        return groups
+
+    def _translate_one(self, request: dict, config: RunnableConfig) -> str:
+        return self._translate_requests([request], [config])[0]
+
+    async def _atranslate_one(self, request: dict, config: RunnableConfig) -> str:
+        return (await self._atranslate_requests([request], [config]))[0]
+
+    def _stream_plan(self, request: dict) -> tuple:
+        """
+        스트리밍용 계획: (조각 목록, 찾은 번역, 번역이 필요한 문장, 토큰 단위로 흘려보낼 첫 번째 미번역 문장의 키)
+        """
+        pieces, found, missing, _ = self._plan([request["input"]], request["language"])
+        return pieces[0], found, missing, next(iter(missing), None)
+
+    def _stream_translate(self, inputs: Iterator[dict], config: RunnableConfig) -> Iterator[str]:
+        """
+        원문 순서대로 번역을 흘려보냅니다. 첫 번째 미번역 문장은 LLM 체인의 스트림을 그대로 전달하고,
+        나머지 미번역 문장은 그동안 별도 스레드에서 batch로 번역합니다.
+        """
+        for request in inputs:
+            language = request["language"]
+            segments, found, missing, first = self._stream_plan(request)
+            rest = {key: segment for key, segment in missing.items() if key != first}
+            executor = ThreadPoolExecutor(max_workers=1) if rest else None
+            future = executor.submit(self.chain.batch, self._inputs(rest, language), config=patch_config(config, max_concurrency=self.max_concurrency)) if rest else None
+            try:
+                for i, segment in enumerate(segments):
+                    if i % 2 == 1 or not needs_translation(segment):
+                        yield segment
+                        continue
+                    key = self._key(segment, language)
+                    leading, trailing = self._split_whitespace(segment)
+                    if found[key] is None and key == first:
+                        yield leading
+                        chunks = []
+                        for chunk in strip_stream(self.chain.stream({"input": missing[key], "language": language}, config)):
+                            chunks.append(chunk)
+                            yield chunk
+                        found[key] = "".join(chunks)
+                        yield trailing
+                        continue
+                    if found[key] is None:
+                        found.update({k: output.strip() for k, output in zip(rest, future.result())})
+                    yield leading + found[key] + trailing
+            finally:
+                if executor:
+                    executor.shutdown(wait=False)
+            self._set_many({key: found[key] for key in missing if found[key] is not None})
+
+    async def _astream_translate(self, inputs: AsyncIterator[dict], config: RunnableConfig) -> AsyncIterator[str]:
+        async for request in inputs:
+            language = request["language"]
+            segments, found, missing, first = await asyncio.to_thread(self._stream_plan, request)
+            rest = {key: segment for key, segment in missing.items() if key != first}
+            task = asyncio.create_task(
+                self.chain.abatch(self._inputs(rest, language), config=patch_config(config, max_concurrency=self.max_concurrency))
+            ) if rest else None
+            try:
+                for i, segment in enumerate(segments):
+                    if i % 2 == 1 or not needs_translation(segment):
+                        yield segment
+                        continue
+                    key = self._key(segment, language)
+                    leading, trailing = self._split_whitespace(segment)
+                    if found[key] is None and key == first:
+                        yield leading
+                        chunks = []
+                        async for chunk in astrip_stream(self.chain.astream({"input": missing[key], "language": language}, config)):
+                            chunks.append(chunk)
+                            yield chunk
+                        found[key] = "".join(chunks)
+                        yield trailing
+                        continue
+                    if found[key] is None:
+                        found.update({k: output.strip() for k, output in zip(rest, await task)})
+                    yield leading + found[key] + trailing
+            finally:
+                if task and not task.done():
+                    task.cancel()
+            await asyncio.to_thread(self._set_many, {key: found[key] for key in missing if found[key] is not None})
+
+    def invoke(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs) -> str:
+        return self._call_with_config(self._translate_one, input, config)
+
+    async def ainvoke(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs) -> str:
+        return await self._acall_with_config(self._atranslate_one, input, config)
+
+    def batch(self, inputs: List[dict], config=None, *, return_exceptions: bool = False, **kwargs) -> List[str]:
+        if not inputs:
+            return []
+        return self._batch_with_config(self._translate_requests, inputs, config, return_exceptions=return_exceptions)
+
+    async def abatch(self, inputs: List[dict], config=None, *, return_exceptions: bool = False, **kwargs) -> List[str]:
+        if not inputs:
+            return []
+        return await self._abatch_with_config(self._atranslate_requests, inputs, config, return_exceptions=return_exceptions)
+
+    def stream(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs) -> Iterator[str]:
+        yield from self._transform_stream_with_config(iter([input]), self._stream_translate, config)
+
+    async def astream(self, input: dict, config: Optional[RunnableConfig] = None, **kwargs) -> AsyncIterator[str]:
+        async def input_aiter():
+            yield input
+
+        async for chunk in self._atransform_stream_with_config(input_aiter(), self._astream_translate, config):
+            yield chunk
+
+    def stats(self) -> dict:
+        """
+        문장 단위 적중/실패 횟수와 적중률을 반환합니다.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.store).__name__ if self.store else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def create_translation_memory(chain: Runnable, template: str) -> TranslationMemory:
+    """
+    TRANSLATION_MEMORY_BACKEND 설정에 따라 번역 메모리를 만듭니다.
+    메모리를 사용하지 않거나 저장소 초기화에 실패하면 모든 문장을 LLM에 요청하는 번역기를 반환합니다.
+    """
+    backend = TRANSLATION_MEMORY_BACKEND
+    redis_url = os.getenv("REDIS_URL")
+    if backend == "auto":
+        backend = "redis" if redis_url else "local"
+    # 모델이나 프롬프트가 바뀌면 이전 번역을 쓰지 않도록 네임스페이스에 포함
+    prompt_digest = hashlib.sha256(template.encode("utf-8")).hexdigest()[:8]
+    namespace = f"{os.getenv('LLM_PROVIDER')}:{os.getenv('LLM_MODEL')}:{prompt_digest}"
+
+    store = None
+    try:
+        if backend == "redis":
+            store = RedisTranslationStore(redis_url)
+        elif backend == "local":
+            store = SQLiteTranslationStore()
+    except Exception as e:
+        logger.error(f"Failed to initialize translation memory ({backend}): {str(e)}")
+    return TranslationMemory(chain, store, namespace)
@@ -0,0 +1,87 @@
+"""
+토큰 검증 방식별 auth 서비스 호출 수 벤치마크.
+
+로컬 스텁 auth 서비스(/verify)를 띄우고, 유효/무효 토큰이 섞인 요청을 remote/local 모드로 검증하여
+1,000 요청당 auth 서비스 호출 수와 평균 검증 시간을 비교합니다.
+
+실행: query 디렉터리에서 `python -m benchmarks.auth_bench --requests 1000 --invalid-ratio 0.1`
+"""
+import os
+import argparse
+import asyncio
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECRET_KEY = "benchmark-secret"
+
+class StubAuthHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calls = 0
+
+    def do_GET(self):
+        from jose import JWTError, jwt
+        StubAuthHandler.calls += 1
+        token = self.headers.get("Authorization", "").replace("Bearer ", "")
+        try:
+            jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            status, body = 200, b'{"detail": "Token is valid"}'
+        except JWTError:
+            status, body = 401, b'{"detail": "Could not validate credentials"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_auth() -> str:
+    """
+    임의 포트에서 스텁 auth 서비스를 실행하고 /verify URL을 반환합니다.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAuthHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/verify"
+
+async def run(mode: str, tokens: list):
+    from app.utils.token_verifier import TokenVerifier
+
+    verifier = TokenVerifier(mode=mode)
+    StubAuthHandler.calls = 0
+    started = time.perf_counter()
+    for token in tokens:
+        await verifier.verify(token)
+    elapsed = time.perf_counter() - started
+    per_1k = StubAuthHandler.calls / len(tokens) * 1000
+    print(f"{mode:<8} auth calls per 1k requests: {per_1k:7.1f}  "
+          f"negative cache hits: {verifier.negative_cache_hits:5d}  "
+          f"avg verify: {elapsed / len(tokens) * 1000:.3f} ms")
+    return per_1k
+
+async def main(total: int, invalid_ratio: float, users: int):
+    os.environ["AUTH_SERVICE_URL"] = start_stub_auth()
+    os.environ["SECRET_KEY"] = SECRET_KEY
+    from jose import jwt
+
+    valid_tokens = [jwt.encode({"sub": f"user{i}"}, SECRET_KEY, algorithm="HS256") for i in range(users)]
+    invalid_tokens = [jwt.encode({"sub": f"attacker{i}"}, "wrong-secret", algorithm="HS256") for i in range(users)]
+    tokens = [
+        random.choice(invalid_tokens) if random.random() < invalid_ratio else random.choice(valid_tokens)
+        for _ in range(total)
+    ]
+
+    remote = await run("remote", tokens)
+    local = await run("local", tokens)
+    print(f"auth service calls removed per 1k requests: {remote - local:.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.1)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.invalid_ratio, args.users))
@@ -0,0 +1,121 @@
+"""
+검색 방식별 recall@k와 추가 지연시간을 비교하는 오프라인 평가 도구.
+
+평가 세트(JSONL, 한 줄에 {"question": "...", "sources": ["정답 청크의 source", ...]})의 질문마다
+설정별 검색기를 실행하여, 상위 k개 안에 정답 source의 청크가 있는 비율(recall@k), MRR,
+질문당 검색 지연시간(p50/p95)과 첫 번째 설정 대비 추가 지연시간을 출력합니다.
+평가 세트가 없으면 --generate N으로 인덱스에서 청크를 뽑아 식별자(오류 코드, API 경로, 밑줄/숫자가 섞인 이름)를
+묻는 질문을 만들 수 있습니다. 실제 인덱스(REDIS_URL)와 임베딩 설정(EMBEDDING_*)이 필요합니다.
+
+실행: query 디렉터리에서
+`python -m benchmarks.retrieval_eval --index help --generate 200 --save help_eval.jsonl`
+`python -m benchmarks.retrieval_eval --index help --eval help_eval.jsonl --settings similarity,hybrid,hybrid+rerank`
+"""
+import os
+import re
+import json
+import time
+import random
+import argparse
+import statistics
+
+SETTINGS = {
+    "similarity": {"search_type": "similarity", "rerank": False},
+    "mmr": {"search_type": "mmr", "rerank": False},
+    "hybrid": {"search_type": "hybrid", "rerank": False},
+    "similarity+rerank": {"search_type": "similarity", "rerank": True},
+    "hybrid+rerank": {"search_type": "hybrid", "rerank": True},
+}
+
+# 임베딩만으로는 놓치기 쉬운 식별자: API 경로, 대문자 코드, 밑줄/숫자가 섞인 이름
+IDENTIFIER = re.compile(r"(/[\w\-{}]+(?:/[\w\-{}]+)+|\b[A-Z][A-Z0-9]*_[A-Z0-9_]+\b|\b[A-Za-z]+_\w+\b|\b[A-Za-z]+-?\d{2,}\b)")
+
+def generate_questions(vectorstore, count: int, seed: int) -> list:
+    """
+    인덱스의 청크를 무작위로 골라, 청크 안의 식별자를 묻는 질문과 그 청크의 source를 정답으로 만듭니다.
+    """
+    rng = random.Random(seed)
+    keys = list(vectorstore.client.scan_iter(match=f"{vectorstore.key_prefix}:*", count=1000))
+    rng.shuffle(keys)
+    content_key = vectorstore._schema.content_key
+    questions, seen = [], set()
+    for key in keys:
+        if len(questions) >= count:
+            break
+        content, source = vectorstore.client.hmget(key, [content_key, "source"])
+        if not content or not source:
+            continue
+        identifiers = [value for value in IDENTIFIER.findall(content.decode("utf-8", "ignore")) if value not in seen]
+        if not identifiers:
+            continue
+        identifier = rng.choice(identifiers)
+        seen.add(identifier)
+        questions.append({"question": f"What is {identifier} used for?", "sources": [source.decode("utf-8")]})
+    return questions
+
+def evaluate(retriever, questions: list, k: int, settings: dict) -> dict:
+    hits, reciprocal_ranks, latencies = 0, [], []
+    config = {"configurable": {"k": k, **settings}}
+    for item in questions:
+        started = time.perf_counter()
+        docs = retriever.invoke(item["question"], config=config)
+        latencies.append((time.perf_counter() - started) * 1000)
+        relevant = set(item["sources"])
+        rank = next((i for i, doc in enumerate(docs, start=1) if doc.metadata.get("source") in relevant), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    latencies.sort()
+    return {
+        "recall": hits / len(questions),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "mean_ms": statistics.mean(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=os.getenv("REDIS_INDEX_NAME", "default"))
+    parser.add_argument("--eval", help="평가 세트 JSONL 파일")
+    parser.add_argument("--generate", type=int, default=0, help="인덱스에서 식별자 질문 N개 생성")
+    parser.add_argument("--save", help="생성한 평가 세트를 저장할 JSONL 파일")
+    parser.add_argument("--settings", default="similarity,hybrid,hybrid+rerank")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from app.utils.config_llm import config_llm
+    from app.utils.index_schema import create_vectorstore
+    from app.utils.retrieval import create_retriever
+    from app.utils.rerank import reranker
+
+    config_llm.initialize_embedding_from_env()
+    vectorstore = create_vectorstore(os.getenv("REDIS_URL"), args.index, config_llm.get_embedding())
+    retriever = create_retriever(vectorstore, args.index)
+
+    if args.eval:
+        with open(args.eval) as f:
+            questions = [json.loads(line) for line in f if line.strip()]
+    else:
+        questions = generate_questions(vectorstore, args.generate or 100, args.seed)
+    if args.save:
+        with open(args.save, "w") as f:
+            f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in questions)
+    if not questions:
+        raise SystemExit("no evaluation questions")
+    print(f"index: {args.index}, questions: {len(questions)}, k={args.k}")
+
+    # 모든 질문의 임베딩을 미리 계산(임베딩 캐시)하고 재순위화 모델을 불러와, 첫 설정만 불리하지 않게 함
+    vectorstore.embeddings.embed_documents([item["question"] for item in questions])
+    reranker.load()
+    retriever.invoke(questions[0]["question"], config={"configurable": {"rerank": True}})
+
+    print(f"{'setting':>18} {'recall@k':>9} {'MRR':>6} {'p50 ms':>8} {'p95 ms':>8} {'added ms':>9}")
+    baseline = None
+    for name in args.settings.split(","):
+        result = evaluate(retriever, questions, args.k, SETTINGS[name])
+        baseline = result["mean_ms"] if baseline is None else baseline
+        print(f"{name:>18} {result['recall']:>9.3f} {result['mrr']:>6.3f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['mean_ms'] - baseline:>+9.2f}")
+
+if __name__ == "__main__":
+    main()
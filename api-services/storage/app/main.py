@@ -1,37 +1,45 @@
 import os
-import httpx
-import io
 import logging
 import json
+import asyncio
+import uuid
+import hashlib
+import itertools
+import tarfile
+import zipfile
 import requests
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Depends, Header
-from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request, Depends, Header, Query
+from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse, Response
 
-from langchain_core.document_loaders import BaseLoader
-from langchain_core.documents import Document
-from langchain_community.document_loaders import PyPDFLoader, CSVLoader, UnstructuredMarkdownLoader, JSONLoader, UnstructuredWordDocumentLoader, UnstructuredExcelLoader, UnstructuredPowerPointLoader
 from langchain_community.vectorstores import Redis
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.runnables import RunnableLambda
 from app.utils.config_llm import config_llm
-from app.utils.custom_loader import CustomDocumentLoader
+from app.utils.document_parser import SUPPORTED_EXTENSIONS, SEEKABLE_EXTENSIONS, load_stream, load_documents, split_documents
+from app.utils.parse_pool import parse_pool
+from app.utils.chunking import ChunkStats, chunker
+from app.utils.dedup import DEDUP_ENABLED, ChunkDeduplicator
+from app.utils.index_schema import create_vectorstore, ensure_metadata_fields, reduce_vectors
+from app.utils.stream_io import INGEST_STREAM_CHUNK_SIZE, spool_stream, spool_to_file
+from app.utils.storage_backend import create_storage_backend, guess_content_type
+from app.utils.ingest_pipeline import INGEST_PARSE_CONCURRENCY, IngestPipeline
+from app.utils.ingest_manifest import IngestManifest
+from app.utils.job_queue import create_job_queue
+from app.utils.http_range import RangeNotSatisfiable, parse_range, etag_matches
+from app.utils.listing_cache import listing_cache
+from app.utils.token_verifier import token_verifier
+from app.utils.archive import iter_archive
+from pydantic import BaseModel
+from typing import List
 from typing_extensions import Annotated
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
-AUTH_SERVICE_URL = "http://intelligenceapi-auth/verify"
-
-async def verify_token(x_token: Annotated[str | None, Header()] = None) -> None:
+async def verify_token(x_token: Annotated[str | None, Header()] = None, x_internal_auth: Annotated[str | None, Header()] = None) -> None:
     if not x_token:
         raise HTTPException(status_code=401, detail="X-Token header missing")
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(AUTH_SERVICE_URL, headers={"Authorization": f"Bearer {x_token}"})
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="X-Token header invalid")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+    if not await token_verifier.verify(x_token, x_internal_auth):
+        raise HTTPException(status_code=401, detail="X-Token header invalid")
 
 app = FastAPI(
     title="IntelligenceAPI Storage API",
@@ -43,97 +51,11 @@ app = FastAPI(
 # 환경 변수 설정
 STORAGE_PROVIDER = os.getenv("STORAGE_PROVIDER")
 
-if STORAGE_PROVIDER == "s3":
-    import boto3
-    from botocore.exceptions import NoCredentialsError
-
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        region_name=os.getenv("AWS_REGION")
-    )
-    BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
-
-    def list_files():
-        try:
-            response = s3_client.list_objects_v2(Bucket=BUCKET_NAME)
-            return [content['Key'] for content in response.get('Contents', [])]
-        except NoCredentialsError:
-            return []
-
-    def upload_file(file_obj, object_name):
-        try:
-            s3_client.upload_fileobj(file_obj, BUCKET_NAME, object_name)
-            return True
-        except NoCredentialsError:
-            return False
-
-    def download_file(object_name):
-        try:
-            file_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key=object_name)['Body']
-            return file_obj.read()
-        except NoCredentialsError:
-            return None
-
-    def delete_file(object_name):
-        try:
-            s3_client.delete_object(Bucket=BUCKET_NAME, Key=object_name)
-            return True
-        except NoCredentialsError:
-            return False
-
-elif STORAGE_PROVIDER == "azureblob":
-    from azure.storage.blob import BlobServiceClient
-
-    azure_blob_service_client = BlobServiceClient.from_connection_string(os.getenv("AZURE_CONNECTION_STRING"))
-    container_name = os.getenv("AZURE_CONTAINER_NAME")
-    account_name = os.getenv("AZURE_ACCOUNT_NAME")
-
-    def list_files():
-        try:
-            container_client = azure_blob_service_client.get_container_client(container_name)
-            return [blob.name for blob in container_client.list_blobs()]
-        except Exception as e:
-            return []
-
-    def upload_file(file_obj, blob_name):
-        try:
-            blob_client = azure_blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-            blob_client.upload_blob(file_obj, overwrite=True)
-            return True
-        except Exception as e:
-            return False
-
-    def download_file(blob_name):
-        try:
-            blob_client = azure_blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-            download_stream = blob_client.download_blob()
-            return download_stream.readall()
-        except Exception as e:
-            return None
-
-    def delete_file(blob_name):
-        try:
-            blob_client = azure_blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-            blob_client.delete_blob()
-            return True
-        except Exception as e:
-            return False
-
-else:
-    raise ValueError("Unsupported STORAGE_PROVIDER value. Use 's3' or 'azureblob'.")
+# 파일 저장소 (S3, Azure Blob, 로컬 파일시스템)
+storage = create_storage_backend(STORAGE_PROVIDER)
 
 @app.get("/dashboard")
 async def dashboard(request: Request):
-    files = list_files()
-    file_list_html = "".join(f"""
-        <tr>
-            <td>{file}</td>
-            <td><button onclick="downloadFile('{file}')">Download</button></td>
-            <td><button onclick="deleteFile('{file}')">Delete</button></td>
-        </tr>
-    """ for file in files)
     html_content = f"""
     <!DOCTYPE html>
     <html lang="en">
@@ -213,6 +135,8 @@ async def dashboard(request: Request):
             <button onclick="uploadFile()">Upload File</button>
             <button onclick="embedAllFiles()">Embed All Files to MongoDB</button>
             <h2>Uploaded Files</h2>
+            <input type="text" id="prefixInput" placeholder="Filter by prefix">
+            <button onclick="loadFiles(true)">Search</button>
             <table>
                 <thead>
                     <tr>
@@ -221,10 +145,10 @@ async def dashboard(request: Request):
                         <th>Delete</th>
                     </tr>
                 </thead>
-                <tbody>
-                    {file_list_html}
+                <tbody id="fileList">
                 </tbody>
             </table>
+            <button id="loadMore" style="display: none;" onclick="loadFiles(false)">Load More</button>
             <p id="message"></p>
         </div>
 
@@ -233,9 +157,63 @@ async def dashboard(request: Request):
                 const token = localStorage.getItem('token');
                 if (!token) {{
                     showTokenPopup();
+                }} else {{
+                    loadFiles(true);
                 }}
             }});
 
+            let nextCursor = null;
+
+            async function loadFiles(reset) {{
+                const token = localStorage.getItem('token');
+                if (!token) {{
+                    showTokenPopup();
+                    return;
+                }}
+
+                const params = new URLSearchParams({{
+                    prefix: document.getElementById('prefixInput').value,
+                    limit: '100'
+                }});
+                if (!reset && nextCursor) {{
+                    params.set('cursor', nextCursor);
+                }}
+
+                const response = await fetch(`/storage/files?${{params}}`, {{
+                    headers: {{
+                        'x-token': token
+                    }}
+                }});
+                const result = await response.json();
+                if (!response.ok) {{
+                    document.getElementById('message').textContent = result.detail;
+                    return;
+                }}
+
+                const fileList = document.getElementById('fileList');
+                if (reset) {{
+                    fileList.replaceChildren();
+                }}
+                for (const file of result.files) {{
+                    const row = document.createElement('tr');
+                    const name = document.createElement('td');
+                    name.textContent = file.name;
+                    row.appendChild(name);
+                    for (const [label, action] of [['Download', downloadFile], ['Delete', deleteFile]]) {{
+                        const cell = document.createElement('td');
+                        const button = document.createElement('button');
+                        button.textContent = label;
+                        button.onclick = () => action(file.name);
+                        cell.appendChild(button);
+                        row.appendChild(cell);
+                    }}
+                    fileList.appendChild(row);
+                }}
+
+                nextCursor = result.next_cursor;
+                document.getElementById('loadMore').style.display = nextCursor ? 'inline-block' : 'none';
+            }}
+
             function showTokenPopup() {{
                 document.getElementById('overlay').style.display = 'block';
                 document.getElementById('tokenPopup').style.display = 'block';
@@ -252,6 +230,7 @@ async def dashboard(request: Request):
                     localStorage.setItem('token', token);
                     hideTokenPopup();
                     document.getElementById('message').textContent = 'Token saved!';
+                    loadFiles(true);
                 }} else {{
                     document.getElementById('popupMessage').textContent = 'Token is required!';
                 }}
@@ -281,7 +260,7 @@ async def dashboard(request: Request):
                 const result = await response.json();
                 document.getElementById('message').textContent = result.message || result.detail;
                 if (response.ok) {{
-                    location.reload();
+                    loadFiles(true);
                 }}
             }}
 
@@ -334,7 +313,7 @@ async def dashboard(request: Request):
                 const result = await response.json();
                 document.getElementById('message').textContent = result.message || result.detail;
                 if (response.ok) {{
-                    location.reload();
+                    loadFiles(true);
                 }}
             }}
 
@@ -355,6 +334,29 @@ async def dashboard(request: Request):
 
                 const result = await response.json();
                 document.getElementById('message').textContent = result.message || result.detail;
+                if (result.job_id) {{
+                    pollJob(result.job_id, token);
+                }}
+            }}
+
+            async function pollJob(jobId, token) {{
+                const response = await fetch(`/storage/jobs/${{jobId}}`, {{
+                    headers: {{
+                        'x-token': token
+                    }}
+                }});
+                const job = await response.json();
+                if (!response.ok) {{
+                    document.getElementById('message').textContent = job.detail;
+                    return;
+                }}
+
+                const files = (job.progress && job.progress.files) || {{}};
+                document.getElementById('message').textContent =
+                    `Ingestion ${{job.status}}: ${{files.done || 0}} done, ${{files.failed || 0}} failed of ${{files.total || 0}} files`;
+                if (job.status === 'queued' || job.status === 'running') {{
+                    setTimeout(() => pollJob(jobId, token), 2000);
+                }}
             }}
         </script>
     </body>
@@ -363,120 +365,374 @@ async def dashboard(request: Request):
     return HTMLResponse(content=html_content)
 
 
+# 파일 목록 엔드포인트 (페이지 단위, 짧은 TTL 캐시)
+@app.get("/files", dependencies=[Depends(verify_token)])
+async def list_files_endpoint(prefix: str = "", cursor: str | None = None, limit: int = Query(100, ge=1, le=1000)):
+    key = (prefix, cursor, limit)
+    page = listing_cache.get(key)
+    if page is None:
+        page = await storage.list_files(prefix, cursor, limit)
+        listing_cache.set(key, page)
+    return page
+
 # 파일 업로드 엔드포인트
 @app.post("/upload/", dependencies=[Depends(verify_token)])
 async def upload_file_endpoint(file: UploadFile = File(...)):
-    if upload_file(file.file, file.filename):
-        return {"message": "File uploaded successfully"}
-    else:
+    try:
+        await storage.upload(file.file, file.filename)
+    except Exception as e:
+        logger.error(f"Error uploading {file.filename}: {str(e)}")
         raise HTTPException(status_code=400, detail="Failed to upload file")
+    listing_cache.invalidate()
+    return {"message": "File uploaded successfully"}
+
+# 여러 파일 또는 tar/zip 아카이브 일괄 업로드 엔드포인트
+@app.post("/upload/batch", dependencies=[Depends(verify_token)])
+async def upload_batch_endpoint(
+    files: List[UploadFile] = File(default=[]),
+    archive: UploadFile | None = File(default=None),
+    prefix: str = Form(""),
+    ingest: bool = Form(False),
+):
+    if not files and archive is None:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    items = [(prefix + file.filename, file.file) for file in files]
+    try:
+        if archive is not None:
+            # 아카이브는 서버에서 풀어 항목별로 업로드
+            items = itertools.chain(items, await asyncio.to_thread(iter_archive, archive.file, prefix))
+        result = await storage.upload_many(items)
+    except (ValueError, tarfile.TarError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
+    finally:
+        listing_cache.invalidate()
+
+    if ingest and result["uploaded"]:
+        # 업로드된 파일만 바로 수집
+        job = await asyncio.to_thread(job_queue.submit, "embed_files", {"files": result["uploaded"]})
+        result["job_id"] = job["id"]
+    return result
+
+# 파일 다운로드 엔드포인트 (Range, If-None-Match 지원)
+@app.get("/download/{filename:path}", dependencies=[Depends(verify_token)])
+async def download_file_endpoint(filename: str, request: Request):
+    info = await storage.get_info(filename)
+    if info is None:
+        raise HTTPException(status_code=404, detail="File not found")
 
-# 파일 다운로드 엔드포인트
-@app.get("/download/{filename}", dependencies=[Depends(verify_token)])
-async def download_file_endpoint(filename: str):
-    file_content = download_file(filename)
-    if file_content:
-        return StreamingResponse(io.BytesIO(file_content), media_type="application/octet-stream")
+    size, etag = info["size"], info["etag"]
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # If-Range가 현재 ETag와 다르면 파일이 바뀐 것이므로 전체를 보냄
+    if not if_range or etag_matches(if_range, etag):
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range:
+        start, end = byte_range
+        stream = await storage.open(filename, start, end)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        status_code = 206
     else:
-        raise HTTPException(status_code=404, detail="File not found")
+        stream = await storage.open(filename)
+        headers["Content-Length"] = str(size)
+        status_code = 200
+
+    def iter_body():
+        # 청크 단위로 읽어 전달하므로 파일 크기와 관계없이 메모리 사용량이 일정함
+        with stream:
+            while chunk := stream.read(INGEST_STREAM_CHUNK_SIZE):
+                yield chunk
+
+    media_type = info["content_type"] or guess_content_type(filename)
+    return StreamingResponse(iter_body(), status_code=status_code, media_type=media_type, headers=headers)
 
 # 파일 삭제 엔드포인트
-@app.delete("/delete/{filename}", dependencies=[Depends(verify_token)])
+@app.delete("/delete/{filename:path}", dependencies=[Depends(verify_token)])
 async def delete_file_endpoint(filename: str):
-    if delete_file(filename):
+    try:
+        deleted = await storage.delete(filename)
+    except Exception as e:
+        logger.error(f"Error deleting {filename}: {str(e)}")
+        deleted = False
+    if deleted:
+        listing_cache.invalidate()
+        # 삭제된 파일의 벡터도 인덱스에서 제거
+        await asyncio.to_thread(remove_vectors, [filename])
         return {"message": "File deleted successfully"}
     else:
         raise HTTPException(status_code=400, detail="Failed to delete file")
 
+class BatchDeleteRequest(BaseModel):
+    files: List[str]
+
+def remove_vectors(files: List[str]):
+    for filename in files:
+        try:
+            get_manifest(INDEX_NAME).remove(filename)
+        except Exception as e:
+            logger.error(f"Error removing vectors for {filename}: {str(e)}")
+
+# 일괄 삭제 엔드포인트 (S3 delete_objects, Azure Blob Batch)
+@app.post("/delete/batch", dependencies=[Depends(verify_token)])
+async def delete_batch_endpoint(request: BatchDeleteRequest):
+    result = await storage.delete_many(request.files)
+    listing_cache.invalidate()
+    # 삭제된 파일의 벡터도 인덱스에서 제거
+    await asyncio.to_thread(remove_vectors, result["deleted"])
+    return result
+
 # Redis 임베딩 설정
 REDIS_URL = os.getenv("REDIS_URL")
 INDEX_NAME = os.getenv("REDIS_INDEX_NAME", "default")
 OPENAPI_INDEX_NAME = "help"
-INDEX_SCHEMA = {
-    "text_embedding": "VECTOR",
-    "metadata": "JSON",
-}
 
 config_llm.initialize_llm_from_env()
 config_llm.initialize_embedding_from_env()
 embedding = config_llm.get_embedding()
 
+# 인덱스별 Redis 벡터스토어 및 수집 매니페스트 (연결 재사용)
+vectorstores = {}
+manifests = {}
+
+# 마지막으로 실행된 수집 파이프라인 (진행 상황 조회용)
+current_pipeline = None
+
+# 백그라운드 수집 작업 큐 및 진행 상황 보고 주기(초)
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", 2))
+job_queue = create_job_queue(REDIS_URL)
+
+def get_vectorstore(index_name: str = INDEX_NAME) -> Redis:
+    if index_name not in vectorstores:
+        # 인덱스 알고리즘/데이터 형식/차원 축소는 INDEX_SCHEMA_CONFIG로 설정 (query 서비스와 동일해야 함)
+        vectorstore = create_vectorstore(REDIS_URL, index_name, embedding)
+        # 질의 서비스의 source 필터를 위해 기존 인덱스에도 메타데이터 필드를 추가
+        try:
+            ensure_metadata_fields(vectorstore)
+        except Exception as e:
+            logger.error(f"Failed to add metadata fields to index {index_name}: {str(e)}")
+        vectorstores[index_name] = vectorstore
+    return vectorstores[index_name]
+
+def get_manifest(index_name: str = INDEX_NAME) -> IngestManifest:
+    if index_name not in manifests:
+        manifests[index_name] = IngestManifest(REDIS_URL, index_name)
+    return manifests[index_name]
+
+def write_to_vectorstore(texts: list, metadatas: list, vectors: list, keys: list = None, index_name: str = INDEX_NAME) -> list:
+    # 미리 계산된 임베딩과 함께 Redis에 문서 삽입 (인덱스가 없으면 생성, keys가 없으면 키를 새로 만듦)
+    # 임베딩 캐시에는 원래 차원으로 남기고, 인덱스에는 인덱스 차원으로 축소한 벡터를 저장
+    vectorstore = get_vectorstore(index_name)
+    return vectorstore.add_texts(texts, metadatas, embeddings=reduce_vectors(vectorstore, vectors), keys=keys)
+
 def _ingest(file_path: str, index_name: str = INDEX_NAME) -> dict:
-    # 파일 타입에 맞는 로더 선택
-    if file_path.endswith('.pdf'):
-        loader = PyPDFLoader(file_path)
-    elif file_path.endswith('.csv'):
-        loader = CSVLoader(file_path)
-    elif file_path.endswith('.md'):
-        loader = UnstructuredMarkdownLoader(file_path)
-    elif file_path.endswith('.json'):
-        loader = JSONLoader(file_path, jq_schema='.', text_content=False)
-    elif file_path.endswith('.txt'):
-        loader = CustomDocumentLoader(file_path)
-    elif file_path.endswith('.docx'):
-        loader = UnstructuredWordDocumentLoader(file_path)
-    elif file_path.endswith('.xlsx'):
-        loader = UnstructuredExcelLoader(file_path, mode="elements")
-    elif file_path.endswith('.pptx'):
-        loader = UnstructuredPowerPointLoader(file_path)
-    else:
-        raise ValueError("Unsupported file type")
-
-    data = loader.load()
-
-    # 문서 분할
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=100, add_start_index=True)
-    docs = text_splitter.split_documents(data)
-
-    # Redis에 문서 삽입
-    _ = Redis.from_texts(
-        texts=[doc.page_content for doc in docs],
-        metadatas=[doc.metadata for doc in docs],
-        embedding=embedding,
-        index_name=index_name,
-        index_schema=INDEX_SCHEMA,
-        redis_url=REDIS_URL,
-    )
-    return {}
+    docs = list(split_documents(load_documents(file_path), file_path, index_name))
+    report = None
+    if DEDUP_ENABLED:
+        # 같은 스키마 블록이 반복되는 문서(OpenAPI 명세 등)의 중복 청크 제거
+        deduplicator = ChunkDeduplicator()
+        docs = [doc for doc in docs if not deduplicator.is_duplicate(doc.page_content)]
+        report = deduplicator.report()
+    if not docs:
+        return {"chunk_ids": [], "dedup": report}
+
+    texts = [doc.page_content for doc in docs]
+    chunk_ids = write_to_vectorstore(texts, [doc.metadata for doc in docs], embedding.embed_documents(texts), index_name=index_name)
+    return {"chunk_ids": chunk_ids, "dedup": report}
 
 ingest = RunnableLambda(_ingest)
 
-def _ingest_all_files():
-    if STORAGE_PROVIDER == "s3":
-        files = list_files()
-        for file in files:
-            file_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key=file)['Body']
-            file_content = file_obj.read()
-            file_path = f"/tmp/{file}"
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
-            _ingest(file_path)
-    elif STORAGE_PROVIDER == "azureblob":
-        files = list_files()
-        for file in files:
-            blob_client = azure_blob_service_client.get_blob_client(container=container_name, blob=file)
-            download_stream = blob_client.download_blob()
-            file_content = download_stream.readall()
-            file_path = f"/tmp/{file}"
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
-            _ingest(file_path)
+async def _ingest_all_files(on_progress=None, keys=None):
+    global current_pipeline
+
+    manifest = get_manifest(INDEX_NAME)
+    if keys is None:
+        versions = await storage.list_versions()
     else:
-        raise ValueError("Unsupported STORAGE_PROVIDER value.")
+        # 지정된 파일만 수집하고, 목록에 없는 파일은 삭제 대상으로 보지 않음
+        infos = await asyncio.gather(*(storage.get_info(key) for key in keys))
+        versions = {key: info["etag"] for key, info in zip(keys, infos) if info}
+    # 지원하지 않는 형식은 매니페스트에 기록되지 않으므로 계획에서 빼야 매 실행마다 새 파일로 다시 시도하지 않음
+    unsupported = [file for file in versions if not file.endswith(SUPPORTED_EXTENSIONS)]
+    for file in unsupported:
+        del versions[file]
+    plan = manifest.plan(versions)
+    if keys is not None:
+        plan["deleted"] = []
+    plan["unsupported"] = unsupported
+
+    # 저장소에서 삭제된 파일의 벡터 제거
+    for file in plan["deleted"]:
+        manifest.remove(file)
+
+    files = plan["new"] + plan["changed"]
+
+    def download(file):
+        if not file.endswith(SUPPORTED_EXTENSIONS):
+            raise ValueError("Unsupported file type")
+        # 탐색이 필요한 형식만 임시 파일로 받아 두고, 나머지는 파싱 단계에서 객체 스트림을 바로 읽음
+        if not file.endswith(SEEKABLE_EXTENSIONS):
+            return None
+        if parse_pool.enabled:
+            # 프로세스 풀 워커가 읽을 수 있도록 디스크에 저장
+            return spool_to_file(storage.call(storage.open_object, file), suffix=os.path.splitext(file)[1])
+        return spool_stream(storage.call(storage.open_object, file))
+
+    chunk_stats = ChunkStats()
+    # 이번 실행에서 이미 저장한 청크와 같거나 비슷한 청크는 임베딩/저장하지 않고, 원본 청크를 그 파일의 청크로도 기록
+    deduplicator = ChunkDeduplicator() if DEDUP_ENABLED else None
+    # 파일별로 참조하는 다른 파일의 청크 키, 그리고 그런 파일 중 처리가 끝나 매니페스트 기록을 기다리는 파일의 청크 키
+    shared_ids = {}
+    deferred = {}
+    key_prefix = get_vectorstore(INDEX_NAME).key_prefix if deduplicator else None
+
+    def is_duplicate(doc):
+        file = doc.metadata.get("source")
+        # 저장할 청크의 키를 미리 정해 두어야 다른 파일의 중복 청크가 저장 전에도 그 키를 참조할 수 있음
+        doc.id = f"{key_prefix}:{uuid.uuid4().hex}"
+        original = deduplicator.find(doc.page_content, file, ref=(file, doc.id))
+        if original is None:
+            return False
+        if original[0] != file:
+            shared_ids.setdefault(file, set()).add(original[1])
+        return True
+
+    def run_report():
+        return {"chunks": chunk_stats.to_dict(), "dedup": deduplicator.report() if deduplicator else None}
+
+    def parse_chunks(file, source):
+        if isinstance(source, str):
+            # 무거운 형식은 프로세스 풀에서 파싱
+            try:
+                yield from parse_pool.parse(file, source, INDEX_NAME)
+            finally:
+                os.remove(source)
+            return
+        for doc in split_documents(load_stream(file, source or storage.call(storage.open_object, file)), file, INDEX_NAME):
+            doc.metadata["source"] = file
+            yield doc
+
+    def parse(file, source):
+        for doc in parse_chunks(file, source):
+            chunk_stats.record(file, chunker.count_tokens(doc.page_content))
+            yield doc
+
+    def on_file_done(file, chunk_ids, error):
+        if error:
+            # 일부만 저장된 청크는 제거하고 기존 매니페스트(이전 버전 벡터)는 유지
+            manifest.delete_vectors(chunk_ids)
+        elif file in shared_ids:
+            # 참조한 청크를 저장하는 파일이 아직 처리 중이거나 실패할 수 있으므로 실행이 끝난 뒤 기록
+            deferred[file] = chunk_ids
+        else:
+            manifest.replace(file, versions[file], chunk_ids)
+
+    def finalize_shared() -> dict:
+        """
+        다른 파일의 청크를 참조하는 파일을 자기 청크와 참조한 청크로 매니페스트에 기록합니다.
+        참조한 청크가 저장되지 않았으면(원본 파일 실패) 그 파일도 실패로 처리하여 다음 실행에서 다시 수집되게 하고,
+        그 파일의 청크를 참조한 다른 파일도 다시 확인합니다. 실패한 파일과 오류 메시지를 반환합니다.
+        """
+        failed = {}
+        while True:
+            missing = [file for file in deferred if not manifest.chunks_exist(list(shared_ids[file]))]
+            if not missing:
+                break
+            for file in missing:
+                manifest.delete_vectors(deferred.pop(file))
+                failed[file] = "finalize: a chunk this file shares with another file was not stored"
+        for file, chunk_ids in deferred.items():
+            try:
+                manifest.replace(file, versions[file], chunk_ids + sorted(shared_ids[file]))
+            except Exception as e:
+                logger.error(f"Failed to finalize {file}: {str(e)}")
+                failed[file] = f"finalize: {str(e)}"
+        return failed
+
+    pipeline = current_pipeline = IngestPipeline(
+        download,
+        parse,
+        embedding.embed_documents,
+        write_to_vectorstore,
+        on_file_done=on_file_done,
+        is_duplicate=is_duplicate if deduplicator else None,
+        parse_concurrency=max(INGEST_PARSE_CONCURRENCY, parse_pool.workers),
+    )
 
-    return {"message": "All files ingested successfully"}
+    async def report_progress():
+        while True:
+            await asyncio.sleep(JOB_PROGRESS_INTERVAL)
+            await asyncio.to_thread(on_progress, {**pipeline.progress(), **run_report()})
 
-@app.post("/embed_all/", dependencies=[Depends(verify_token)])
+    reporter = asyncio.create_task(report_progress()) if on_progress else None
+    try:
+        await pipeline.run(files)
+        for file, error in (await asyncio.to_thread(finalize_shared)).items():
+            pipeline.fail_file(file, error)
+    finally:
+        if reporter:
+            reporter.cancel()
+
+    progress = pipeline.progress()
+    progress.update(run_report())
+    message = "Ingestion completed with errors" if progress["errors"] else "All files ingested successfully"
+    summary = {name: len(files) for name, files in plan.items()}
+    if on_progress:
+        on_progress(progress)
+    return {"message": message, "plan": summary, **progress}
+
+def run_embed_all_job(job: dict, report) -> dict:
+    # 워커 스레드에서 별도 이벤트 루프로 전체 수집 실행 (같은 인덱스의 다른 수집이 끝날 때까지 대기)
+    with get_manifest(INDEX_NAME).lock():
+        return asyncio.run(_ingest_all_files(on_progress=report))
+
+def run_embed_files_job(job: dict, report) -> dict:
+    # 배치 업로드된 파일만 수집
+    with get_manifest(INDEX_NAME).lock():
+        return asyncio.run(_ingest_all_files(on_progress=report, keys=job["params"]["files"]))
+
+job_queue.register("embed_all", run_embed_all_job)
+job_queue.register("embed_files", run_embed_files_job)
+
+@app.post("/embed_all/", status_code=202, dependencies=[Depends(verify_token)])
 async def embed_all_files():
     try:
-        result = _ingest_all_files()
-        return result
+        job = await asyncio.to_thread(job_queue.submit, "embed_all")
+        return {"message": "Ingestion job queued", "job_id": job["id"], "status": job["status"]}
     except Exception as e:
-        logger.error(f"Error embedding all files: {str(e)}")
+        logger.error(f"Error queueing ingestion job: {str(e)}")
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+@app.get("/jobs/{job_id}", dependencies=[Depends(verify_token)])
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/embed_all/progress", dependencies=[Depends(verify_token)])
+async def embed_all_progress():
+    if current_pipeline is None:
+        raise HTTPException(status_code=404, detail="No ingestion has been run yet")
+    return current_pipeline.progress()
+
+@app.get("/embedding_cache/stats", dependencies=[Depends(verify_token)])
+async def embedding_cache_stats():
+    if not hasattr(embedding, "stats"):
+        raise HTTPException(status_code=404, detail="Embedding cache is disabled")
+    return embedding.stats()
+
 @app.on_event("startup")
 async def startup_event():
+    job_queue.start()
     try:
         response = requests.get("http://intelligenceapi-gatewayapi/openapi.json")
         if response.status_code != 200:
@@ -487,10 +743,24 @@ async def startup_event():
         with open(file_path, 'w') as f:
             json.dump(openapi_data, f)
 
-        _ingest(file_path, index_name=OPENAPI_INDEX_NAME)
+        # 내용이 바뀐 경우에만 다시 수집하고 이전 청크 제거
+        content_hash = hashlib.sha256(json.dumps(openapi_data, sort_keys=True).encode()).hexdigest()
+        manifest = get_manifest(OPENAPI_INDEX_NAME)
+        # 여러 레플리카가 동시에 시작해도 한 번만 수집
+        with manifest.lock():
+            entry = manifest.get("openapi.json")
+            if entry is None or entry["etag"] != content_hash:
+                result = _ingest(file_path, index_name=OPENAPI_INDEX_NAME)
+                manifest.replace("openapi.json", content_hash, result["chunk_ids"])
     except Exception as e:
         logger.error(f"Error ingesting OpenAPI JSON on startup: {str(e)}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    job_queue.stop()
+    parse_pool.shutdown()
+    storage.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="localhost", port=8000)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import os
+import tarfile
+import zipfile
+from typing import IO, Iterator, Optional, Tuple
+from app.utils.stream_io import spool_stream
+
+# 아카이브 하나에서 풀어낼 수 있는 최대 파일 수, 항목별로 메모리에 둘 최대 크기
+ARCHIVE_MAX_FILES = int(os.getenv("ARCHIVE_MAX_FILES", 10000))
+ARCHIVE_SPOOL_MAX_MEMORY = int(os.getenv("ARCHIVE_SPOOL_MAX_MEMORY", 8 * 1024 * 1024))
+
+def safe_object_name(name: str) -> Optional[str]:
+    """
+    아카이브 항목 이름을 객체 키로 정규화합니다. 상위 경로(..)나 빈 이름은 None을 반환합니다.
+    """
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts or parts[0] == "__MACOSX":
+        return None
+    return "/".join(parts)
+
+def iter_archive(file_obj: IO[bytes], prefix: str = "", max_files: int = ARCHIVE_MAX_FILES) -> Iterator[Tuple[str, IO[bytes]]]:
+    """
+    zip 또는 tar(압축 포함) 아카이브를 열고, 일반 파일 항목을 (객체 키, 파일 객체)로 하나씩 내놓는 제너레이터를 반환합니다.
+    아카이브를 열 수 없으면 즉시 예외를 발생시킵니다. 각 항목은 임시 파일로 복사되어 호출자가 닫아야 합니다.
+    """
+    file_obj.seek(0)
+    if zipfile.is_zipfile(file_obj):
+        file_obj.seek(0)
+        archive = zipfile.ZipFile(file_obj)
+        members = ((info.filename, lambda info=info: archive.open(info)) for info in archive.infolist() if not info.is_dir())
+    else:
+        file_obj.seek(0)
+        archive = tarfile.open(fileobj=file_obj, mode="r:*")
+        members = ((member.name, lambda member=member: archive.extractfile(member)) for member in archive if member.isfile())
+    return _spool_members(archive, members, prefix, max_files)
+
+def _spool_members(archive, members, prefix: str, max_files: int):
+    with archive:
+        count = 0
+        for name, open_member in members:
+            object_name = safe_object_name(name)
+            if object_name is None:
+                continue
+            count += 1
+            if count > max_files:
+                raise ValueError(f"Archive contains more than {max_files} files")
+            yield prefix + object_name, spool_stream(open_member(), max_memory=ARCHIVE_SPOOL_MAX_MEMORY)
@@ -0,0 +1,158 @@
+import os
+import json
+import logging
+import threading
+from typing import Callable, Iterable, Iterator, Optional
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+# 청크 설정 (JSON 문자열 또는 JSON 파일 경로). 예:
+# {"default": {"chunk_size": 512, "chunk_overlap": 50},
+#  "extensions": {".csv": {"chunk_size": 256}},
+#  "indexes": {"help": {"default": {"chunk_size": 1024}, "extensions": {".json": {"chunk_size": 2048}}}}}
+# 적용 순서: 인덱스+확장자 > 인덱스 기본값 > 확장자 > 기본값
+CHUNKING_CONFIG = os.getenv("CHUNKING_CONFIG", "")
+
+DEFAULT_CHUNKING = {
+    "default": {"chunk_size": 512, "chunk_overlap": 50, "unit": "tokens", "merge_small": False},
+    # 한 줄/한 행 단위 문서는 청크 크기만큼 합친 뒤 분할
+    "extensions": {
+        ".txt": {"merge_small": True},
+        ".csv": {"merge_small": True},
+        ".xlsx": {"merge_small": True},
+    },
+    "indexes": {},
+}
+
+# 청크 크기 히스토그램 구간 (토큰 수 상한)
+HISTOGRAM_BUCKETS = (64, 128, 256, 512, 1024, 2048)
+
+def load_chunking_config(value: str = CHUNKING_CONFIG) -> dict:
+    config = json.loads(json.dumps(DEFAULT_CHUNKING))
+    if not value:
+        return config
+    if os.path.isfile(value):
+        with open(value) as f:
+            custom = json.load(f)
+    else:
+        custom = json.loads(value)
+    config["default"].update(custom.get("default", {}))
+    for ext, settings in custom.get("extensions", {}).items():
+        config["extensions"].setdefault(ext, {}).update(settings)
+    config["indexes"].update(custom.get("indexes", {}))
+    return config
+
+def token_counter(model: Optional[str]) -> Callable[[str], int]:
+    """
+    임베딩 모델의 토크나이저로 토큰 수를 세는 함수를 반환합니다.
+    tiktoken을 쓸 수 없으면 글자 수 기반 근사치(4글자당 1토큰)를 사용합니다.
+    """
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable for {model}, approximating tokens by length: {str(e)}")
+        return lambda text: (len(text) + 3) // 4
+
+class ChunkStats:
+    """
+    파일 형식별 청크 수, 평균 토큰 수, 토큰 수 히스토그램을 집계합니다.
+    """
+
+    def __init__(self, buckets: tuple = HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.labels = [f"<={bucket}" for bucket in buckets] + [f">{buckets[-1]}"]
+        self.by_type = {}
+        self.lock = threading.Lock()
+
+    def record(self, name: str, tokens: int):
+        ext = os.path.splitext(name)[1].lower() or "(none)"
+        label = next((self.labels[i] for i, bucket in enumerate(self.buckets) if tokens <= bucket), self.labels[-1])
+        with self.lock:
+            stats = self.by_type.setdefault(ext, {"chunks": 0, "tokens": 0, "histogram": dict.fromkeys(self.labels, 0)})
+            stats["chunks"] += 1
+            stats["tokens"] += tokens
+            stats["histogram"][label] += 1
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                ext: {**stats, "histogram": dict(stats["histogram"]), "avg_tokens": round(stats["tokens"] / stats["chunks"], 1)}
+                for ext, stats in self.by_type.items()
+            }
+
+class Chunker:
+    """
+    파일 형식과 인덱스별 설정에 따라 문서를 합치고 분할하는 청크 엔진.
+    """
+
+    def __init__(self, config: dict = None, model: Optional[str] = None):
+        self.config = config or load_chunking_config()
+        self.count_tokens = token_counter(model)
+        self.splitters = {}
+
+    def settings(self, name: str, index_name: Optional[str] = None) -> dict:
+        ext = os.path.splitext(name)[1].lower()
+        index = self.config["indexes"].get(index_name, {}) if index_name else {}
+        return {
+            **self.config["default"],
+            **self.config["extensions"].get(ext, {}),
+            **index.get("default", {}),
+            **index.get("extensions", {}).get(ext, {}),
+        }
+
+    def _length_function(self, settings: dict) -> Callable[[str], int]:
+        return self.count_tokens if settings["unit"] == "tokens" else len
+
+    def _splitter(self, settings: dict) -> RecursiveCharacterTextSplitter:
+        key = (settings["chunk_size"], settings["chunk_overlap"], settings["unit"])
+        if key not in self.splitters:
+            self.splitters[key] = RecursiveCharacterTextSplitter(
+                chunk_size=settings["chunk_size"],
+                # 겹침이 청크 크기를 넘으면 분할기가 동작하지 않으므로 절반으로 제한
+                chunk_overlap=min(settings["chunk_overlap"], settings["chunk_size"] // 2),
+                length_function=self._length_function(settings),
+                add_start_index=True,
+            )
+        return self.splitters[key]
+
+    def _merge(self, docs: Iterable[Document], max_size: int, length: Callable[[str], int]) -> Iterator[Document]:
+        # 같은 출처의 연속된 작은 문서를 max_size까지 합침 (빈 문서는 버림)
+        buffer, size = [], 0
+        for doc in docs:
+            if not doc.page_content.strip():
+                continue
+            doc_size = length(doc.page_content)
+            if buffer and (size + doc_size > max_size or doc.metadata.get("source") != buffer[0].metadata.get("source")):
+                yield self._merged(buffer)
+                buffer, size = [], 0
+            buffer.append(doc)
+            size += doc_size + 1
+        if buffer:
+            yield self._merged(buffer)
+
+    @staticmethod
+    def _merged(docs: list) -> Document:
+        if len(docs) == 1:
+            return docs[0]
+        return Document(page_content="\n".join(doc.page_content for doc in docs), metadata=dict(docs[0].metadata))
+
+    def split(self, docs: Iterable[Document], name: str, index_name: Optional[str] = None) -> Iterator[Document]:
+        """
+        문서를 하나씩 분할하여 큰 파일도 전체를 메모리에 올리지 않습니다.
+        """
+        settings = self.settings(name, index_name)
+        splitter = self._splitter(settings)
+        if settings["merge_small"]:
+            docs = self._merge(docs, settings["chunk_size"], self._length_function(settings))
+        for doc in docs:
+            yield from splitter.split_documents([doc])
+
+chunker = Chunker(model=os.getenv("EMBEDDING_MODEL"))
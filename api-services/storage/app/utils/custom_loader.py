@@ -1,21 +1,50 @@
-from typing import AsyncIterator, Iterator
+import io
+import csv
+import json
+import os
+from typing import IO, AsyncIterator, Iterator, Optional
 from langchain_core.document_loaders import BaseLoader
 from langchain_core.documents import Document
 
+# 마크다운 스트리밍 시 한 Document에 담을 최대 글자 수
+MARKDOWN_SECTION_SIZE = int(os.getenv("INGEST_MARKDOWN_SECTION_SIZE", 64 * 1024))
+
+def _text_stream(file: IO[bytes]) -> IO[str]:
+    return io.TextIOWrapper(file, encoding="utf-8", errors="replace", newline="")
+
+class StreamLoader(BaseLoader):
+    """바이너리 스트림에서 바로 문서를 읽어들이는 로더의 기본 클래스"""
+
+    def __init__(self, file: IO[bytes], source: str) -> None:
+        """스트림과 출처를 초기화합니다.
+
+        Args:
+            file: 읽어들일 바이너리 스트림.
+            source: 문서 메타데이터에 기록할 출처(객체 키 또는 파일 경로).
+        """
+        self.file = file
+        self.source = source
+
 class CustomDocumentLoader(BaseLoader):
     """텍스트 파일을 한 줄씩 읽어들이는 커스텀 로더"""
 
-    def __init__(self, file_path: str) -> None:
+    def __init__(self, file_path: str, file: Optional[IO[bytes]] = None) -> None:
         """파일 경로를 초기화합니다.
 
         Args:
-            file_path: 로드할 파일의 경로.
+            file_path: 로드할 파일의 경로 (스트림을 함께 주면 출처로만 사용).
+            file: 파일 대신 읽어들일 바이너리 스트림.
         """
         self.file_path = file_path
+        self.file = file
 
     def lazy_load(self) -> Iterator[Document]:
         """파일을 한 줄씩 읽어들이는 제너레이터"""
-        with open(self.file_path, encoding="utf-8") as f:
+        if self.file is not None:
+            f = _text_stream(self.file)
+        else:
+            f = open(self.file_path, encoding="utf-8")
+        with f:
             line_number = 0
             for line in f:
                 yield Document(
@@ -36,3 +65,52 @@ class CustomDocumentLoader(BaseLoader):
                     metadata={"line_number": line_number, "source": self.file_path},
                 )
                 line_number += 1
+
+
+class StreamCSVLoader(StreamLoader):
+    """CSV 스트림을 한 행씩 Document로 읽어들이는 로더 (CSVLoader와 같은 형식)"""
+
+    def lazy_load(self) -> Iterator[Document]:
+        with _text_stream(self.file) as f:
+            for row_number, row in enumerate(csv.DictReader(f)):
+                content = "\n".join(
+                    f"{(key or '').strip()}: {value.strip() if isinstance(value, str) else ','.join(value or [])}"
+                    for key, value in row.items()
+                )
+                yield Document(page_content=content, metadata={"source": self.source, "row": row_number})
+
+class StreamMarkdownLoader(StreamLoader):
+    """마크다운 스트림을 제목 또는 MARKDOWN_SECTION_SIZE 단위의 구역으로 나누어 읽어들이는 로더"""
+
+    def lazy_load(self) -> Iterator[Document]:
+        with _text_stream(self.file) as f:
+            section = []
+            size = 0
+            for line in f:
+                if section and (line.startswith("#") or size + len(line) > MARKDOWN_SECTION_SIZE):
+                    yield Document(page_content="".join(section).strip(), metadata={"source": self.source})
+                    section = []
+                    size = 0
+                section.append(line)
+                size += len(line)
+            if section:
+                yield Document(page_content="".join(section).strip(), metadata={"source": self.source})
+
+class StreamJSONLoader(StreamLoader):
+    """JSON 스트림 전체를 하나의 Document로 읽어들이는 로더 (JSONLoader jq_schema='.'와 같은 형식)"""
+
+    def lazy_load(self) -> Iterator[Document]:
+        with _text_stream(self.file) as f:
+            content = json.load(f)
+        yield Document(page_content=json.dumps(content) if content else "", metadata={"source": self.source, "seq_num": 1})
+
+class StreamPDFLoader(StreamLoader):
+    """탐색 가능한 PDF 스트림을 페이지 단위로 읽어들이는 로더 (PyPDFLoader와 같은 형식)"""
+
+    def lazy_load(self) -> Iterator[Document]:
+        import pypdf
+
+        with self.file:
+            reader = pypdf.PdfReader(self.file)
+            for page_number, page in enumerate(reader.pages):
+                yield Document(page_content=page.extract_text(), metadata={"source": self.source, "page": page_number})
@@ -0,0 +1,113 @@
+import os
+import re
+import hashlib
+import threading
+from typing import Any, Optional
+
+# 중복 청크 제거 설정
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_NEAR_DUPLICATES = os.getenv("DEDUP_NEAR_DUPLICATES", "true").lower() == "true"
+# SimHash 해밍 거리가 이 값 이하이면 유사 중복으로 판단 (512토큰 안팎 청크에서 몇 단어 차이는 3~8, 무관한 청크는 20 이상)
+DEDUP_SIMHASH_DISTANCE = int(os.getenv("DEDUP_SIMHASH_DISTANCE", 6))
+# 단어 수가 이보다 적은 청크는 SimHash가 불안정하므로 완전 중복만 검사
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", 8))
+
+_WORD = re.compile(r"\w+")
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def simhash(words: list, shingle_size: int = 3) -> int:
+    """
+    단어 shingle로 64비트 SimHash 지문을 계산합니다.
+    """
+    weights = [0] * 64
+    for i in range(max(1, len(words) - shingle_size + 1)):
+        shingle = " ".join(words[i:i + shingle_size]).encode()
+        value = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+class ChunkDeduplicator:
+    """
+    한 번의 수집 실행 안에서 완전 중복(정규화한 텍스트 해시)과 유사 중복(SimHash)을 걸러냅니다.
+    처음 본 청크를 등록할 때 ref(청크 키 등)를 함께 주면, 중복 청크는 그 ref를 돌려받아 원본 청크를 참조할 수 있습니다.
+    유사 중복은 지문을 (거리 + 1)개 구간으로 나눈 LSH 색인으로 찾으므로, 거리 이내의 지문은
+    적어도 한 구간이 일치한다는 점(비둘기집 원리)을 이용해 전체를 비교하지 않습니다.
+    """
+
+    def __init__(self, near_duplicates: bool = DEDUP_NEAR_DUPLICATES, max_distance: int = DEDUP_SIMHASH_DISTANCE, min_words: int = DEDUP_MIN_WORDS):
+        self.near_duplicates = near_duplicates
+        self.max_distance = max_distance
+        self.min_words = min_words
+        bands = max_distance + 1
+        self.band_bits = 64 // bands
+        self.bands = bands
+        self.exact = {}
+        self.buckets = {}
+        self.counts = {"checked": 0, "exact": 0, "near": 0}
+        self.dropped_by_file = {}
+        self.lock = threading.Lock()
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def _near_match(self, fingerprint: int):
+        for key in self._band_keys(fingerprint):
+            for other, ref in self.buckets.get(key, ()):
+                if (fingerprint ^ other).bit_count() <= self.max_distance:
+                    return ref
+        return None
+
+    def _drop(self, reason: str, source: Optional[str]):
+        self.counts[reason] += 1
+        if source:
+            self.dropped_by_file[source] = self.dropped_by_file.get(source, 0) + 1
+
+    def find(self, text: str, source: Optional[str] = None, ref: Any = True):
+        """
+        이미 본 청크와 같거나 비슷하면 그 청크를 등록할 때 준 ref를 반환하고, 아니면 지문을 ref와 함께 등록한 뒤 None을 반환합니다.
+        """
+        normalized = normalize(text)
+        digest = hashlib.sha256(normalized.encode()).digest()
+        words = _WORD.findall(normalized) if self.near_duplicates else []
+        fingerprint = simhash(words) if len(words) >= self.min_words else None
+
+        with self.lock:
+            self.counts["checked"] += 1
+            original = self.exact.get(digest)
+            if original is not None:
+                self._drop("exact", source)
+                return original
+            original = self._near_match(fingerprint) if fingerprint is not None else None
+            if original is not None:
+                self._drop("near", source)
+                return original
+            self.exact[digest] = ref
+            if fingerprint is not None:
+                for key in self._band_keys(fingerprint):
+                    self.buckets.setdefault(key, []).append((fingerprint, ref))
+            return None
+
+    def is_duplicate(self, text: str, source: Optional[str] = None) -> bool:
+        """
+        이미 본 청크와 같거나 비슷하면 True를 반환하고, 아니면 지문을 등록한 뒤 False를 반환합니다.
+        """
+        return self.find(text, source) is not None
+
+    def report(self) -> dict:
+        """
+        검사한 청크 수, 사유별 제거 수, 파일별 제거 수를 반환합니다.
+        """
+        with self.lock:
+            dropped = self.counts["exact"] + self.counts["near"]
+            return {
+                "checked": self.counts["checked"],
+                "dropped": dropped,
+                "dropped_exact": self.counts["exact"],
+                "dropped_near": self.counts["near"],
+                "kept": self.counts["checked"] - dropped,
+                "dropped_by_file": dict(self.dropped_by_file),
+            }
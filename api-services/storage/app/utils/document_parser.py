@@ -0,0 +1,61 @@
+from tempfile import SpooledTemporaryFile
+from langchain_community.document_loaders import UnstructuredFileIOLoader
+from app.utils.chunking import chunker
+from app.utils.custom_loader import CustomDocumentLoader, StreamCSVLoader, StreamJSONLoader, StreamMarkdownLoader, StreamPDFLoader
+from app.utils.stream_io import spool_stream
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.csv', '.md', '.json', '.txt', '.docx', '.xlsx', '.pptx')
+# 파싱에 탐색 가능한 파일이 필요한 형식 (나머지는 스트림에서 바로 읽음)
+SEEKABLE_EXTENSIONS = ('.pdf', '.docx', '.xlsx', '.pptx')
+
+def load_stream(name: str, file):
+    # 파일 타입에 맞는 스트리밍 로더 선택 (탐색이 필요한 형식은 임시 파일로 복사)
+    try:
+        # Python 3.10의 SpooledTemporaryFile에는 seekable()이 없으므로 없으면 탐색 가능 여부를 따로 판단
+        seekable = getattr(file, "seekable", None)
+        if name.endswith(SEEKABLE_EXTENSIONS) and not (seekable() if seekable else isinstance(file, SpooledTemporaryFile)):
+            file = spool_stream(file)
+        if name.endswith('.pdf'):
+            loader = StreamPDFLoader(file, name)
+        elif name.endswith('.csv'):
+            loader = StreamCSVLoader(file, name)
+        elif name.endswith('.md'):
+            loader = StreamMarkdownLoader(file, name)
+        elif name.endswith('.json'):
+            loader = StreamJSONLoader(file, name)
+        elif name.endswith('.txt'):
+            loader = CustomDocumentLoader(name, file)
+        elif name.endswith('.docx'):
+            loader = UnstructuredFileIOLoader(file, metadata_filename=name)
+        elif name.endswith('.xlsx'):
+            loader = UnstructuredFileIOLoader(file, mode="elements", metadata_filename=name)
+        elif name.endswith('.pptx'):
+            loader = UnstructuredFileIOLoader(file, metadata_filename=name)
+        else:
+            raise ValueError("Unsupported file type")
+    except Exception:
+        file.close()
+        raise
+
+    def lazy_load():
+        with file:
+            yield from loader.lazy_load()
+
+    return lazy_load()
+
+def load_documents(file_path: str) -> list:
+    return list(load_stream(file_path, open(file_path, 'rb')))
+
+def split_documents(docs, name: str, index_name: str = None):
+    # 파일 형식과 인덱스별 청크 설정으로 분할
+    return chunker.split(docs, name, index_name)
+
+def parse_file(name: str, file_path: str, index_name: str = None) -> list:
+    """
+    로컬 파일을 읽어 분할된 Document 목록을 반환합니다. 메타데이터의 출처는 객체 키(name)로 기록합니다.
+    """
+    docs = []
+    for doc in split_documents(load_stream(name, open(file_path, 'rb')), name, index_name):
+        doc.metadata["source"] = name
+        docs.append(doc)
+    return docs
@@ -0,0 +1,248 @@
+import os
+import re
+import time
+import array
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# 임베딩 캐시 설정: auto(REDIS_URL이 있으면 redis, 없으면 local), redis, local, none
+EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "auto").lower()
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", 30 * 24 * 3600))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "/tmp/embedding_cache")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 100000))
+# redis 캐시 저장소 주소. 벡터 인덱스와 메모리를 나누려면 별도 DB/인스턴스를 지정 (기본값 REDIS_URL)
+EMBEDDING_CACHE_REDIS_URL = os.getenv("EMBEDDING_CACHE_REDIS_URL")
+EMBEDDING_CACHE_KEY_PREFIX = "embedding_cache"
+
+def vector_to_bytes(vector: List[float]) -> bytes:
+    """
+    임베딩 벡터를 float32 바이트로 직렬화합니다.
+    """
+    return array.array("f", vector).tobytes()
+
+def bytes_to_vector(data: bytes) -> List[float]:
+    """
+    float32 바이트를 임베딩 벡터로 역직렬화합니다.
+    """
+    vector = array.array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+class RedisEmbeddingStore:
+    """
+    Redis에 임베딩을 저장하는 캐시 저장소.
+    항목마다 TTL을 두고, 캐시 적중 시 TTL을 갱신하여 자주 쓰이는 항목이 오래 남도록 합니다.
+    정렬 집합에 최근 사용 시각을 기록하여 max_entries를 넘으면 오래 사용되지 않은 항목부터 삭제합니다.
+    """
+
+    def __init__(self, redis_url: str, ttl: int = EMBEDDING_CACHE_TTL, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lru_key = f"{EMBEDDING_CACHE_KEY_PREFIX}:lru"
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        values = self.client.mget(keys)
+        hit_keys = [key for key, value in zip(keys, values) if value is not None]
+        if hit_keys:
+            pipeline = self.client.pipeline(transaction=False)
+            if self.ttl:
+                for key in hit_keys:
+                    pipeline.expire(key, self.ttl)
+            pipeline.zadd(self.lru_key, {key: time.time() for key in hit_keys})
+            pipeline.execute()
+        return values
+
+    def set_many(self, items: dict):
+        now = time.time()
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(key, value, ex=self.ttl or None)
+        pipeline.zadd(self.lru_key, {key: now for key in items})
+        if self.ttl:
+            # TTL로 이미 만료된 항목의 기록 제거 (사용 시각이 TTL보다 오래됨)
+            pipeline.zremrangebyscore(self.lru_key, 0, now - self.ttl)
+        pipeline.zcard(self.lru_key)
+        overflow = pipeline.execute()[-1] - self.max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in self.client.zpopmin(self.lru_key, overflow)]
+            if evicted:
+                self.client.delete(*evicted)
+
+class LocalFileEmbeddingStore:
+    """
+    로컬 디렉터리에 임베딩을 파일 하나씩 저장하는 캐시 저장소.
+    항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 파일부터 삭제합니다(LRU).
+    """
+
+    def __init__(self, directory: str = EMBEDDING_CACHE_DIR, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.writes_since_eviction = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9._-]", "_", key))
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        values = []
+        for key in keys:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    values.append(f.read())
+                os.utime(path)
+            except FileNotFoundError:
+                values.append(None)
+        return values
+
+    def set_many(self, items: dict):
+        for key, value in items.items():
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        with self.lock:
+            self.writes_since_eviction += len(items)
+            if self.writes_since_eviction < max(1, self.max_entries // 100):
+                return
+            self.writes_since_eviction = 0
+        self.evict()
+
+    def evict(self):
+        """
+        최근 사용 시각(mtime) 기준으로 오래된 항목을 삭제하여 max_entries 이하로 유지합니다.
+        """
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    entries.append((entry.stat().st_mtime, entry.path))
+        overflow = len(entries) - self.max_entries
+        if overflow <= 0:
+            return
+        entries.sort()
+        for _, path in entries[:overflow]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+class CachedEmbeddings(Embeddings):
+    """
+    (임베딩 제공자, 모델, 종류, 텍스트 SHA-256) 키로 임베딩 결과를 캐시하는 Embeddings 래퍼.
+    질문(query)과 문서(document)를 다른 작업 유형으로 임베딩하는 제공자(gemini, vertexai)가 있으므로 종류별로 따로 캐시합니다.
+    캐시에 없는 텍스트만 실제 임베딩 모델에 요청합니다.
+    """
+
+    def __init__(self, underlying: Embeddings, store, namespace: str):
+        self.underlying = underlying
+        self.store = store
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def _key(self, text: str, kind: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{EMBEDDING_CACHE_KEY_PREFIX}:{self.namespace}:{kind}:{digest}"
+
+    def _get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        try:
+            return self.store.get_many(keys)
+        except Exception as e:
+            # 캐시 장애가 임베딩 요청 자체를 막지 않도록 함
+            with self.lock:
+                self.errors += 1
+            logger.error(f"Embedding cache read failed: {str(e)}")
+            return [None] * len(keys)
+
+    def _set_many(self, items: dict):
+        try:
+            self.store.set_many(items)
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+            logger.error(f"Embedding cache write failed: {str(e)}")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text, "document") for text in texts]
+        cached = self._get_many(keys)
+        vectors = [bytes_to_vector(value) if value is not None else None for value in cached]
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        with self.lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            # 같은 요청 안에서 반복되는 텍스트는 한 번만 임베딩
+            unique_keys = list(dict.fromkeys(keys[i] for i in missing))
+            texts_by_key = {keys[i]: texts[i] for i in missing}
+            new_vectors = self.underlying.embed_documents([texts_by_key[key] for key in unique_keys])
+            vectors_by_key = dict(zip(unique_keys, new_vectors))
+            for i in missing:
+                vectors[i] = vectors_by_key[keys[i]]
+            self._set_many({key: vector_to_bytes(vector) for key, vector in vectors_by_key.items()})
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text, "query")
+        value = self._get_many([key])[0]
+        if value is not None:
+            with self.lock:
+                self.hits += 1
+            return bytes_to_vector(value)
+
+        with self.lock:
+            self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self._set_many({key: vector_to_bytes(vector)})
+        return vector
+
+    def stats(self) -> dict:
+        """
+        캐시 적중/실패 횟수와 적중률을 반환합니다.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.store).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def cached_embedding(embedding: Embeddings, provider: str, model: str) -> Embeddings:
+    """
+    EMBEDDING_CACHE_BACKEND 설정에 따라 임베딩 모델을 캐시 래퍼로 감쌉니다.
+    캐시를 사용하지 않거나 저장소 초기화에 실패하면 원래 임베딩 모델을 반환합니다.
+    """
+    backend = EMBEDDING_CACHE_BACKEND
+    redis_url = EMBEDDING_CACHE_REDIS_URL or os.getenv("REDIS_URL")
+    if backend == "auto":
+        backend = "redis" if redis_url else "local"
+
+    try:
+        if backend == "redis":
+            store = RedisEmbeddingStore(redis_url)
+        elif backend == "local":
+            store = LocalFileEmbeddingStore()
+        else:
+            return embedding
+    except Exception as e:
+        logger.error(f"Failed to initialize embedding cache ({backend}): {str(e)}")
+        return embedding
+
+    return CachedEmbeddings(embedding, store, namespace=f"{provider}:{model}")
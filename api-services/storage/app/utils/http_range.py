@@ -0,0 +1,41 @@
+from typing import Optional, Tuple
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    HTTP Range 헤더를 해석하여 (시작, 끝) 바이트 위치(끝 포함)를 반환합니다.
+    헤더가 없거나 bytes 단위의 단일 범위가 아니면 None을 반환하여 전체 응답을 보내도록 합니다.
+    만족할 수 없는 범위이면 RangeNotSatisfiable을 발생시킵니다.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    start, end = (value.strip() for value in spec.split("-", 1))
+    try:
+        if start:
+            start, end = int(start), int(end) if end else size - 1
+        elif end:
+            # bytes=-N: 마지막 N바이트
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+def etag_matches(header: Optional[str], etag: Optional[str]) -> bool:
+    """
+    If-None-Match / If-Range 헤더의 ETag 목록 중 하나라도 현재 ETag와 일치하는지 확인합니다 (약한 비교).
+    """
+    if not header or not etag:
+        return False
+    if header.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(value.strip().removeprefix("W/") == current for value in header.split(","))
@@ -0,0 +1,166 @@
+import os
+import json
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import Redis
+from langchain_community.vectorstores.redis.constants import REDIS_VECTOR_DTYPE_MAP
+
+# 벡터 인덱스 설정 (JSON 문자열 또는 JSON 파일 경로). storage(쓰기)와 query(읽기) 서비스에 같은 값을 설정해야 합니다. 예:
+# {"default": {"algorithm": "HNSW", "datatype": "FLOAT16", "m": 16, "ef_construction": 200, "ef_runtime": 10},
+#  "indexes": {"help": {"algorithm": "FLAT"}, "default": {"dims": 512, "reduction": "truncate"}}}
+# 적용 순서: 인덱스 설정 > 기본값
+# 이미 만들어진 인덱스에는 적용되지 않으므로, 설정을 바꾸면 인덱스를 삭제하고 다시 수집해야 합니다.
+INDEX_SCHEMA_CONFIG = os.getenv("INDEX_SCHEMA_CONFIG", "")
+
+DEFAULT_INDEX_SCHEMA = {
+    "default": {
+        "algorithm": "FLAT",
+        "datatype": "FLOAT32",
+        "distance_metric": "COSINE",
+        # HNSW 전용: 노드당 이웃 수, 색인/검색 시 후보 목록 크기
+        "m": 16,
+        "ef_construction": 200,
+        "ef_runtime": 10,
+        # 0이면 차원 축소 없음. truncate: 앞쪽 차원만 사용(Matryoshka 학습 모델, 예: text-embedding-3-*),
+        # projection: 고정 시드 가우시안 랜덤 투영(모든 모델)
+        "dims": 0,
+        "reduction": "truncate",
+        "projection_seed": 42,
+    },
+    "indexes": {},
+}
+
+HNSW_PARAMS = ("m", "ef_construction", "ef_runtime")
+
+# 검색 필터에 쓰는 메타데이터 필드 (source: 원본 파일의 객체 키). 파일 이름에 쉼표가 올 수 있으므로 구분자는 "|"
+METADATA_SCHEMA = {"tag": [{"name": "source", "separator": "|"}]}
+
+# langchain_community의 Redis 벡터스토어는 FLOAT32/FLOAT64만 알고 있으므로 FLOAT16(Redis 7.4+)을 등록
+REDIS_VECTOR_DTYPE_MAP.setdefault("FLOAT16", np.float16)
+
+def load_index_schema_config(value: str = INDEX_SCHEMA_CONFIG) -> dict:
+    config = json.loads(json.dumps(DEFAULT_INDEX_SCHEMA))
+    if not value:
+        return config
+    if os.path.isfile(value):
+        with open(value) as f:
+            custom = json.load(f)
+    else:
+        custom = json.loads(value)
+    config["default"].update(custom.get("default", {}))
+    config["indexes"].update(custom.get("indexes", {}))
+    return config
+
+def index_settings(index_name: str, config: dict = None) -> dict:
+    """
+    인덱스에 적용할 벡터 설정을 반환합니다.
+    """
+    config = config or index_schema_config
+    settings = {**config["default"], **config["indexes"].get(index_name, {})}
+    settings["algorithm"] = settings["algorithm"].upper()
+    settings["datatype"] = settings["datatype"].upper()
+    if settings["datatype"] not in REDIS_VECTOR_DTYPE_MAP:
+        raise ValueError(f"Unsupported vector datatype for index {index_name}: {settings['datatype']}")
+    return settings
+
+def vector_schema(settings: dict) -> dict:
+    """
+    langchain Redis 벡터스토어의 vector_schema 인자로 쓸 설정을 만듭니다.
+    """
+    schema = {key: settings[key] for key in ("algorithm", "datatype", "distance_metric")}
+    if settings["algorithm"] == "HNSW":
+        schema.update({key: settings[key] for key in HNSW_PARAMS})
+    return schema
+
+class ReducedEmbeddings(Embeddings):
+    """
+    임베딩 결과를 dims 차원으로 줄인 뒤 L2 정규화하는 Embeddings 래퍼.
+    그 밖의 속성(예: 임베딩 캐시의 stats)은 원래 임베딩 모델로 위임합니다.
+    """
+
+    def __init__(self, underlying: Embeddings, dims: int, reduction: str = "truncate", seed: int = 42):
+        if reduction not in ("truncate", "projection"):
+            raise ValueError(f"Unsupported dimensionality reduction: {reduction}")
+        self.underlying = underlying
+        self.dims = dims
+        self.reduction = reduction
+        self.seed = seed
+        self.projection = None
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["underlying"], name)
+
+    def _projection(self, input_dims: int) -> np.ndarray:
+        # 같은 시드와 입력 차원이면 어느 서비스에서든 같은 투영 행렬이 만들어짐
+        if self.projection is None or self.projection.shape[0] != input_dims:
+            rng = np.random.default_rng(self.seed)
+            self.projection = (rng.standard_normal((input_dims, self.dims)) / np.sqrt(self.dims)).astype(np.float32)
+        return self.projection
+
+    def reduce(self, vectors: List[List[float]]) -> List[List[float]]:
+        if len(vectors) == 0:
+            return []
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape[1] <= self.dims:
+            return matrix.tolist()
+        if self.reduction == "truncate":
+            matrix = matrix[:, :self.dims]
+        else:
+            matrix = matrix @ self._projection(matrix.shape[1])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return (matrix / np.where(norms == 0, 1, norms)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.reduce(self.underlying.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.reduce([self.underlying.embed_query(text)])[0]
+
+def create_vectorstore(redis_url: str, index_name: str, embedding: Embeddings, **kwargs) -> Redis:
+    """
+    인덱스 설정(알고리즘, 데이터 형식, HNSW 파라미터, 차원 축소)을 적용한 Redis 벡터스토어를 만듭니다.
+    차원 축소를 쓰는 인덱스는 embedding을 ReducedEmbeddings로 감싸므로 검색 질의도 같은 차원으로 변환됩니다.
+    """
+    settings = index_settings(index_name)
+    if settings["dims"]:
+        embedding = ReducedEmbeddings(embedding, settings["dims"], settings["reduction"], settings["projection_seed"])
+    return Redis(
+        redis_url=redis_url,
+        index_name=index_name,
+        embedding=embedding,
+        index_schema=METADATA_SCHEMA,
+        vector_schema=vector_schema(settings),
+        **kwargs,
+    )
+
+def ensure_metadata_fields(vectorstore: Redis):
+    """
+    메타데이터 필드 없이 만들어진 기존 인덱스에 필드를 추가합니다(FT.ALTER, 기존 문서도 다시 색인됨).
+    인덱스가 아직 없으면 첫 문서를 넣을 때 전체 스키마로 생성되므로 아무것도 하지 않습니다.
+    """
+    import redis
+    from redis.commands.search.field import TagField
+
+    try:
+        info = vectorstore.client.ft(vectorstore.index_name).info()
+    except redis.ResponseError:
+        return
+    existing = set()
+    for attribute in info.get("attributes", []):
+        values = [value.decode() if isinstance(value, bytes) else str(value) for value in attribute]
+        if "attribute" in values:
+            existing.add(values[values.index("attribute") + 1])
+    missing = [TagField(field["name"], separator=field["separator"]) for field in METADATA_SCHEMA["tag"] if field["name"] not in existing]
+    if missing:
+        vectorstore.client.ft(vectorstore.index_name).alter_schema_add(missing)
+
+def reduce_vectors(vectorstore: Redis, vectors: List[List[float]]) -> List[List[float]]:
+    """
+    미리 계산한 임베딩을 벡터스토어의 인덱스 차원에 맞춥니다(차원 축소를 쓰지 않으면 그대로 반환).
+    """
+    if isinstance(vectorstore.embeddings, ReducedEmbeddings):
+        return vectorstore.embeddings.reduce(vectors)
+    return vectors
+
+index_schema_config = load_index_schema_config()
@@ -0,0 +1,165 @@
+import os
+import json
+import logging
+import threading
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_KEY_PREFIX = "ingest_manifest"
+DELETE_BATCH_SIZE = 500
+# 인덱스별 수집 잠금 만료 시간(초, 실행 중에는 1/3 주기로 연장)과 다른 수집이 끝나기를 기다리는 최대 시간(초)
+INGEST_LOCK_TTL = int(os.getenv("INGEST_LOCK_TTL", 60))
+INGEST_LOCK_WAIT = float(os.getenv("INGEST_LOCK_WAIT", 3600))
+
+class IngestLock:
+    """
+    한 인덱스의 수집이 여러 워커/레플리카에서 동시에 실행되지 않게 하는 Redis 잠금 (SET NX EX).
+    잠금을 가진 동안 별도 스레드가 만료 시간을 연장하므로, 프로세스가 죽으면 ttl초 뒤에 풀립니다.
+    """
+
+    def __init__(self, client, name: str, ttl: int = INGEST_LOCK_TTL, wait: float = INGEST_LOCK_WAIT):
+        # 연장 스레드가 같은 잠금 토큰을 쓰도록 thread_local을 끔
+        self.lock = client.lock(name, timeout=ttl, blocking_timeout=wait, thread_local=False)
+        self.name = name
+        self.ttl = ttl
+        self.stop_event = threading.Event()
+
+    def _renew(self):
+        while not self.stop_event.wait(self.ttl / 3):
+            try:
+                self.lock.reacquire()
+            except Exception as e:
+                logger.error(f"Failed to renew ingest lock {self.name}: {str(e)}")
+
+    def __enter__(self):
+        if not self.lock.acquire():
+            raise RuntimeError(f"Timed out waiting for another ingestion to finish ({self.name})")
+        self.stop_event.clear()
+        threading.Thread(target=self._renew, name=f"ingest-lock-{self.name}", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        try:
+            self.lock.release()
+        except Exception as e:
+            logger.error(f"Failed to release ingest lock {self.name}: {str(e)}")
+
+class IngestManifest:
+    """
+    인덱스별로 수집된 객체의 (객체 키, ETag, 청크 키 목록)을 Redis 해시에 기록하는 매니페스트.
+    변경되지 않은 객체는 다시 수집하지 않고, 삭제되거나 변경된 객체의 벡터는 제거할 수 있게 합니다.
+    중복 제거로 여러 객체가 같은 청크를 공유할 수 있으므로 청크별로 참조하는 항목 수를 별도 해시({key}:refs)에 세고,
+    어느 항목도 참조하지 않게 된 청크만 삭제합니다. 항목 교체/삭제와 참조 수 조정은 WATCH/MULTI로 함께 처리합니다.
+    """
+
+    def __init__(self, redis_url: str, index_name: str):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.index_name = index_name
+        self.key = f"{MANIFEST_KEY_PREFIX}:{index_name}"
+        self.refs_key = f"{self.key}:refs"
+
+    def entries(self) -> dict:
+        """
+        매니페스트 전체를 {객체 키: {"etag": ..., "chunk_ids": [...]}} 형태로 반환합니다.
+        """
+        return {
+            name.decode(): json.loads(value)
+            for name, value in self.client.hgetall(self.key).items()
+        }
+
+    def get(self, object_name: str):
+        value = self.client.hget(self.key, object_name)
+        return json.loads(value) if value else None
+
+    def lock(self) -> IngestLock:
+        """
+        이 인덱스의 수집 잠금을 반환합니다. with 블록 안에서만 잠금을 유지합니다.
+        """
+        return IngestLock(self.client, f"{self.key}:lock")
+
+    def set(self, object_name: str, etag: str, chunk_ids: List[str]):
+        self.client.hset(self.key, object_name, json.dumps({"etag": etag, "chunk_ids": chunk_ids}))
+
+    def delete_vectors(self, chunk_ids: List[str]):
+        """
+        벡터스토어에서 청크 키에 해당하는 문서를 삭제합니다.
+        """
+        for i in range(0, len(chunk_ids), DELETE_BATCH_SIZE):
+            self.client.unlink(*chunk_ids[i:i + DELETE_BATCH_SIZE])
+
+    def chunks_exist(self, chunk_ids: List[str]) -> bool:
+        """
+        청크 키가 모두 벡터스토어에 있는지 확인합니다.
+        """
+        for i in range(0, len(chunk_ids), DELETE_BATCH_SIZE):
+            batch = chunk_ids[i:i + DELETE_BATCH_SIZE]
+            if self.client.exists(*batch) != len(batch):
+                return False
+        return True
+
+    def _swap(self, object_name: str, entry) -> List[str]:
+        """
+        항목을 entry로 바꾸고(None이면 삭제) 추가/제외된 청크의 참조 수를 조정한 뒤,
+        어느 항목도 참조하지 않게 된 청크 키 목록을 반환합니다. 참조 수가 없던 기존 청크는 바로 해제됩니다.
+        """
+        changes = {}
+
+        def swap(pipe):
+            value = pipe.hget(self.key, object_name)
+            previous = set(json.loads(value)["chunk_ids"]) if value else set()
+            current = set(entry["chunk_ids"]) if entry else set()
+            changes["added"] = list(current - previous)
+            changes["dropped"] = list(previous - current)
+            pipe.multi()
+            if entry is None:
+                pipe.hdel(self.key, object_name)
+            else:
+                pipe.hset(self.key, object_name, json.dumps(entry))
+            for chunk_id in changes["added"]:
+                pipe.hincrby(self.refs_key, chunk_id, 1)
+            for chunk_id in changes["dropped"]:
+                pipe.hincrby(self.refs_key, chunk_id, -1)
+
+        results = self.client.transaction(swap, self.key)
+        counts = results[1 + len(changes["added"]):]
+        released = [chunk_id for chunk_id, count in zip(changes["dropped"], counts) if count <= 0]
+        for i in range(0, len(released), DELETE_BATCH_SIZE):
+            self.client.hdel(self.refs_key, *released[i:i + DELETE_BATCH_SIZE])
+        return released
+
+    def replace(self, object_name: str, etag: str, chunk_ids: List[str]):
+        """
+        객체의 새 청크가 저장된 뒤 매니페스트를 갱신하고, 다른 객체도 참조하지 않는 이전 청크를 삭제합니다.
+        chunk_ids에는 객체가 저장한 청크와 중복 제거로 참조하는 다른 객체의 청크가 함께 들어갑니다.
+        """
+        self.delete_vectors(self._swap(object_name, {"etag": etag, "chunk_ids": chunk_ids}))
+
+    def remove(self, object_name: str) -> int:
+        """
+        객체의 매니페스트 항목을 삭제하고, 다른 객체가 참조하지 않는 청크를 삭제한 뒤 그 수를 반환합니다.
+        """
+        released = self._swap(object_name, None)
+        self.delete_vectors(released)
+        return len(released)
+
+    def plan(self, versions: dict) -> dict:
+        """
+        저장소의 현재 객체 버전({객체 키: ETag})과 매니페스트를 비교하여
+        새로 수집할 객체, 변경된 객체, 삭제된 객체, 변경 없는 객체 목록을 반환합니다.
+        """
+        entries = self.entries()
+        new, changed, unchanged = [], [], []
+        for object_name, etag in versions.items():
+            entry = entries.get(object_name)
+            if entry is None:
+                new.append(object_name)
+            elif entry["etag"] != etag:
+                changed.append(object_name)
+            else:
+                unchanged.append(object_name)
+        deleted = [object_name for object_name in entries if object_name not in versions]
+        return {"new": new, "changed": changed, "deleted": deleted, "unchanged": unchanged}
@@ -0,0 +1,324 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# 수집 파이프라인 설정
+INGEST_DOWNLOAD_CONCURRENCY = int(os.getenv("INGEST_DOWNLOAD_CONCURRENCY", 8))
+INGEST_PARSE_CONCURRENCY = int(os.getenv("INGEST_PARSE_CONCURRENCY", 4))
+INGEST_EMBEDDING_CONCURRENCY = int(os.getenv("INGEST_EMBEDDING_CONCURRENCY", 4))
+INGEST_EMBEDDING_BATCH_SIZE = int(os.getenv("INGEST_EMBEDDING_BATCH_SIZE", 64))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 32))
+
+# 단계 간 종료 신호
+_DONE = object()
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self) -> dict:
+        """
+        단계별 처리 건수, 오류 수, 처리량(건/초)을 반환합니다.
+        """
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_second": round(self.items_out / elapsed, 3) if elapsed else 0.0,
+        }
+
+class IngestPipeline:
+    """
+    다운로드 → 파싱 → 임베딩 → Redis 저장 단계를 겹쳐서 실행하는 수집 파이프라인.
+    단계 사이는 크기가 제한된 큐로 연결되어 느린 단계가 앞 단계를 자연스럽게 늦춥니다.
+    """
+
+    def __init__(
+        self,
+        download: Callable[[str], Any],
+        parse: Callable[[str, Any], Iterable],
+        embed: Callable[[List[str]], List[List[float]]],
+        write: Callable[[List[str], List[dict], List[List[float]], List[str]], list],
+        on_file_done: Callable[[str, List[str], str], None] = None,
+        is_duplicate: Callable[[Any], bool] = None,
+        download_concurrency: int = INGEST_DOWNLOAD_CONCURRENCY,
+        parse_concurrency: int = INGEST_PARSE_CONCURRENCY,
+        embedding_concurrency: int = INGEST_EMBEDDING_CONCURRENCY,
+        embedding_batch_size: int = INGEST_EMBEDDING_BATCH_SIZE,
+        queue_size: int = INGEST_QUEUE_SIZE,
+    ):
+        """
+        Args:
+            download: 객체 키를 받아 파싱 단계에 넘길 입력(임시 파일 등)을 반환하는 함수.
+            parse: (객체 키, 다운로드 결과)를 받아 분할된 Document를 차례로 내놓는 이터러블을 반환하는 함수.
+                제너레이터를 반환하면 청크가 만들어지는 대로 임베딩 단계로 넘어가므로 큰 파일도 메모리에 한 번에 올리지 않습니다.
+            embed: 텍스트 목록을 받아 임베딩 벡터 목록을 반환하는 함수.
+            write: 텍스트, 메타데이터, 벡터, 키 목록을 벡터스토어에 저장하고 키 목록을 반환하는 함수.
+                키 목록은 청크(Document)에 id가 미리 정해져 있을 때만 전달되고, 아니면 None입니다.
+            on_file_done: 파일의 모든 청크 처리가 끝나면 (객체 키, 저장된 청크 키 목록, 오류 메시지 또는 None)으로 호출되는 함수.
+            is_duplicate: 청크(Document)가 이미 본 청크의 중복이면 참인 값을 반환하는 함수. 중복 청크는 임베딩/저장하지 않습니다.
+        """
+        self.download = download
+        self.parse = parse
+        self.embed = embed
+        self.write = write
+        self.on_file_done = on_file_done
+        self.is_duplicate = is_duplicate
+        self.download_concurrency = download_concurrency
+        self.parse_concurrency = parse_concurrency
+        self.embedding_concurrency = embedding_concurrency
+        self.embedding_batch_size = embedding_batch_size
+        self.queue_size = queue_size
+        self.stats = {name: StageStats(name) for name in ("download", "parse", "dedup", "embed", "write")}
+        self.file_errors = {}
+        self.file_chunks = {}
+        self.file_status = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def progress(self) -> dict:
+        """
+        단계별 진행 상황, 파일별 상태와 오류, 파일 처리량을 반환합니다.
+        """
+        statuses = dict(self.file_status)
+        finished = sum(1 for status in statuses.values() if status in ("done", "failed"))
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "files": {
+                "total": len(statuses),
+                "done": sum(1 for status in statuses.values() if status == "done"),
+                "failed": sum(1 for status in statuses.values() if status == "failed"),
+                "in_progress": len(statuses) - finished,
+                "elapsed_seconds": round(elapsed, 3),
+                "files_per_second": round(finished / elapsed, 3) if elapsed else 0.0,
+            },
+            "file_status": statuses,
+            "stages": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "errors": dict(self.file_errors),
+        }
+
+    def fail_file(self, key: str, error: str):
+        """
+        파이프라인이 끝난 뒤 마무리 단계에서 실패한 파일을 진행 상황에 반영합니다.
+        """
+        self.file_errors[key] = error
+        self.file_status[key] = "failed"
+
+    async def _file_done(self, key: str, chunk_ids: list, error: str = None):
+        if error:
+            self.file_errors[key] = error
+        if self.on_file_done is not None:
+            try:
+                await asyncio.to_thread(self.on_file_done, key, chunk_ids, error)
+            except Exception as e:
+                error = self.file_errors[key] = f"finalize: {str(e)}"
+                logger.error(f"Failed to finalize {key}: {str(e)}")
+        self.file_status[key] = "failed" if error else "done"
+
+    async def _chunks_done(self, docs: list, chunk_ids: list = None, error: str = None):
+        """
+        청크 처리 결과를 파일별로 모으고, 파일의 파싱과 마지막 청크가 끝나면 on_file_done을 호출합니다.
+        """
+        for i, doc in enumerate(docs):
+            key = doc.metadata.get("source")
+            state = self.file_chunks[key]
+            state["pending"] -= 1
+            if error:
+                state["error"] = error
+            elif chunk_ids:
+                state["ids"].append(chunk_ids[i])
+            if state["pending"] == 0 and state["parsed"]:
+                await self._file_done(key, state["ids"], state["error"])
+
+    async def _run_stage(self, name: str, func, *args):
+        """
+        동기 함수를 스레드에서 실행하며 단계별 처리 시간을 기록합니다.
+        """
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            self.stats[name].busy_seconds += time.perf_counter() - started
+
+    async def _download_worker(self, keys: asyncio.Queue, parse_queue: asyncio.Queue):
+        stats = self.stats["download"]
+        while True:
+            key = await keys.get()
+            if key is _DONE:
+                return
+            stats.items_in += 1
+            self.file_status[key] = "downloading"
+            try:
+                file_path = await self._run_stage("download", self.download, key)
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Failed to download {key}: {str(e)}")
+                await self._file_done(key, [], f"download: {str(e)}")
+                continue
+            stats.items_out += 1
+            await parse_queue.put((key, file_path))
+
+    async def _parse_worker(self, parse_queue: asyncio.Queue, embed_queue: asyncio.Queue):
+        stats = self.stats["parse"]
+        while True:
+            item = await parse_queue.get()
+            if item is _DONE:
+                return
+            key, source = item
+            stats.items_in += 1
+            self.file_status[key] = "parsing"
+            state = self.file_chunks[key] = {"pending": 0, "ids": [], "error": None, "parsed": False}
+            docs = None
+            try:
+                docs = iter(await self._run_stage("parse", self.parse, key, source))
+                # 청크를 배치 단위로 꺼내 임베딩 큐에 넣어 파싱과 임베딩을 겹쳐서 실행
+                while True:
+                    batch = await self._run_stage("parse", self._take, docs, self.embedding_batch_size)
+                    if not batch:
+                        break
+                    if self.is_duplicate:
+                        batch = await self._run_stage("dedup", self._drop_duplicates, batch)
+                    self.file_status[key] = "embedding"
+                    state["pending"] += len(batch)
+                    for doc in batch:
+                        await embed_queue.put(doc)
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Failed to parse {key}: {str(e)}")
+                state["error"] = f"parse: {str(e)}"
+                if hasattr(docs, "close"):
+                    docs.close()
+            else:
+                stats.items_out += 1
+            state["parsed"] = True
+            if state["pending"] == 0:
+                await self._file_done(key, state["ids"], state["error"])
+
+    def _drop_duplicates(self, batch: list) -> list:
+        stats = self.stats["dedup"]
+        stats.items_in += len(batch)
+        kept = [doc for doc in batch if not self.is_duplicate(doc)]
+        stats.items_out += len(kept)
+        return kept
+
+    @staticmethod
+    def _take(docs: Iterable, size: int) -> list:
+        batch = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= size:
+                break
+        return batch
+
+    async def _embed_batch(self, batch: list, write_queue: asyncio.Queue, semaphore: asyncio.Semaphore):
+        stats = self.stats["embed"]
+        async with semaphore:
+            texts = [doc.page_content for doc in batch]
+            try:
+                vectors = await self._run_stage("embed", self.embed, texts)
+            except Exception as e:
+                stats.errors += len(batch)
+                logger.error(f"Failed to embed batch of {len(batch)} chunks: {str(e)}")
+                await self._chunks_done(batch, error=f"embed: {str(e)}")
+                return
+            stats.items_out += len(batch)
+            await write_queue.put((batch, vectors))
+
+    async def _embed_batcher(self, embed_queue: asyncio.Queue, write_queue: asyncio.Queue):
+        """
+        여러 파일의 청크를 모아 embedding_batch_size 단위로 임베딩 요청을 보냅니다.
+        """
+        stats = self.stats["embed"]
+        semaphore = asyncio.Semaphore(self.embedding_concurrency)
+        tasks = set()
+        batch = []
+        while True:
+            doc = await embed_queue.get()
+            if doc is not _DONE:
+                stats.items_in += 1
+                batch.append(doc)
+            if batch and (doc is _DONE or len(batch) >= self.embedding_batch_size):
+                task = asyncio.create_task(self._embed_batch(batch, write_queue, semaphore))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                batch = []
+            if doc is _DONE:
+                await asyncio.gather(*tasks)
+                return
+
+    async def _writer(self, write_queue: asyncio.Queue):
+        stats = self.stats["write"]
+        while True:
+            item = await write_queue.get()
+            if item is _DONE:
+                return
+            batch, vectors = item
+            texts = [doc.page_content for doc in batch]
+            keys = [doc.id for doc in batch]
+            stats.items_in += len(batch)
+            try:
+                chunk_ids = await self._run_stage("write", self.write, texts, [doc.metadata for doc in batch], vectors, keys if all(keys) else None)
+            except Exception as e:
+                stats.errors += len(batch)
+                logger.error(f"Failed to write {len(batch)} chunks: {str(e)}")
+                await self._chunks_done(batch, error=f"write: {str(e)}")
+                continue
+            stats.items_out += len(batch)
+            await self._chunks_done(batch, chunk_ids)
+
+    async def run(self, keys: List[str]) -> dict:
+        """
+        주어진 객체 키 목록을 파이프라인으로 수집하고 진행 상황을 반환합니다.
+        """
+        key_queue = asyncio.Queue()
+        parse_queue = asyncio.Queue(maxsize=self.queue_size)
+        embed_queue = asyncio.Queue(maxsize=self.queue_size * self.embedding_batch_size)
+        write_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        now = time.time()
+        self.started_at = now
+        for stats in self.stats.values():
+            stats.started_at = now
+
+        for key in keys:
+            self.file_status[key] = "queued"
+            key_queue.put_nowait(key)
+        for _ in range(self.download_concurrency):
+            key_queue.put_nowait(_DONE)
+
+        downloaders = [asyncio.create_task(self._download_worker(key_queue, parse_queue)) for _ in range(self.download_concurrency)]
+        parsers = [asyncio.create_task(self._parse_worker(parse_queue, embed_queue)) for _ in range(self.parse_concurrency)]
+        batcher = asyncio.create_task(self._embed_batcher(embed_queue, write_queue))
+        writer = asyncio.create_task(self._writer(write_queue))
+
+        # 앞 단계가 끝나면 다음 단계에 종료 신호를 전달
+        await asyncio.gather(*downloaders)
+        self.stats["download"].finished_at = time.time()
+        for _ in parsers:
+            await parse_queue.put(_DONE)
+        await asyncio.gather(*parsers)
+        self.stats["parse"].finished_at = self.stats["dedup"].finished_at = time.time()
+        await embed_queue.put(_DONE)
+        await batcher
+        self.stats["embed"].finished_at = time.time()
+        await write_queue.put(_DONE)
+        await writer
+        self.stats["write"].finished_at = time.time()
+        self.finished_at = time.time()
+
+        return self.progress()
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# 작업 큐 설정: auto(REDIS_URL이 있으면 redis, 없으면 memory), redis, memory
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "auto").lower()
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 1))
+JOB_TTL = int(os.getenv("JOB_TTL", 7 * 24 * 3600))
+JOB_KEY_PREFIX = "jobs"
+# 실행 중인 작업의 생존 신호 주기(초). 신호가 JOB_STALE_AFTER초 넘게 끊긴 작업은 워커가 죽은 것으로 보고
+# JOB_MAX_ATTEMPTS번까지 다시 대기열에 넣고, 그 이상이면 실패 처리
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", 10))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", 60))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+class InMemoryJobStore:
+    """
+    프로세스 메모리에 작업 상태와 대기열을 보관하는 저장소 (테스트 및 단일 인스턴스용).
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+
+    def save(self, job: dict):
+        with self.lock:
+            self.jobs[job["id"]] = json.loads(json.dumps(job))
+
+    def load(self, job_id: str):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def push(self, job_id: str):
+        self.pending.put(job_id)
+
+    def pop(self, timeout: float):
+        try:
+            return self.pending.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def heartbeat(self, job_id: str):
+        pass
+
+    def ack(self, job_id: str):
+        pass
+
+    def claim_stale(self, stale_after: float) -> list:
+        # 작업과 워커가 같은 프로세스에 있으므로 워커만 죽은 작업은 없음
+        return []
+
+class RedisJobStore:
+    """
+    Redis에 작업 상태(jobs:{id})와 대기열(jobs:queue)을 보관하는 저장소.
+    여러 레플리카가 같은 대기열을 공유하고, 어느 레플리카에서든 작업 상태를 조회할 수 있습니다.
+    꺼낸 작업은 끝날 때까지 처리 목록(jobs:processing)에 두고 생존 신호(jobs:heartbeats)를 남겨,
+    처리 중에 파드가 죽은 작업을 다른 워커가 찾아낼 수 있게 합니다.
+    """
+
+    def __init__(self, redis_url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.queue_key = f"{JOB_KEY_PREFIX}:queue"
+        self.processing_key = f"{JOB_KEY_PREFIX}:processing"
+        self.heartbeat_key = f"{JOB_KEY_PREFIX}:heartbeats"
+        # 생존 신호 없이 처리 목록에 있는 작업을 처음 본 시각 (꺼낸 직후 신호를 남기기 전일 수 있음)
+        self.unbeaten = {}
+
+    def save(self, job: dict):
+        self.client.set(f"{JOB_KEY_PREFIX}:{job['id']}", json.dumps(job), ex=JOB_TTL)
+
+    def load(self, job_id: str):
+        value = self.client.get(f"{JOB_KEY_PREFIX}:{job_id}")
+        return json.loads(value) if value else None
+
+    def push(self, job_id: str):
+        self.client.lpush(self.queue_key, job_id)
+
+    def pop(self, timeout: float):
+        item = self.client.blmove(self.queue_key, self.processing_key, max(1, int(timeout)), src="RIGHT", dest="LEFT")
+        if not item:
+            return None
+        job_id = item.decode()
+        self.heartbeat(job_id)
+        return job_id
+
+    def heartbeat(self, job_id: str):
+        self.client.zadd(self.heartbeat_key, {job_id: time.time()})
+
+    def ack(self, job_id: str):
+        pipe = self.client.pipeline()
+        pipe.lrem(self.processing_key, 0, job_id)
+        pipe.zrem(self.heartbeat_key, job_id)
+        pipe.execute()
+
+    def claim_stale(self, stale_after: float) -> list:
+        """
+        생존 신호가 stale_after초 넘게 끊긴 작업을 처리 목록에서 빼고 그 ID 목록을 반환합니다.
+        여러 워커가 동시에 검사해도 LREM에 성공한 워커만 작업을 가져갑니다.
+        """
+        now = time.time()
+        processing = [item.decode() for item in self.client.lrange(self.processing_key, 0, -1)]
+        self.unbeaten = {job_id: seen for job_id, seen in self.unbeaten.items() if job_id in processing}
+        stale = []
+        for job_id in processing:
+            beat = self.client.zscore(self.heartbeat_key, job_id)
+            if beat is None:
+                beat = self.unbeaten.setdefault(job_id, now)
+            if now - beat <= stale_after:
+                continue
+            if self.client.lrem(self.processing_key, 1, job_id):
+                self.client.zrem(self.heartbeat_key, job_id)
+                self.unbeaten.pop(job_id, None)
+                stale.append(job_id)
+        return stale
+
+class JobQueue:
+    """
+    작업을 대기열에 넣고, 워커 스레드 풀이 등록된 핸들러로 처리하는 백그라운드 작업 큐.
+    핸들러는 (작업, 진행 상황 보고 함수)를 받아 결과 dict를 반환합니다.
+    워커는 대기 중 주기적으로 생존 신호가 끊긴 작업을 찾아 다시 대기열에 넣거나 실패 처리합니다.
+    """
+
+    def __init__(self, store, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = workers
+        self.handlers: Dict[str, Callable] = {}
+        self.threads = []
+        self.stop_event = threading.Event()
+        self.recovered_at = 0.0
+        self.recover_lock = threading.Lock()
+
+    def register(self, job_type: str, handler: Callable):
+        self.handlers[job_type] = handler
+
+    def submit(self, job_type: str, params: dict = None) -> dict:
+        """
+        새 작업을 생성하여 대기열에 넣고 작업 정보를 반환합니다.
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        job = {
+            "id": uuid.uuid4().hex,
+            "type": job_type,
+            "params": params or {},
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "attempts": 0,
+        }
+        self.store.save(job)
+        self.store.push(job["id"])
+        return job
+
+    def get(self, job_id: str):
+        return self.store.load(job_id)
+
+    def _update(self, job: dict, **fields):
+        job.update(fields)
+        self.store.save(job)
+
+    def _process(self, job_id: str):
+        job = self.store.load(job_id)
+        if job is None:
+            logger.warning(f"Job {job_id} expired before it was processed")
+            self.store.ack(job_id)
+            return
+        self._update(job, status="running", started_at=time.time(), attempts=job.get("attempts", 0) + 1)
+
+        def report(progress: dict):
+            self._update(job, progress=progress)
+
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(JOB_HEARTBEAT_INTERVAL):
+                try:
+                    self.store.heartbeat(job_id)
+                except Exception as e:
+                    logger.error(f"Failed to send heartbeat for job {job_id}: {str(e)}")
+
+        threading.Thread(target=heartbeat, name=f"job-heartbeat-{job_id}", daemon=True).start()
+        try:
+            result = self.handlers[job["type"]](job, report)
+            self._update(job, status="completed", result=result, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self._update(job, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            stop_heartbeat.set()
+            self.store.ack(job_id)
+
+    def _recover_stale(self):
+        """
+        생존 신호가 끊긴 작업을 다시 대기열에 넣습니다. JOB_MAX_ATTEMPTS번 시도한 작업은 실패로 기록합니다.
+        """
+        with self.recover_lock:
+            if time.monotonic() - self.recovered_at < JOB_HEARTBEAT_INTERVAL:
+                return
+            self.recovered_at = time.monotonic()
+        for job_id in self.store.claim_stale(JOB_STALE_AFTER):
+            job = self.store.load(job_id)
+            if job is None or job["status"] in ("completed", "failed"):
+                continue
+            if job.get("attempts", 0) >= JOB_MAX_ATTEMPTS:
+                logger.error(f"Job {job_id} failed: worker stopped responding")
+                self._update(job, status="failed", error="Worker stopped responding", finished_at=time.time())
+            else:
+                logger.warning(f"Requeueing job {job_id}: worker stopped responding")
+                self._update(job, status="queued")
+                self.store.push(job_id)
+
+    def _worker(self):
+        while not self.stop_event.is_set():
+            try:
+                self._recover_stale()
+                job_id = self.store.pop(timeout=1)
+            except Exception as e:
+                logger.error(f"Failed to read job queue: {str(e)}")
+                self.stop_event.wait(1)
+                continue
+            if job_id:
+                self._process(job_id)
+
+    def start(self):
+        """
+        워커 스레드를 시작합니다.
+        """
+        self.stop_event.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """
+        워커 스레드에 종료를 알립니다. 실행 중인 작업은 끝까지 처리됩니다.
+        끝내지 못하고 프로세스가 종료된 작업은 생존 신호가 끊겨 다른 워커가 다시 실행합니다.
+        """
+        self.stop_event.set()
+        self.threads = []
+
+def create_job_queue(redis_url: str = None) -> JobQueue:
+    """
+    JOB_QUEUE_BACKEND 설정에 맞는 저장소로 작업 큐를 생성합니다.
+    """
+    backend = JOB_QUEUE_BACKEND
+    if backend == "auto":
+        backend = "redis" if redis_url else "memory"
+    store = RedisJobStore(redis_url) if backend == "redis" else InMemoryJobStore()
+    return JobQueue(store)
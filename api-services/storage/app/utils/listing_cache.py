@@ -0,0 +1,48 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# 파일 목록 캐시 설정
+LISTING_CACHE_TTL = float(os.getenv("LISTING_CACHE_TTL", 10))
+LISTING_CACHE_MAX_ENTRIES = int(os.getenv("LISTING_CACHE_MAX_ENTRIES", 256))
+
+class ListingCache:
+    """
+    (prefix, cursor, limit)별 목록 페이지를 짧은 TTL 동안 보관하는 캐시.
+    업로드/삭제 시 invalidate()로 전체를 비워 다음 요청이 저장소에서 새로 읽도록 합니다.
+    """
+
+    def __init__(self, ttl: float = LISTING_CACHE_TTL, max_entries: int = LISTING_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: tuple, value: dict):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+
+listing_cache = ListingCache()
@@ -0,0 +1,165 @@
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+# 워커 수를 정하지 않았을 때 CPU 제한을 알 수 없는 경우의 기본값과 상한 (워커마다 파서 라이브러리와 메모리 상한만큼을 차지)
+DEFAULT_PARSE_WORKERS = 2
+MAX_DEFAULT_PARSE_WORKERS = 4
+
+def default_parse_workers() -> int:
+    """
+    컨테이너의 cgroup CPU 제한(쿼터/주기)에 맞춘 워커 수를 반환합니다.
+    os.cpu_count()는 파드가 아니라 노드의 코어 수를 반환하므로 사용하지 않습니다.
+    """
+    try:
+        # cgroup v2: "<쿼터> <주기>" 또는 "max <주기>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return DEFAULT_PARSE_WORKERS
+        cpus = int(quota) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: 쿼터가 -1이면 제한 없음
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+        except (OSError, ValueError):
+            return DEFAULT_PARSE_WORKERS
+        if quota <= 0:
+            return DEFAULT_PARSE_WORKERS
+        cpus = quota / period
+    return max(1, min(MAX_DEFAULT_PARSE_WORKERS, int(cpus)))
+
+# 프로세스 풀 파싱 설정 (INGEST_PARSE_WORKERS=0이면 스레드에서 직접 파싱, 설정하지 않으면 CPU 제한에 맞춤)
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS") or default_parse_workers())
+INGEST_PARSE_TIMEOUT = float(os.getenv("INGEST_PARSE_TIMEOUT", 300))
+# 워커의 데이터 영역(힙, 익명 메모리) 상한. 주소 공간 예약만 하는 네이티브 라이브러리 스레드는 제외되도록 RLIMIT_DATA 사용
+INGEST_PARSE_MEMORY_LIMIT_MB = int(os.getenv("INGEST_PARSE_MEMORY_LIMIT_MB", 2048))
+
+class ParseTimeoutError(Exception):
+    pass
+
+def _worker_main(conn, memory_limit_mb: int):
+    """
+    워커 프로세스 진입점. 파서 모듈을 불러온 뒤 메모리 상한을 설정하고 (객체 키, 파일 경로, 인덱스 이름)을 받아 파싱 결과를 돌려줍니다.
+    상한은 import가 끝난 뒤에 적용하여 라이브러리 적재가 아니라 큰 파일을 파싱할 때만 걸리도록 합니다.
+    """
+    from app.utils.document_parser import parse_file
+
+    if memory_limit_mb:
+        import resource
+
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        name, file_path, index_name = task
+        try:
+            conn.send(("ok", parse_file(name, file_path, index_name)))
+        except MemoryError:
+            conn.send(("error", f"Parser exceeded the {memory_limit_mb} MB memory limit"))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+class ParseWorker:
+    def __init__(self, context, memory_limit_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def parse(self, name: str, file_path: str, index_name: str, timeout: float) -> list:
+        self.conn.send((name, file_path, index_name))
+        if not self.conn.poll(timeout):
+            raise ParseTimeoutError(f"Parsing {name} timed out after {timeout} seconds")
+        status, result = self.conn.recv()
+        if status == "error":
+            raise ValueError(result)
+        return result
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+class ParsePool:
+    """
+    PDF/DOCX/XLSX/PPTX처럼 GIL을 오래 잡는 파서를 별도 프로세스에서 실행하는 워커 풀.
+    파일마다 제한 시간을 두고, 시간을 넘기거나 비정상 종료된 워커는 새 프로세스로 교체합니다.
+    """
+
+    def __init__(self, workers: int = INGEST_PARSE_WORKERS, timeout: float = INGEST_PARSE_TIMEOUT, memory_limit_mb: int = INGEST_PARSE_MEMORY_LIMIT_MB):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        # 서버의 스레드를 복제하지 않도록 fork 대신 spawn 사용
+        self.context = multiprocessing.get_context("spawn")
+        self.idle = queue.Queue()
+        self.started = False
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _spawn(self) -> ParseWorker:
+        return ParseWorker(self.context, self.memory_limit_mb)
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            for _ in range(self.workers):
+                self.idle.put(self._spawn())
+            self.started = True
+
+    def parse(self, name: str, file_path: str, index_name: str = None) -> list:
+        """
+        유휴 워커에서 파일을 파싱하여 분할된 Document 목록을 반환합니다 (호출 스레드는 결과를 기다림).
+        """
+        self.start()
+        worker = self.idle.get()
+        try:
+            result = worker.parse(name, file_path, index_name, self.timeout)
+        except ParseTimeoutError:
+            worker.kill()
+            worker = self._spawn()
+            raise
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            # 메모리 부족 등으로 워커가 죽은 경우
+            worker.kill()
+            worker = self._spawn()
+            raise ValueError(f"Parser process for {name} exited unexpectedly")
+        finally:
+            self.idle.put(worker)
+        return result
+
+    def shutdown(self):
+        with self.lock:
+            while not self.idle.empty():
+                self.idle.get().stop()
+            self.started = False
+
+parse_pool = ParsePool()
@@ -0,0 +1,456 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import mimetypes
+import functools
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterable, List, Optional, Tuple
+from app.utils.stream_io import INGEST_STREAM_CHUNK_SIZE, open_chunked
+
+logger = logging.getLogger(__name__)
+
+# 저장소 공통 설정: 블로킹 SDK 호출용 스레드 수, 재시도 횟수와 지수 백오프 기준 시간(초)
+STORAGE_MAX_WORKERS = int(os.getenv("STORAGE_MAX_WORKERS", 32))
+STORAGE_RETRY_ATTEMPTS = int(os.getenv("STORAGE_RETRY_ATTEMPTS", 3))
+STORAGE_RETRY_BACKOFF = float(os.getenv("STORAGE_RETRY_BACKOFF", 0.5))
+
+# 분할 업로드 설정: 파트(블록) 크기, 파일당 동시 파트 수, 동시에 처리할 업로드 수
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", 8 * 1024 * 1024))
+UPLOAD_PART_CONCURRENCY = int(os.getenv("UPLOAD_PART_CONCURRENCY", 4))
+UPLOAD_MAX_CONCURRENT_UPLOADS = int(os.getenv("UPLOAD_MAX_CONCURRENT_UPLOADS", 8))
+
+def guess_content_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+class StorageBackend(ABC):
+    """
+    파일 저장소 공통 인터페이스.
+    구현체는 블로킹 메서드(list_files_page, upload_file 등)를 제공하고, 비동기 메서드는
+    이를 공유 스레드 풀에서 일시적 오류 재시도와 함께 실행합니다.
+    이미 워커 스레드에서 실행 중인 코드(수집 파이프라인 등)는 call()로 블로킹 메서드를 직접 호출합니다.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=STORAGE_MAX_WORKERS, thread_name_prefix="storage")
+        # 업로드 전용 스레드 풀 (업로드가 몰려도 다른 저장소 호출을 막지 않음)
+        self.upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_MAX_CONCURRENT_UPLOADS, thread_name_prefix="upload")
+
+    @abstractmethod
+    def list_files_page(self, prefix: str = "", cursor: Optional[str] = None, limit: int = 100) -> dict:
+        """{"files": [{"name", "size", "last_modified"}], "next_cursor": 다음 페이지 커서 또는 None}을 반환합니다."""
+
+    @abstractmethod
+    def upload_file(self, file_obj: IO[bytes], name: str) -> None:
+        """파일 객체를 업로드합니다."""
+
+    @abstractmethod
+    def get_object_info(self, name: str) -> Optional[dict]:
+        """{"size", "etag", "content_type"}를 반환하고, 객체가 없으면 None을 반환합니다."""
+
+    @abstractmethod
+    def delete_file(self, name: str) -> bool:
+        """객체를 삭제하고, 객체가 없으면 False를 반환합니다."""
+
+    @abstractmethod
+    def open_object(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> IO[bytes]:
+        """객체(또는 start~end 바이트 범위, 끝 포함)를 읽기 스트림으로 엽니다."""
+
+    @abstractmethod
+    def list_file_versions(self) -> dict:
+        """모든 객체의 {이름: ETag}를 반환합니다."""
+
+    def delete_files(self, names: List[str]) -> dict:
+        """
+        여러 객체를 삭제하고 {"deleted": [...], "errors": {이름: 오류}}를 반환합니다.
+        일괄 삭제 API가 있는 구현체는 이 메서드를 재정의합니다.
+        """
+        deleted, errors = [], {}
+        for name in names:
+            try:
+                if self.call(self.delete_file, name):
+                    deleted.append(name)
+                else:
+                    errors[name] = "File not found"
+            except Exception as e:
+                errors[name] = str(e)
+        return {"deleted": deleted, "errors": errors}
+
+    def upload_files(self, items: Iterable[Tuple[str, IO[bytes]]]) -> dict:
+        """
+        (객체 키, 파일 객체) 목록을 업로드 스레드 풀에서 병렬로 업로드하고
+        {"uploaded": [...], "errors": {이름: 오류}}를 반환합니다.
+        items가 제너레이터여도 동시에 열려 있는 파일 수는 일정하게 제한됩니다.
+        """
+        slots = threading.BoundedSemaphore(UPLOAD_MAX_CONCURRENT_UPLOADS * 2)
+        futures = []
+
+        def upload(name, file_obj):
+            try:
+                self.call(self._upload_from_start, file_obj, name)
+            finally:
+                file_obj.close()
+                slots.release()
+
+        try:
+            for name, file_obj in items:
+                slots.acquire()
+                futures.append((name, self.upload_executor.submit(upload, name, file_obj)))
+        finally:
+            uploaded, errors = [], {}
+            for name, future in futures:
+                try:
+                    future.result()
+                    uploaded.append(name)
+                except Exception as e:
+                    errors[name] = str(e)
+        return {"uploaded": uploaded, "errors": errors}
+
+    def is_transient(self, error: Exception) -> bool:
+        """재시도할 일시적 오류인지 판단합니다."""
+        return isinstance(error, (ConnectionError, TimeoutError))
+
+    def call(self, func, *args, **kwargs):
+        """
+        블로킹 메서드를 일시적 오류에 대해 지수 백오프(지터 포함)로 재시도하며 호출합니다.
+        """
+        for attempt in range(1, STORAGE_RETRY_ATTEMPTS + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == STORAGE_RETRY_ATTEMPTS or not self.is_transient(e):
+                    raise
+                delay = STORAGE_RETRY_BACKOFF * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                logger.warning(f"Storage call {func.__name__} failed ({str(e)}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    async def _run(self, func, *args, executor=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor or self.executor, functools.partial(self.call, func, *args))
+
+    def _upload_from_start(self, file_obj: IO[bytes], name: str) -> None:
+        # 재시도 시 처음부터 다시 읽도록 되감기
+        file_obj.seek(0)
+        self.upload_file(file_obj, name)
+
+    async def list_files(self, prefix: str = "", cursor: Optional[str] = None, limit: int = 100) -> dict:
+        return await self._run(self.list_files_page, prefix, cursor, limit)
+
+    async def upload(self, file_obj: IO[bytes], name: str) -> None:
+        return await self._run(self._upload_from_start, file_obj, name, executor=self.upload_executor)
+
+    async def get_info(self, name: str) -> Optional[dict]:
+        return await self._run(self.get_object_info, name)
+
+    async def delete(self, name: str) -> bool:
+        return await self._run(self.delete_file, name)
+
+    async def open(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> IO[bytes]:
+        return await self._run(self.open_object, name, start, end)
+
+    async def list_versions(self) -> dict:
+        return await self._run(self.list_file_versions)
+
+    async def delete_many(self, names: List[str]) -> dict:
+        return await self._run(self.delete_files, names)
+
+    async def upload_many(self, items: Iterable[Tuple[str, IO[bytes]]]) -> dict:
+        return await self._run(self.upload_files, items)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.upload_executor.shutdown(wait=False)
+
+class S3StorageBackend(StorageBackend):
+    def __init__(self):
+        super().__init__()
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        # 재시도는 call()에서 처리하므로 SDK 자체 재시도는 끔 (시도 횟수가 곱해지지 않도록)
+        self.client = boto3.client(
+            's3',
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            region_name=os.getenv("AWS_REGION"),
+            # moto, MinIO 등 S3 호환 로컬 서버 사용 시 지정
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            config=Config(
+                max_pool_connections=STORAGE_MAX_WORKERS + UPLOAD_MAX_CONCURRENT_UPLOADS * UPLOAD_PART_CONCURRENCY,
+                retries={"total_max_attempts": 1},
+            ),
+        )
+        self.bucket = os.getenv("S3_BUCKET_NAME")
+        # 파트 크기를 넘는 파일은 S3 멀티파트 업로드로 파트를 병렬 전송
+        self.upload_config = TransferConfig(
+            multipart_threshold=UPLOAD_PART_SIZE,
+            multipart_chunksize=UPLOAD_PART_SIZE,
+            max_concurrency=UPLOAD_PART_CONCURRENCY,
+        )
+
+    def is_transient(self, error: Exception) -> bool:
+        from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+
+        if isinstance(error, (BotoConnectionError, ReadTimeoutError)):
+            return True
+        if isinstance(error, ClientError):
+            code = error.response.get("Error", {}).get("Code")
+            status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            return status >= 500 or code in ("SlowDown", "RequestTimeout", "Throttling", "ThrottlingException")
+        return super().is_transient(error)
+
+    def list_files_page(self, prefix="", cursor=None, limit=100):
+        # 한 페이지씩 조회하고 다음 페이지는 continuation token으로 이어서 조회
+        params = {"Bucket": self.bucket, "Prefix": prefix, "MaxKeys": limit}
+        if cursor:
+            params["ContinuationToken"] = cursor
+        response = self.client.list_objects_v2(**params)
+        files = [
+            {"name": content['Key'], "size": content['Size'], "last_modified": content['LastModified'].isoformat()}
+            for content in response.get('Contents', [])
+        ]
+        return {"files": files, "next_cursor": response.get('NextContinuationToken')}
+
+    def upload_file(self, file_obj, name):
+        self.client.upload_fileobj(
+            file_obj, self.bucket, name,
+            ExtraArgs={"ContentType": guess_content_type(name)},
+            Config=self.upload_config,
+        )
+
+    def get_object_info(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": head["ContentLength"], "etag": head["ETag"], "content_type": head.get("ContentType")}
+
+    def delete_file(self, name):
+        if self.get_object_info(name) is None:
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+        return True
+
+    def delete_files(self, names):
+        # delete_objects는 요청당 최대 1,000개까지 삭제
+        deleted, errors = [], {}
+        for i in range(0, len(names), 1000):
+            batch = names[i:i + 1000]
+            response = self.call(
+                self.client.delete_objects,
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": name} for name in batch], "Quiet": True},
+            )
+            failed = {error["Key"]: error.get("Message") or error.get("Code") for error in response.get("Errors", [])}
+            errors.update(failed)
+            deleted.extend(name for name in batch if name not in failed)
+        return {"deleted": deleted, "errors": errors}
+
+    def open_object(self, name, start=None, end=None):
+        # start/end가 주어지면 해당 바이트 범위(끝 포함)만 요청
+        extra = {"Range": f"bytes={start}-{end}"} if start is not None else {}
+        body = self.client.get_object(Bucket=self.bucket, Key=name, **extra)['Body']
+        return open_chunked(body.iter_chunks(INGEST_STREAM_CHUNK_SIZE), close=body.close)
+
+    def list_file_versions(self):
+        versions = {}
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket):
+            for content in page.get('Contents', []):
+                versions[content['Key']] = content['ETag']
+        return versions
+
+class AzureBlobStorageBackend(StorageBackend):
+    def __init__(self):
+        super().__init__()
+        from azure.storage.blob import BlobServiceClient
+
+        # 파트 크기를 넘는 파일은 블록으로 나누어 스테이징한 뒤 커밋 (Azurite 연결 문자열도 사용 가능)
+        # 재시도는 call()에서 처리하므로 SDK 자체 재시도는 끔
+        self.service_client = BlobServiceClient.from_connection_string(
+            os.getenv("AZURE_CONNECTION_STRING"),
+            max_single_put_size=UPLOAD_PART_SIZE,
+            max_block_size=UPLOAD_PART_SIZE,
+            retry_total=0,
+        )
+        self.container_client = self.service_client.get_container_client(os.getenv("AZURE_CONTAINER_NAME"))
+
+    def is_transient(self, error: Exception) -> bool:
+        from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+
+        if isinstance(error, (ServiceRequestError, ServiceResponseError)):
+            return True
+        if isinstance(error, HttpResponseError):
+            return error.status_code is not None and (error.status_code >= 500 or error.status_code in (408, 429))
+        return super().is_transient(error)
+
+    def list_files_page(self, prefix="", cursor=None, limit=100):
+        # 한 페이지씩 조회하고 다음 페이지는 continuation token으로 이어서 조회
+        pages = self.container_client.list_blobs(name_starts_with=prefix or None, results_per_page=limit).by_page(continuation_token=cursor)
+        files = [
+            {"name": blob.name, "size": blob.size, "last_modified": blob.last_modified.isoformat() if blob.last_modified else None}
+            for blob in next(pages, [])
+        ]
+        return {"files": files, "next_cursor": pages.continuation_token}
+
+    def upload_file(self, file_obj, name):
+        from azure.storage.blob import ContentSettings
+
+        self.container_client.upload_blob(
+            name,
+            file_obj,
+            overwrite=True,
+            max_concurrency=UPLOAD_PART_CONCURRENCY,
+            content_settings=ContentSettings(content_type=guess_content_type(name)),
+        )
+
+    def get_object_info(self, name):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            properties = self.container_client.get_blob_client(name).get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        return {"size": properties.size, "etag": properties.etag, "content_type": properties.content_settings.content_type}
+
+    def delete_file(self, name):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            self.container_client.delete_blob(name)
+        except ResourceNotFoundError:
+            return False
+        return True
+
+    def delete_files(self, names):
+        # Blob Batch API는 요청당 최대 256개까지 삭제
+        deleted, errors = [], {}
+        for i in range(0, len(names), 256):
+            batch = names[i:i + 256]
+            responses = self.call(self.container_client.delete_blobs, *batch, raise_on_any_failure=False)
+            for name, response in zip(batch, responses):
+                if response.status_code in (200, 202):
+                    deleted.append(name)
+                elif response.status_code == 404:
+                    errors[name] = "File not found"
+                else:
+                    errors[name] = f"HTTP {response.status_code}"
+        return {"deleted": deleted, "errors": errors}
+
+    def open_object(self, name, start=None, end=None):
+        # start/end가 주어지면 해당 바이트 범위(끝 포함)만 요청
+        blob_client = self.container_client.get_blob_client(name)
+        if start is not None:
+            downloader = blob_client.download_blob(offset=start, length=end - start + 1)
+        else:
+            downloader = blob_client.download_blob()
+        return open_chunked(downloader.chunks())
+
+    def list_file_versions(self):
+        return {blob.name: blob.etag for blob in self.container_client.list_blobs()}
+
+class LocalStorageBackend(StorageBackend):
+    """
+    로컬 디렉터리를 저장소로 사용하는 구현 (오프라인 테스트 및 벤치마크용).
+    """
+
+    def __init__(self, root: str = None):
+        super().__init__()
+        self.root = os.path.abspath(root or os.getenv("LOCAL_STORAGE_PATH", "/data/storage"))
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object name: {name}")
+        return path
+
+    def _names(self):
+        for directory, _, files in os.walk(self.root):
+            for file in files:
+                if not file.startswith(".upload-"):
+                    yield os.path.relpath(os.path.join(directory, file), self.root).replace(os.sep, "/")
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    def list_files_page(self, prefix="", cursor=None, limit=100):
+        # 이름순으로 정렬하고 커서(마지막으로 반환한 이름) 다음부터 반환
+        names = sorted(name for name in self._names() if name.startswith(prefix) and (cursor is None or name > cursor))
+        files = []
+        for name in names[:limit]:
+            stat = os.stat(self._path(name))
+            files.append({"name": name, "size": stat.st_size, "last_modified": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(stat.st_mtime))})
+        next_cursor = files[-1]["name"] if len(names) > limit else None
+        return {"files": files, "next_cursor": next_cursor}
+
+    def upload_file(self, file_obj, name):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체하여 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 함
+        tmp_path = os.path.join(os.path.dirname(path), f".upload-{os.getpid()}-{random.getrandbits(32):x}")
+        try:
+            with open(tmp_path, "wb") as f:
+                while chunk := file_obj.read(INGEST_STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_object_info(self, name):
+        try:
+            stat = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return {"size": stat.st_size, "etag": self._etag(stat), "content_type": guess_content_type(name)}
+
+    def delete_file(self, name):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def open_object(self, name, start=None, end=None):
+        f = open(self._path(name), "rb")
+        if start is None:
+            return f
+        f.seek(start)
+        remaining = end - start + 1
+
+        def chunks():
+            nonlocal remaining
+            while remaining > 0:
+                chunk = f.read(min(INGEST_STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+        return open_chunked(chunks(), close=f.close)
+
+    def list_file_versions(self):
+        return {name: self._etag(os.stat(self._path(name))) for name in self._names()}
+
+def create_storage_backend(provider: str = None) -> StorageBackend:
+    """
+    STORAGE_PROVIDER 설정(s3, azureblob, local)에 맞는 저장소 구현을 생성합니다.
+    """
+    provider = provider or os.getenv("STORAGE_PROVIDER")
+    if provider == "s3":
+        return S3StorageBackend()
+    if provider == "azureblob":
+        return AzureBlobStorageBackend()
+    if provider == "local":
+        return LocalStorageBackend()
+    raise ValueError("Unsupported STORAGE_PROVIDER value. Use 's3', 'azureblob' or 'local'.")
@@ -0,0 +1,89 @@
+import io
+import os
+import tempfile
+from typing import IO, Iterable
+
+# 스트리밍 수집 설정
+INGEST_STREAM_CHUNK_SIZE = int(os.getenv("INGEST_STREAM_CHUNK_SIZE", 1024 * 1024))
+INGEST_SPOOL_MAX_MEMORY = int(os.getenv("INGEST_SPOOL_MAX_MEMORY", 8 * 1024 * 1024))
+INGEST_SPOOL_MAX_SIZE = int(os.getenv("INGEST_SPOOL_MAX_SIZE", 2 * 1024 * 1024 * 1024))
+INGEST_TMP_DIR = os.getenv("INGEST_TMP_DIR") or None
+
+class ChunkedStream(io.RawIOBase):
+    """
+    바이트 청크 이터레이터(S3 iter_chunks, Azure chunks 등)를 읽기 전용 파일 객체로 감싸는 스트림.
+    한 번에 하나의 청크만 메모리에 유지합니다.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], close=None):
+        self.chunks = iter(chunks)
+        self.buffer = b""
+        self.on_close = close
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self.buffer:
+            try:
+                self.buffer = next(self.chunks)
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self.buffer))
+        b[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed and self.on_close:
+            self.on_close()
+        super().close()
+
+def open_chunked(chunks: Iterable[bytes], close=None) -> IO[bytes]:
+    """
+    바이트 청크 이터레이터를 버퍼링된 바이너리 스트림으로 반환합니다.
+    """
+    return io.BufferedReader(ChunkedStream(chunks, close), buffer_size=INGEST_STREAM_CHUNK_SIZE)
+
+def _copy_stream(stream: IO[bytes], target: IO[bytes], max_size: int):
+    size = 0
+    while True:
+        chunk = stream.read(INGEST_STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise ValueError(f"File exceeds the {max_size} byte spool limit")
+        target.write(chunk)
+
+def spool_stream(stream: IO[bytes], max_memory: int = INGEST_SPOOL_MAX_MEMORY, max_size: int = INGEST_SPOOL_MAX_SIZE) -> IO[bytes]:
+    """
+    탐색(seek)이 필요한 형식을 위해 스트림을 임시 파일로 복사합니다.
+    max_memory까지는 메모리에 두고 넘어가면 디스크로 옮기며, max_size를 넘으면 ValueError를 발생시킵니다.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        _copy_stream(stream, spooled, max_size)
+        spooled.seek(0)
+        return spooled
+    except Exception:
+        spooled.close()
+        raise
+    finally:
+        stream.close()
+
+def spool_to_file(stream: IO[bytes], suffix: str = "", max_size: int = INGEST_SPOOL_MAX_SIZE) -> str:
+    """
+    다른 프로세스에서 읽을 수 있도록 스트림을 INGEST_TMP_DIR의 임시 파일로 복사하고 경로를 반환합니다.
+    파일 삭제는 호출자가 담당합니다.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="ingest_", dir=INGEST_TMP_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _copy_stream(stream, f, max_size)
+        return path
+    except Exception:
+        os.remove(path)
+        raise
+    finally:
+        stream.close()
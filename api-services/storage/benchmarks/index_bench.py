@@ -0,0 +1,157 @@
+"""
+벡터 인덱스 설정별 메모리/recall@k/지연시간 벤치마크.
+
+임베딩 행렬(--vectors로 .npy 지정, 없으면 저차원 구조를 가진 합성 벡터)을 설정별 Redis 인덱스에 넣고,
+float32 전체 차원 완전 탐색 결과를 정답으로 삼아 recall@k와 질의 지연시간(p50/p95),
+10만 벡터당 메모리(인덱스 크기와 Redis used_memory 증가량)를 비교합니다.
+REDIS_URL이 없으면 Redis 없이 데이터 형식/차원 축소만 반영한 완전 탐색 recall과 벡터 데이터 크기를 계산합니다
+(이 경우 HNSW 근사 오차와 그래프 메모리는 반영되지 않음).
+합성 벡터는 실제 임베딩의 차원별 정보 분포(Matryoshka 학습 등)를 반영하지 않으므로, truncate/projection 결과는 실제 임베딩(--vectors)으로 확인하세요.
+
+실행: storage 디렉터리에서 `REDIS_URL=redis://localhost:6379 python -m benchmarks.index_bench --count 20000 --settings flat32,hnsw16,hnsw16-512`
+"""
+import os
+import argparse
+import time
+import numpy as np
+
+PRESETS = {
+    "flat32": {"algorithm": "FLAT", "datatype": "FLOAT32"},
+    "flat16": {"algorithm": "FLAT", "datatype": "FLOAT16"},
+    "hnsw32": {"algorithm": "HNSW", "datatype": "FLOAT32"},
+    "hnsw16": {"algorithm": "HNSW", "datatype": "FLOAT16"},
+    "hnsw16-ef64": {"algorithm": "HNSW", "datatype": "FLOAT16", "ef_runtime": 64},
+    "hnsw16-512": {"algorithm": "HNSW", "datatype": "FLOAT16", "dims": 512, "reduction": "truncate"},
+    "hnsw16-512p": {"algorithm": "HNSW", "datatype": "FLOAT16", "dims": 512, "reduction": "projection"},
+}
+
+def synthetic_vectors(count: int, dims: int, seed: int, latent: int = 64) -> np.ndarray:
+    # 실제 임베딩처럼 낮은 고유 차원 + 잡음을 가진 단위 벡터
+    rng = np.random.default_rng(seed)
+    mixing = rng.standard_normal((latent, dims)).astype(np.float32)
+    vectors = rng.standard_normal((count, latent)).astype(np.float32) @ mixing
+    vectors += 0.1 * np.linalg.norm(vectors, axis=1, keepdims=True) / np.sqrt(dims) * rng.standard_normal((count, dims)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def recall(found: list, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(ids) & set(expected.tolist())) / len(expected) for ids, expected in zip(found, truth)]))
+
+def percentile(values: list, q: float) -> float:
+    return float(np.percentile(values, q)) * 1000 if values else float("nan")
+
+class PrecomputedEmbeddings:
+    """
+    벤치마크용: 이미 계산된 벡터를 쓰므로 임베딩 모델을 호출하지 않습니다.
+    """
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+def run_offline(settings: dict, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    from app.utils.index_schema import REDIS_VECTOR_DTYPE_MAP, ReducedEmbeddings
+
+    dtype = REDIS_VECTOR_DTYPE_MAP[settings["datatype"]]
+    reducer = ReducedEmbeddings(PrecomputedEmbeddings(), settings["dims"], settings["reduction"], settings["projection_seed"]) if settings["dims"] else None
+    stored, probes = corpus, queries
+    if reducer:
+        stored, probes = np.asarray(reducer.reduce(corpus)), np.asarray(reducer.reduce(queries))
+    stored = stored.astype(dtype).astype(np.float32)
+    probes = probes.astype(dtype).astype(np.float32)
+    return {
+        "recall": recall(exact_top_k(stored, probes, k).tolist(), truth),
+        "vector_mb_per_100k": stored.shape[1] * np.dtype(dtype).itemsize * 100_000 / 2**20,
+    }
+
+def run_redis(redis_url: str, name: str, settings: dict, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, batch: int) -> dict:
+    import redis
+    from app.utils import index_schema
+    from app.utils.index_schema import create_vectorstore, reduce_vectors
+
+    client = redis.Redis.from_url(redis_url)
+    index_name = f"index_bench_{name}"
+    try:
+        client.ft(index_name).dropindex(delete_documents=True)
+    except redis.ResponseError:
+        pass
+    index_schema.index_schema_config["indexes"][index_name] = settings
+    vectorstore = create_vectorstore(redis_url, index_name, PrecomputedEmbeddings())
+
+    memory_before = client.info("memory")["used_memory"]
+    started = time.perf_counter()
+    for offset in range(0, len(corpus), batch):
+        vectors = reduce_vectors(vectorstore, corpus[offset:offset + batch].tolist())
+        ids = [str(i) for i in range(offset, offset + len(vectors))]
+        vectorstore.add_texts(ids, embeddings=vectors, keys=ids)
+    load_seconds = time.perf_counter() - started
+    memory_after = client.info("memory")["used_memory"]
+    info = client.ft(index_name).info()
+
+    probes = reduce_vectors(vectorstore, queries.tolist())
+    found, latencies = [], []
+    for probe in probes:
+        started = time.perf_counter()
+        docs = vectorstore.similarity_search_by_vector(probe, k=k)
+        latencies.append(time.perf_counter() - started)
+        found.append([int(doc.page_content) for doc in docs])
+
+    scale = 100_000 / len(corpus)
+    result = {
+        "recall": recall(found, truth),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "index_mb_per_100k": float(info.get("vector_index_sz_mb", 0)) * scale,
+        "used_mb_per_100k": (memory_after - memory_before) * scale / 2**20,
+        "load_seconds": load_seconds,
+    }
+    client.ft(index_name).dropindex(delete_documents=True)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", help="임베딩 행렬 .npy 파일 (N x dims). 지정하지 않으면 합성 벡터 생성")
+    parser.add_argument("--count", type=int, default=20000, help="합성 벡터 수")
+    parser.add_argument("--dims", type=int, default=1536, help="합성 벡터 차원")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--settings", default=",".join(PRESETS))
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL"))
+    args = parser.parse_args()
+
+    from app.utils.index_schema import DEFAULT_INDEX_SCHEMA
+
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        vectors = synthetic_vectors(args.count + args.queries, args.dims, args.seed)
+    # 질의는 코퍼스에 없는 벡터로 사용
+    corpus, queries = vectors[:-args.queries], vectors[-args.queries:]
+    truth = exact_top_k(corpus, queries, args.k)
+    mode = "redis" if args.redis_url else "offline (exact search, vector data only)"
+    print(f"corpus: {corpus.shape[0]} x {corpus.shape[1]}, queries: {len(queries)}, k={args.k}, mode: {mode}")
+
+    if args.redis_url:
+        print(f"{'setting':>12} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'index MB/100k':>14} {'used MB/100k':>13} {'load s':>7}")
+    else:
+        print(f"{'setting':>12} {'recall@k':>9} {'vector MB/100k':>15}")
+    for name in args.settings.split(","):
+        settings = {**DEFAULT_INDEX_SCHEMA["default"], **PRESETS[name]}
+        if args.redis_url:
+            result = run_redis(args.redis_url, name, settings, corpus, queries, truth, args.k, args.batch)
+            print(f"{name:>12} {result['recall']:>9.3f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                  f"{result['index_mb_per_100k']:>14.1f} {result['used_mb_per_100k']:>13.1f} {result['load_seconds']:>7.1f}")
+        else:
+            result = run_offline(settings, corpus, queries, truth, args.k)
+            print(f"{name:>12} {result['recall']:>9.3f} {result['vector_mb_per_100k']:>15.1f}")
+
+if __name__ == "__main__":
+    main()
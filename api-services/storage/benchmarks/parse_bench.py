@@ -0,0 +1,122 @@
+"""
+무거운 형식(PDF/DOCX/XLSX) 파싱의 워커 수별 처리량 벤치마크.
+
+PDF/DOCX/XLSX가 섞인 픽스처 코퍼스를 만들고(또는 --corpus로 기존 디렉터리 지정),
+스레드 파싱(워커 0)과 프로세스 풀 워커 수별로 코퍼스 전체를 파싱하여 files/sec을 비교합니다.
+
+실행: storage 디렉터리에서 `python -m benchmarks.parse_bench --files 60 --workers 0,1,2,4`
+"""
+import os
+import argparse
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+WORDS = "storage ingestion pipeline vector index embedding document parser worker chunk redis query".split()
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def write_pdf(path: str, rng: random.Random, pages: int):
+    # 외부 라이브러리 없이 텍스트 페이지로 구성된 최소 PDF 작성
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = " ".join(f"({_sentence(rng)}) Tj T*" for _ in range(40))
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(body)
+
+def write_docx(path: str, rng: random.Random, paragraphs: int):
+    import docx
+
+    document = docx.Document()
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            document.add_heading(_sentence(rng, 4), level=2)
+        document.add_paragraph(" ".join(_sentence(rng) for _ in range(5)))
+    document.save(path)
+
+def write_xlsx(path: str, rng: random.Random, rows: int):
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "name", "description", "score"])
+    for i in range(rows):
+        sheet.append([i, rng.choice(WORDS), _sentence(rng), rng.random()])
+    workbook.save(path)
+
+def build_corpus(directory: str, files: int, seed: int) -> list:
+    rng = random.Random(seed)
+    writers = [(".pdf", write_pdf, 20), (".docx", write_docx, 200), (".xlsx", write_xlsx, 500)]
+    paths = []
+    for i in range(files):
+        suffix, writer, size = writers[i % len(writers)]
+        path = os.path.join(directory, f"fixture_{i:03d}{suffix}")
+        writer(path, rng, size)
+        paths.append(path)
+    return paths
+
+def run(paths: list, workers: int) -> tuple:
+    from app.utils.document_parser import parse_file
+    from app.utils.parse_pool import ParsePool
+
+    if workers == 0:
+        # 기존 방식: 같은 프로세스의 스레드에서 파싱
+        parse, pool = parse_file, None
+        concurrency = 4
+    else:
+        pool = ParsePool(workers=workers)
+        pool.start()
+        parse = pool.parse
+        concurrency = workers
+
+    # 워커 기동 시간을 제외하기 위해 한 번 예열
+    parse(os.path.basename(paths[0]), paths[0])
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        chunks = sum(len(docs) for docs in executor.map(lambda path: parse(os.path.basename(path), path), paths))
+    elapsed = time.perf_counter() - started
+    if pool:
+        pool.shutdown()
+    return elapsed, chunks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="PDF/DOCX/XLSX 파일이 들어 있는 디렉터리 (지정하지 않으면 픽스처 생성)")
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--workers", default="0,1,2,4")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = args.corpus or tempfile.mkdtemp(prefix="parse_bench_")
+    if args.corpus:
+        paths = sorted(os.path.join(corpus, name) for name in os.listdir(corpus) if name.endswith((".pdf", ".docx", ".xlsx", ".pptx")))
+    else:
+        paths = build_corpus(corpus, args.files, args.seed)
+    print(f"corpus: {len(paths)} files in {corpus} (cpu_count={os.cpu_count()})")
+
+    print(f"{'workers':>8} {'seconds':>9} {'files/sec':>10} {'chunks':>8}")
+    for workers in (int(value) for value in args.workers.split(",")):
+        elapsed, chunks = run(paths, workers)
+        label = "thread" if workers == 0 else str(workers)
+        print(f"{label:>8} {elapsed:>9.2f} {len(paths) / elapsed:>10.2f} {chunks:>8}")
+
+if __name__ == "__main__":
+    main()
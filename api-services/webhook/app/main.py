@@ -3,25 +3,21 @@ import os
 import json
 from fastapi import FastAPI, Depends, Header, Request, HTTPException, Query
 from typing import Optional
+from app.utils.token_verifier import token_verifier
 
-AUTH_SERVICE_URL = "http://intelligenceapi-auth/verify"
 ANALYSIS_CSP_URL = "http://intelligenceapi-analysis/csp/invoke"
 ANALYSIS_DEVOPS_URL = "http://intelligenceapi-analysis/devops/invoke"
 SLACK_WEBHOOK_URL_CSP = os.getenv("SLACK_WEBHOOK_URL_CSP")
 SLACK_WEBHOOK_URL_DEVOPS = os.getenv("SLACK_WEBHOOK_URL_DEVOPS")
 MESSAGE_LANGUAGE = os.getenv("MESSAGE_LANGUAGE")
 
-async def verify_token(token: str) -> None:
+async def verify_token(token: str, internal_auth: Optional[str] = None) -> None:
     """
-    인증 서비스를 사용하여 토큰을 검증합니다.
+    토큰을 검증합니다.
+    게이트웨이 서명 헤더(x-internal-auth) 또는 AUTH_MODE 설정(local/remote)에 따라 검증합니다.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(AUTH_SERVICE_URL, headers={"Authorization": f"Bearer {token}"})
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Token is invalid")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Auth service error: {str(e)}")
+    if not await token_verifier.verify(token, internal_auth):
+        raise HTTPException(status_code=401, detail="Token is invalid")
 
 app = FastAPI(
     title="Intelligence Webhook API",
@@ -46,7 +42,8 @@ async def process_analysis(request: Request, token: str, analysis_url: str, slac
     """
     분석 요청을 처리하고, 결과를 Slack 메시지로 전송합니다.
     """
-    await verify_token(token)
+    internal_auth = request.headers.get("x-internal-auth")
+    await verify_token(token, internal_auth)
 
     try:
         payload = await request.json()
@@ -64,11 +61,15 @@ async def process_analysis(request: Request, token: str, analysis_url: str, slac
         "kwargs": {}
     }
 
+    headers = {"x-token": token}
+    if internal_auth:
+        headers["x-internal-auth"] = internal_auth
+
     async with httpx.AsyncClient(timeout=300.0) as client:
         response = await client.post(
             analysis_url,
             json=analysis_payload,
-            headers={"x-token": token}
+            headers=headers
         )
         if response.status_code != 200:
             detail = response.json()